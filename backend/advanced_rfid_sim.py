@@ -2,44 +2,49 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import math
-from collections import Counter
+import argparse
 import json
+import random
 import time
-from datetime import datetime
+from itertools import islice
 
 # --- Prerequisite: pip install matplotlib ---
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-
-# --- (1) Core Simulation Data ---
-PRODUCT_DATABASE = {
-    'Bluetooth Headphones': 'RFID_BH_9X01',
-    'USB-C Cable': 'RFID_USBC_2A8X',
-    'Phone Case': 'RFID_PC_4Y3Z',
-    'Charging Dock': 'RFID_CD_A7V1',
-    'Screen Protector': 'RFID_SP_E2W3',
-    'Wireless Charger': 'RFID_WC_G5T6',
-    'Power Bank': 'RFID_PB_H9J2',
-    'Bonus Item (Keychain)': 'RFID_BI_F8C9'
-}
-
-# --- Item Class ---
-class Item:
-    def __init__(self, name, rfid_tag, x, y, size=20):
-        self.name = name
-        self.rfid_tag = rfid_tag
-        self.x = x
-        self.y = y
-        self.size = size
-        self.canvas_id = None
-        self.text_id = None
-        self.rfid_text_id = None
-        self.detected = False
+# matplotlib is imported in create_graph, after the window is up; importing this module stays cheap.
+
+from conveyor import Conveyor, arrivals, package_source, DEFAULT_BELT_SPEED, DEFAULT_ARRIVALS_PER_MINUTE
+from history_store import VerificationHistory, format_ts, start_of_today
+from instrumentation import Instrumentation, RollingRate
+from product_catalog import ProductCatalog, search_products
+from rfid_engine import SimulationEngine, PRODUCT_DATABASE, DEFAULT_SCANNER_RANGE
+from report_sink import NDJSONReportWriter, FanOutSink
+from session_recording import SessionRecorder, FILE_SUFFIX
+
+# At most one detection pass per frame (~60 fps); motion events in between are coalesced.
+FRAME_INTERVAL_MS = 16
+REPORT_FLUSH_MS = 1000
+LATENCY_REFRESH_MS = 1000
+LIVE_CHART_REFRESH_MS = 250
+LIVE_WINDOW_SECONDS = 60
+CONVEYOR_FRAME_MS = 33
+# Packages sent down the belt per conveyor run.
+CONVEYOR_PACKAGES = 10_000
+# Product pickers show at most this many prefix matches, refreshed once typing pauses.
+PICKER_LIMIT = 50
+PICKER_SEARCH_DELAY_MS = 150
+STATUS_STYLES = {"SUCCESS": "Success.TLabel", "MISMATCH": "Error.TLabel", "CAUTION": "Caution.TLabel"}
+# Name/RFID labels are drawn for every item only up to this many placed items; beyond it they appear on hover.
+LABEL_DENSITY_LIMIT = 150
+SCANNER_OUTLINE_WIDTH = 4
+ITEM_STYLES = {False: {"fill": "white", "outline": "gray"}, True: {"fill": "#2ecc71", "outline": "darkgreen"}}
+SUMMARY_LABELS = ['Expected', 'Detected', 'Missing', 'Extra']
+SUMMARY_COLORS = ['#3498db', '#2ecc71', '#e74c3c', '#f39c12']
+# History view: look-back window for status counts and SKU mismatch rates, and rows per table.
+HISTORY_WINDOW_HOURS = 24
+HISTORY_ROWS = 10
 
 # --- Main Application Class ---
 class RFIDSimulationApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, product_database=None):
         super().__init__()
         self.title("RFID Package Verification System (Final Version)")
         self.geometry("1550x800")
@@ -47,19 +52,52 @@ class RFIDSimulationApp(tk.Tk):
         self.configure(bg="#2c3e50")
 
         # --- State Management Variables ---
-        self.customer_order_list = []
-        self.placed_items = []
-        self.detected_rfids = set()
-        self.expected_rfids_set = set()
-        self.item_instance_counter = Counter()
-        self.scan_mode_active = False
+        # Orders, placed items, detection and verification state live in the engine.
+        # Every finalized report is also streamed to rotating NDJSON files (see report_sink.py)
+        # and persisted in the verification history database (see history_store.py).
+        self.history = VerificationHistory()
+        self.report_sink = FanOutSink(NDJSONReportWriter(), self.history)
+        # Shared with the engine so UI stages and engine stages land in one latency table.
+        self.instrumentation = Instrumentation()
+        # A name -> base tag dict, or a product_catalog.ProductCatalog that is queried on demand.
+        self.product_database = product_database if product_database is not None else PRODUCT_DATABASE
+        # Placements, scanner paths and range changes are recorded for headless replay (see session_recording.py);
+        # each full reset starts a new recording.
+        self.recorder = SessionRecorder()
+        self.engine = SimulationEngine(self.product_database, report_sink=self.report_sink, instrumentation=self.instrumentation,
+                                       recorder=self.recorder)
+        self.product_search_jobs = {}
+        self.detection_rate = RollingRate(LIVE_WINDOW_SECONDS * 2)
+        self.verification_rate = RollingRate(LIVE_WINDOW_SECONDS * 2)
         self.scanner_id = None
+        self.scanner_pos = (0, 0)
+        self.items_by_canvas_id = {}
+        self.labels_visible = True
         self.drag_data = {"x": 0, "y": 0, "item": None}
-        self.order_confirmed = False
-        self.scan_start_time = None
-        self.last_verification_data = {}
+        self.pending_scanner_path = []
+        self.detection_pass_id = None
+        self.last_detection_pass = 0.0
+        # Conveyor mode: a Conveyor stepped in real time from an after() loop while running.
+        self.conveyor = None
+        self.conveyor_job = None
+        self.conveyor_clock = 0.0
+        self.history_window = None
 
         self.create_widgets()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.after(REPORT_FLUSH_MS, self.flush_reports)
+        self.after(LATENCY_REFRESH_MS, self.refresh_latency_panel)
+        self.after(LIVE_CHART_REFRESH_MS, self.refresh_live_chart)
+
+    def flush_reports(self):
+        with self.instrumentation.timed("report_flush"):
+            self.report_sink.maybe_flush()
+        self.after(REPORT_FLUSH_MS, self.flush_reports)
+
+    def on_close(self):
+        if self.conveyor is not None: self.stop_conveyor()
+        self.report_sink.close()
+        self.destroy()
 
     def create_widgets(self):
         style = ttk.Style(self)
@@ -97,7 +135,10 @@ class RFIDSimulationApp(tk.Tk):
         self.canvas = tk.Canvas(self.canvas_frame, bg="#34495e", highlightthickness=0)
         self.canvas.pack(fill="both", expand=True, padx=5, pady=5)
         self.canvas.bind("<Button-1>", self.on_canvas_click)
-        self.package_x1, self.package_y1, self.package_x2, self.package_y2 = 50, 50, 700, 650
+        self.canvas.tag_bind("item", "<Enter>", self.on_item_hover)
+        self.canvas.tag_bind("item", "<Leave>", lambda event: self.canvas.delete("hover_label"))
+        self.package_x1, self.package_y1 = self.engine.package_x1, self.engine.package_y1
+        self.package_x2, self.package_y2 = self.engine.package_x2, self.engine.package_y2
         self.canvas.create_rectangle(self.package_x1, self.package_y1, self.package_x2, self.package_y2,
                                      outline="black", dash=(5, 2), width=3, tags="package_boundary")
         ttk.Label(self.canvas_frame, text="Package Contents (Disabled until order is confirmed)",
@@ -123,8 +164,11 @@ class RFIDSimulationApp(tk.Tk):
         ttk.Label(scrollable_frame, text="Expected Items (Shopping Cart)", font=('Segoe UI', 12, 'bold')).pack(pady=(10, 5))
         self.expected_items_frame = ttk.Frame(scrollable_frame, relief="ridge", borderwidth=1)
         self.expected_items_frame.pack(fill="x", padx=5, pady=5)
+        # item_name -> {"required", "status", "shown"}; one persistent row per SKU.
+        self.expected_item_rows = {}
         self.create_item_placement_panel(scrollable_frame)
         self.create_scanner_panel(scrollable_frame)
+        self.create_conveyor_panel(scrollable_frame)
         
         metrics_sidebar = ttk.Frame(content_frame, style='TFrame')
         metrics_sidebar.grid(row=0, column=2, padx=10, pady=10, sticky="nsew")
@@ -139,9 +183,11 @@ class RFIDSimulationApp(tk.Tk):
         self.cart_frame.pack(fill="x", padx=5, pady=5)
         ttk.Label(self.cart_frame, text="Product:").grid(row=0, column=0, padx=5, pady=2, sticky="w")
         self.cart_item_var = tk.StringVar()
-        self.cart_item_dropdown = ttk.Combobox(self.cart_frame, textvariable=self.cart_item_var, values=list(PRODUCT_DATABASE.keys()), state="readonly")
+        initial_products = search_products(self.product_database, "", PICKER_LIMIT)
+        self.cart_item_dropdown = ttk.Combobox(self.cart_frame, textvariable=self.cart_item_var, values=initial_products)
         self.cart_item_dropdown.grid(row=0, column=1, columnspan=2, padx=5, pady=2, sticky="ew")
-        self.cart_item_dropdown.set(list(PRODUCT_DATABASE.keys())[0])
+        self.cart_item_dropdown.bind("<KeyRelease>", self.schedule_product_search)
+        if initial_products: self.cart_item_dropdown.set(initial_products[0])
         ttk.Label(self.cart_frame, text="Quantity:").grid(row=1, column=0, padx=5, pady=2, sticky="w")
         self.cart_qty_var = tk.StringVar(value="1")
         ttk.Spinbox(self.cart_frame, from_=1, to=99, textvariable=self.cart_qty_var, width=5).grid(row=1, column=1, padx=5, pady=2, sticky="w")
@@ -155,8 +201,10 @@ class RFIDSimulationApp(tk.Tk):
         self.config_frame.pack(fill="x", padx=5, pady=5)
         ttk.Label(self.config_frame, text="Select Item:").pack(pady=2, padx=5, anchor="w")
         self.item_select_var = tk.StringVar()
-        self.item_select_dropdown = ttk.Combobox(self.config_frame, textvariable=self.item_select_var, values=list(PRODUCT_DATABASE.keys()), state="readonly")
+        self.item_select_dropdown = ttk.Combobox(self.config_frame, textvariable=self.item_select_var,
+                                                 values=search_products(self.product_database, "", PICKER_LIMIT))
         self.item_select_dropdown.pack(fill="x", padx=5, pady=2)
+        self.item_select_dropdown.bind("<KeyRelease>", self.schedule_product_search)
         ttk.Button(self.config_frame, text="Add Selected Item (Click Canvas)", command=self.add_item_to_package).pack(pady=5)
         ttk.Button(self.config_frame, text="Clear All Items & Reset Order", command=self.clear_all_items).pack(pady=5)
 
@@ -171,7 +219,30 @@ class RFIDSimulationApp(tk.Tk):
         self.initiate_scan_button.grid(row=1, column=0, pady=10, padx=5)
         self.finalize_scan_button = ttk.Button(self.scanner_frame, text="Finalize Verification", command=self.finalize_verification, style="Finalize.TButton")
         self.finalize_scan_button.grid(row=1, column=1, pady=10, padx=5)
-        
+        self.verification_label = ttk.Label(self.scanner_frame, text="Awaiting Order", style='Info.TLabel', anchor="center")
+        self.verification_label.grid(row=2, column=0, columnspan=2, padx=5, pady=2, sticky="ew")
+        self.scanned_items_label = ttk.Label(self.scanner_frame, text="0 physical items detected")
+        self.scanned_items_label.grid(row=3, column=0, columnspan=2, padx=5, pady=2, sticky="w")
+        self.details_scan_label = ttk.Label(self.scanner_frame, text="Detected Items: None", wraplength=260, justify="left")
+        self.details_scan_label.grid(row=4, column=0, columnspan=2, padx=5, pady=2, sticky="w")
+        ttk.Button(self.scanner_frame, text="Save Session Recording", command=self.save_session_recording).grid(row=5, column=0, columnspan=2, pady=5)
+
+    def create_conveyor_panel(self, parent):
+        ttk.Label(parent, text="Conveyor Mode", font=('Segoe UI', 12, 'bold')).pack(pady=(15, 5))
+        self.conveyor_frame = ttk.Frame(parent, style='TFrame', relief="ridge", borderwidth=1)
+        self.conveyor_frame.pack(fill="x", padx=5, pady=5)
+        self.belt_speed_var = tk.StringVar(value=str(DEFAULT_BELT_SPEED))
+        self.arrival_rate_var = tk.StringVar(value=str(DEFAULT_ARRIVALS_PER_MINUTE))
+        self.error_rate_var = tk.StringVar(value="0.1")
+        for row, (text, var) in enumerate([("Belt Speed (px/s):", self.belt_speed_var), ("Arrivals / min:", self.arrival_rate_var),
+                                           ("Error Rate:", self.error_rate_var)]):
+            ttk.Label(self.conveyor_frame, text=text).grid(row=row, column=0, padx=5, pady=2, sticky="w")
+            ttk.Entry(self.conveyor_frame, textvariable=var, width=10).grid(row=row, column=1, padx=5, pady=2, sticky="ew")
+        self.conveyor_button = ttk.Button(self.conveyor_frame, text="Start Conveyor", command=self.toggle_conveyor)
+        self.conveyor_button.grid(row=3, column=0, columnspan=2, pady=5)
+        self.conveyor_stats_label = ttk.Label(self.conveyor_frame, text="Packages/min: -\nBacklog: -\nLatency p50/p95: -\nReads: -", justify="left")
+        self.conveyor_stats_label.grid(row=4, column=0, columnspan=2, padx=5, pady=2, sticky="w")
+
     def create_metrics_panel(self, parent):
         ttk.Label(parent, text="Verification Dashboard", font=('Segoe UI', 14, 'bold')).pack(pady=(10, 5))
         stats_frame = ttk.Frame(parent, relief="ridge", borderwidth=1)
@@ -184,106 +255,134 @@ class RFIDSimulationApp(tk.Tk):
             ttk.Label(stats_frame, text=f"{metric}:").grid(row=i+1, column=0, padx=5, pady=2, sticky="w")
             self.metrics_labels[metric] = ttk.Label(stats_frame, text="-")
             self.metrics_labels[metric].grid(row=i+1, column=1, padx=5, pady=2, sticky="w")
+        ttk.Button(stats_frame, text="History", command=self.show_history_view).grid(row=len(metrics_to_show)+1, column=0, columnspan=2, pady=5)
+
+        self.latency_frame = ttk.Frame(parent, relief="ridge", borderwidth=1)
+        self.latency_frame.pack(fill="x", padx=5, pady=(0, 10))
+        ttk.Label(self.latency_frame, text="Stage Latency (ms)", font=('Segoe UI', 11, 'bold')).grid(row=0, column=0, columnspan=3, pady=5, sticky="w")
+        ttk.Button(self.latency_frame, text="Export JSON", command=self.export_latency_json).grid(row=0, column=3, columnspan=2, padx=5, pady=5, sticky="e")
+        for col, heading in enumerate(["Stage", "n", "p50", "p95", "p99"]):
+            ttk.Label(self.latency_frame, text=heading, font=('Segoe UI', 9, 'bold')).grid(row=1, column=col, padx=4, sticky="w")
+        # stage -> (count, p50, p95, p99) labels; rows appear as stages first report.
+        self.latency_rows = {}
+
+        self.graph_frame = ttk.Frame(parent, relief="ridge", borderwidth=1)
+        self.graph_frame.pack(fill="both", expand=True, padx=5, pady=10)
+        self.graph_canvas = None
+        self.after_idle(self.create_graph)
+
+    def create_graph(self):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+        self.fig = Figure(figsize=(5, 5), dpi=100, facecolor='#34495e')
+        self.ax = self.fig.add_subplot(211)
+        self.live_ax = self.fig.add_subplot(212)
+        for ax in (self.ax, self.live_ax):
+            ax.tick_params(axis='x', colors='white')
+            ax.tick_params(axis='y', colors='white')
+            ax.spines['bottom'].set_color('white')
+            ax.spines['top'].set_color('#34495e')
+            ax.spines['right'].set_color('#34495e')
+            ax.spines['left'].set_color('white')
+            ax.set_facecolor('#34495e')
+
+        # Artists are created once and updated in place; the layout is computed once here.
+        self.summary_bars = self.ax.bar(SUMMARY_LABELS, [0] * len(SUMMARY_LABELS), color=SUMMARY_COLORS)
+        self.ax.set_ylabel('Item Count', color='white')
+        self.summary_title = self.ax.set_title('Verification Summary (Awaiting Scan)', color='gray')
+
+        # Live chart artists are animated: they are blitted over a cached background
+        # instead of triggering a full canvas redraw every refresh.
+        self.live_ax.set_xlim(-LIVE_WINDOW_SECONDS, 0)
+        self.live_ax.set_ylim(0, 10)
+        self.live_ax.set_xlabel('Seconds ago', color='white')
+        self.live_ax.set_title('Live Throughput', color='white')
+        self.live_x = list(range(-LIVE_WINDOW_SECONDS + 1, 1))
+        self.detections_line, = self.live_ax.plot(self.live_x, [0] * LIVE_WINDOW_SECONDS, color='#2ecc71', label='Detections / s', animated=True)
+        self.verifications_line, = self.live_ax.plot(self.live_x, [0] * LIVE_WINDOW_SECONDS, color='#3498db', label='Verifications / min', animated=True)
+        legend = self.live_ax.legend(loc='upper left', fontsize=7, facecolor='#2c3e50', edgecolor='#2c3e50')
+        for text in legend.get_texts(): text.set_color('white')
+        self.live_background = None
+        self.fig.tight_layout()
 
-        graph_frame = ttk.Frame(parent, relief="ridge", borderwidth=1)
-        graph_frame.pack(fill="both", expand=True, padx=5, pady=10)
-        
-        self.fig = plt.Figure(figsize=(5, 4), dpi=100, facecolor='#34495e')
-        self.ax = self.fig.add_subplot(111)
-        self.ax.tick_params(axis='x', colors='white')
-        self.ax.tick_params(axis='y', colors='white')
-        self.ax.spines['bottom'].set_color('white')
-        self.ax.spines['top'].set_color('#34495e') 
-        self.ax.spines['right'].set_color('#34495e')
-        self.ax.spines['left'].set_color('white')
-        self.ax.set_facecolor('#34495e')
-
-        self.graph_canvas = FigureCanvasTkAgg(self.fig, master=graph_frame)
+        self.graph_canvas = FigureCanvasTkAgg(self.fig, master=self.graph_frame)
         self.graph_canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
-        self.update_graph()
+        self.graph_canvas.mpl_connect('draw_event', self.on_graph_draw)
+        # draw_idle() only schedules a render; "graph_redraw" times the render itself (including the blit
+        # in on_graph_draw), whichever refresh asked for it.
+        self.render_graph = self.graph_canvas.draw
+        self.graph_canvas.draw = self.timed_graph_draw
+        data = self.engine.last_verification_data
+        self.update_graph(data["metrics"] if data else None)
+
+    def schedule_product_search(self, event):
+        # Debounced: one indexed prefix query per pause in typing, not one per keystroke.
+        if event.keysym in ("Up", "Down", "Return", "Escape", "Tab"): return
+        combobox = event.widget
+        job = self.product_search_jobs.pop(combobox, None)
+        if job is not None: self.after_cancel(job)
+        self.product_search_jobs[combobox] = self.after(PICKER_SEARCH_DELAY_MS, self.refresh_product_choices, combobox)
+
+    def refresh_product_choices(self, combobox):
+        self.product_search_jobs.pop(combobox, None)
+        with self.instrumentation.timed("product_search"):
+            combobox.configure(values=search_products(self.product_database, combobox.get(), PICKER_LIMIT))
 
     def add_to_cart(self):
         item_name = self.cart_item_var.get()
         try:
-            quantity = int(self.cart_qty_var.get())
-            if quantity < 1: raise ValueError
+            self.engine.add_to_cart(item_name, self.cart_qty_var.get())
+        except KeyError:
+            messagebox.showerror("Unknown Product", f"'{item_name}' is not in the product catalog.")
+            return
         except ValueError:
             messagebox.showerror("Invalid Quantity", "Please enter a valid positive number.")
             return
-        for _ in range(quantity):
-            self.customer_order_list.append(item_name)
         self.update_expected_items_status()
         
     def clear_cart(self):
         if messagebox.askyesno("Clear Cart", "Are you sure?"):
-            self.customer_order_list.clear()
+            self.engine.clear_cart()
             self.update_expected_items_status()
 
     def confirm_order(self):
-        if not self.customer_order_list:
-            messagebox.showwarning("Empty Cart", "Cannot confirm an empty order.")
+        try:
+            self.engine.confirm_order()
+        except ValueError as e:
+            messagebox.showwarning("Empty Cart", str(e))
             return
-        self.order_confirmed = True
-        self.expected_rfids_set = self._generate_full_expected_rfid_set()
         self.update_widget_states()
         self.verification_label.config(text="Pending Scan", style='Warning.TLabel')
         self.canvas_frame.nametowidget('package_contents_label').config(text="Package Contents (Click to Place Items)", foreground="white")
 
     def update_widget_states(self):
-        cart_state = "normal" if not self.order_confirmed else "disabled"
-        config_state = "normal" if self.order_confirmed and not self.scan_mode_active else "disabled"
-        scan_state = "normal" if self.order_confirmed and not self.scan_mode_active else "disabled"
-        finalize_state = "normal" if self.scan_mode_active else "disabled"
+        order_confirmed, scan_mode_active = self.engine.order_confirmed, self.engine.scan_mode_active
+        manual = self.conveyor is None
+        cart_state = "normal" if manual and not order_confirmed else "disabled"
+        config_state = "normal" if manual and order_confirmed and not scan_mode_active else "disabled"
+        scan_state = "normal" if manual and order_confirmed and not scan_mode_active else "disabled"
+        finalize_state = "normal" if scan_mode_active else "disabled"
         for child in self.cart_frame.winfo_children(): child.configure(state=cart_state)
         for child in self.config_frame.winfo_children(): child.configure(state=config_state)
         self.initiate_scan_button.config(state=scan_state)
         self.finalize_scan_button.config(state=finalize_state)
+        self.conveyor_button.config(state="disabled" if scan_mode_active else "normal")
 
     def finalize_verification(self):
-        scan_duration = time.time() - self.scan_start_time if self.scan_start_time else 0
-        self.scan_mode_active = False
+        self.flush_detection_pass()
+        self.engine.finalize_verification()
+        self.verification_rate.add()
         self.update_widget_states()
         self.canvas.unbind("<ButtonPress-1>"); self.canvas.unbind("<B1-Motion>"); self.canvas.unbind("<ButtonRelease-1>")
         self.canvas.bind("<Button-1>", self.on_canvas_click)
         self.canvas.config(cursor="")
         self.canvas.delete("scanner")
-
-        missing_rfids = self.expected_rfids_set - self.detected_rfids
-        extra_rfids = self.detected_rfids - self.expected_rfids_set
-        
-        def get_names_from_rfids(rfid_set):
-            names = [item.name for item in self.placed_items if item.rfid_tag in rfid_set]
-            return Counter(names)
-
-        missing_counts = get_names_from_rfids(missing_rfids)
-        extra_counts = get_names_from_rfids(extra_rfids)
-
-        if missing_rfids: status = "MISMATCH"
-        elif extra_rfids: status = "CAUTION"
-        else: status = "SUCCESS"
-
-        self.last_verification_data = {
-            "orderId": f"Custom_Order_{datetime.now().strftime('%Y%m%d%H%M%S')}",
-            "timestamp": datetime.now().isoformat(),
-            "verificationStatus": status,
-            "scanDurationSeconds": round(scan_duration, 2),
-            "metrics": {
-                "expectedItemsCount": len(self.expected_rfids_set),
-                "placedItemsCount": len(self.placed_items),
-                "detectedItemsCount": len(self.detected_rfids),
-                "missingItemsCount": len(missing_rfids),
-                "extraItemsCount": len(extra_rfids),
-            },
-            "expectedItems": dict(Counter(self.customer_order_list)),
-            "detectedItems": dict(Counter(item.name for item in self.placed_items if item.detected)),
-            "missingItemsDetail": dict(missing_counts),
-            "extraItemsDetail": dict(extra_counts),
-        }
         self.update_metrics_panel()
         self.show_verification_popup()
     
     def show_verification_popup(self):
-        data = self.last_verification_data
+        data = self.engine.last_verification_data
         popup = tk.Toplevel(self)
         popup.title("Verification Result")
         popup.geometry("450x350")
@@ -308,24 +407,124 @@ class RFIDSimulationApp(tk.Tk):
         ttk.Button(button_frame, text="OK", command=popup.destroy).pack(side="left", padx=10)
 
     def save_results_as_json(self):
-        if not self.last_verification_data:
+        if not self.engine.last_verification_data:
             messagebox.showerror("Error", "No verification data to save.")
             return
         filepath = filedialog.asksaveasfilename(
             defaultextension=".json", filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
-            initialfile=f"verification_report_{self.last_verification_data['orderId']}.json",
+            initialfile=f"verification_report_{self.engine.last_verification_data['orderId']}.json",
             title="Save Verification Report"
         )
         if not filepath: return
         try:
             with open(filepath, 'w') as f:
-                json.dump(self.last_verification_data, f, indent=4)
+                json.dump(self.engine.last_verification_data, f, indent=4)
             messagebox.showinfo("Success", f"Report saved successfully to:\n{filepath}")
         except Exception as e:
             messagebox.showerror("Save Error", f"An error occurred while saving the file:\n{e}")
 
-    def update_metrics_panel(self):
-        data = self.last_verification_data
+    def save_session_recording(self):
+        filepath = filedialog.asksaveasfilename(
+            defaultextension=FILE_SUFFIX, filetypes=[("Session recordings", f"*{FILE_SUFFIX}"), ("All files", "*.*")],
+            initialfile=f"scan_session_{time.strftime('%Y%m%d_%H%M%S')}{FILE_SUFFIX}", title="Save Session Recording"
+        )
+        if not filepath: return
+        try:
+            self.recorder.save(filepath)
+        except OSError as e:
+            messagebox.showerror("Save Error", f"An error occurred while saving the file:\n{e}")
+            return
+        messagebox.showinfo("Success", f"Session recording since the last reset ({len(self.recorder.results())} verifications) saved to:\n{filepath}")
+
+    # --- Verification History View ---
+    def show_history_view(self):
+        if self.history_window is not None and self.history_window.winfo_exists():
+            self.history_window.lift()
+            self.refresh_history_view()
+            return
+        window = self.history_window = tk.Toplevel(self)
+        window.title("Verification History")
+        window.geometry("760x680")
+        window.configure(bg="#34495e")
+        self.history_summary_label = ttk.Label(window, text="", font=('Segoe UI', 11, 'bold'))
+        self.history_summary_label.pack(pady=(10, 5))
+        tables = (
+            ("slowest", "Slowest Scans Today", ("Order", "Time", "Status", "Duration (s)"), HISTORY_ROWS),
+            ("skus", f"SKUs Most Often Missing or Extra (last {HISTORY_WINDOW_HOURS}h)", ("SKU", "Orders", "Mismatch Rate", "Missing", "Extra"), HISTORY_ROWS),
+            ("hourly", "Selected SKU by Hour", ("Hour", "Orders", "SKU Mismatch Rate", "Order Mismatch Rate"), 6),
+        )
+        self.history_tables = {}
+        for key, title, columns, height in tables:
+            ttk.Label(window, text=title, font=('Segoe UI', 10, 'bold')).pack(anchor="w", padx=10, pady=(8, 2))
+            tree = ttk.Treeview(window, columns=columns, show="headings", height=height)
+            for i, column in enumerate(columns):
+                tree.heading(column, text=column)
+                tree.column(column, width=220 if i == 0 else 120, anchor="w" if i == 0 else "e")
+            tree.pack(fill="x", padx=10)
+            self.history_tables[key] = tree
+        self.history_tables["skus"].bind("<<TreeviewSelect>>", self.on_history_sku_select)
+        button_frame = ttk.Frame(window)
+        button_frame.pack(side="bottom", pady=10)
+        ttk.Button(button_frame, text="Refresh", command=self.refresh_history_view).pack(side="left", padx=10)
+        ttk.Button(button_frame, text="Close", command=window.destroy).pack(side="left", padx=10)
+        self.refresh_history_view()
+
+    def refresh_history_view(self):
+        # Reports still buffered in the sink are written first, so the latest verification shows up.
+        self.history.flush()
+        self.history_since = time.time() - HISTORY_WINDOW_HOURS * 3600
+        with self.instrumentation.timed("history_query"):
+            statuses = self.history.status_counts(self.history_since)
+            slowest = self.history.slowest_scans(start_of_today(), limit=HISTORY_ROWS)
+            skus = self.history.worst_skus(self.history_since, limit=HISTORY_ROWS)
+        self.history_summary_label.config(text=f"Last {HISTORY_WINDOW_HOURS}h: " + "   ".join(
+            f"{status} {statuses.get(status, 0)}" for status in ("SUCCESS", "CAUTION", "MISMATCH")))
+        self.fill_history_table("slowest", [(order_id, format_ts(ts), status, f"{duration:.2f}")
+                                            for order_id, ts, status, duration in slowest])
+        self.fill_history_table("skus", [(sku, n, f"{rate:.1%}", missing, extra) for sku, n, rate, missing, extra in skus])
+        self.fill_history_table("hourly", [])
+
+    def fill_history_table(self, key, rows):
+        tree = self.history_tables[key]
+        tree.delete(*tree.get_children())
+        for row in rows: tree.insert("", "end", values=row)
+
+    def on_history_sku_select(self, event=None):
+        tree = self.history_tables["skus"]
+        selection = tree.selection()
+        if not selection: return
+        with self.instrumentation.timed("history_query"):
+            hours = self.history.mismatch_rate_by_sku_hour(self.history_since, sku=tree.set(selection[0], "SKU"))
+        self.fill_history_table("hourly", [(format_ts(hour)[:-3], n, f"{sku_rate:.1%}", f"{order_rate:.1%}")
+                                           for _, hour, n, sku_rate, order_rate in hours])
+
+    def refresh_latency_panel(self):
+        for stage, summary in sorted(self.instrumentation.snapshot().items()):
+            row = self.latency_rows.get(stage)
+            if row is None:
+                grid_row = len(self.latency_rows) + 2
+                ttk.Label(self.latency_frame, text=stage, font=('Segoe UI', 9)).grid(row=grid_row, column=0, padx=4, sticky="w")
+                row = self.latency_rows[stage] = [ttk.Label(self.latency_frame, font=('Segoe UI', 9)) for _ in range(4)]
+                for col, label in enumerate(row): label.grid(row=grid_row, column=col + 1, padx=4, sticky="e")
+            values = (summary["count"], summary["p50Ms"], summary["p95Ms"], summary["p99Ms"])
+            for label, value in zip(row, values):
+                text = str(value) if isinstance(value, int) else f"{value:.2f}"
+                if label.cget("text") != text: label.config(text=text)
+        self.after(LATENCY_REFRESH_MS, self.refresh_latency_panel)
+
+    def export_latency_json(self):
+        filepath = filedialog.asksaveasfilename(
+            defaultextension=".json", filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+            initialfile="stage_latency.json", title="Export Stage Latency"
+        )
+        if not filepath: return
+        try:
+            self.instrumentation.export_json(filepath)
+        except OSError as e:
+            messagebox.showerror("Save Error", f"An error occurred while saving the file:\n{e}")
+
+    def update_metrics_panel(self, data=None):
+        data = data if data is not None else self.engine.last_verification_data
         if not data:
             for label in self.metrics_labels.values(): label.config(text="-")
             self.update_graph()
@@ -340,25 +539,62 @@ class RFIDSimulationApp(tk.Tk):
         self.update_graph(metrics)
 
     def update_graph(self, metrics=None):
-        self.ax.clear()
+        if self.graph_canvas is None: return
         if metrics:
-            labels = ['Expected', 'Detected', 'Missing', 'Extra']
             values = [metrics['expectedItemsCount'], metrics['detectedItemsCount'], metrics['missingItemsCount'], metrics['extraItemsCount']]
-            colors = ['#3498db', '#2ecc71', '#e74c3c', '#f39c12']
-            self.ax.bar(labels, values, color=colors)
-            self.ax.set_ylabel('Item Count', color='white')
-            self.ax.set_title('Verification Summary', color='white')
+            self.summary_title.set_text('Verification Summary'); self.summary_title.set_color('white')
         else:
-            self.ax.set_title('Verification Summary (Awaiting Scan)', color='gray')
-        self.fig.tight_layout()
-        self.graph_canvas.draw()
+            values = [0] * len(SUMMARY_LABELS)
+            self.summary_title.set_text('Verification Summary (Awaiting Scan)'); self.summary_title.set_color('gray')
+        for bar, value in zip(self.summary_bars, values):
+            bar.set_height(value)
+        self.ax.set_ylim(0, max(max(values) * 1.15, 1))
+        # Coalesced with other pending redraws and rendered when Tk is idle.
+        self.graph_canvas.draw_idle()
+
+    def timed_graph_draw(self):
+        with self.instrumentation.timed("graph_redraw"):
+            self.render_graph()
+
+    def on_graph_draw(self, event):
+        # A full draw leaves out animated artists; cache the clean background and blit them back.
+        self.live_background = self.graph_canvas.copy_from_bbox(self.live_ax.bbox)
+        self.blit_live_chart()
+
+    def blit_live_chart(self):
+        if self.live_background is None: return
+        self.graph_canvas.restore_region(self.live_background)
+        self.live_ax.draw_artist(self.detections_line)
+        self.live_ax.draw_artist(self.verifications_line)
+        self.graph_canvas.blit(self.live_ax.bbox)
+
+    def refresh_live_chart(self):
+        if self.graph_canvas is not None: self.draw_live_chart()
+        self.after(LIVE_CHART_REFRESH_MS, self.refresh_live_chart)
+
+    def draw_live_chart(self):
+        with self.instrumentation.timed("live_chart"):
+            now = time.monotonic()
+            detections = self.detection_rate.per_second(LIVE_WINDOW_SECONDS, now)
+            verifications = self.verification_rate.rolling_sums(LIVE_WINDOW_SECONDS, 60, now)
+            self.detections_line.set_ydata(detections)
+            self.verifications_line.set_ydata(verifications)
+            peak = max(max(detections), max(verifications))
+            y_max = self.live_ax.get_ylim()[1]
+            if peak > y_max or (y_max > 10 and peak < y_max / 4):
+                # Rescaling changes the background, so this refresh needs a full (idle) draw.
+                self.live_ax.set_ylim(0, max(10, peak * 1.5))
+                self.graph_canvas.draw_idle()
+            else:
+                self.blit_live_chart()
         
     def initiate_scan(self):
-        if not self.placed_items:
-            messagebox.showwarning("Empty Package", "Please add items to the package before scanning.")
+        self.engine.set_scanner_range(self._read_scanner_range())
+        try:
+            self.engine.start_scan(100, 100)
+        except ValueError as e:
+            messagebox.showwarning("Empty Package", str(e))
             return
-        self.scan_start_time = time.time()
-        self.scan_mode_active = True
         self.update_widget_states()
         self.canvas.bind("<ButtonPress-1>", self.on_scanner_press)
         self.canvas.bind("<B1-Motion>", self.on_scanner_drag)
@@ -370,108 +606,139 @@ class RFIDSimulationApp(tk.Tk):
     def clear_all_items(self):
         if not messagebox.askyesno("Full Reset", "This will clear all placed items AND reset the order. Continue?"):
             return
-        for item in self.placed_items: self.canvas.delete(item.canvas_id); self.canvas.delete(item.text_id); self.canvas.delete(item.rfid_text_id)
-        self.placed_items.clear()
-        self.order_confirmed = False; self.scan_mode_active = False
-        self.detected_rfids.clear(); self.expected_rfids_set.clear()
-        self.item_instance_counter.clear(); self.customer_order_list.clear()
+        self.cancel_detection_pass()
+        self.canvas.delete("item", "item_label", "hover_label")
+        self.items_by_canvas_id.clear()
+        self.labels_visible = True
+        self.engine.reset()
+        self.recorder = self.engine.recorder = SessionRecorder()
         self.canvas.delete("scanner")
         self.canvas.unbind("<B1-Motion>"); self.canvas.unbind("<ButtonRelease-1>")
         self.canvas.bind("<Button-1>", self.on_canvas_click); self.canvas.config(cursor="")
         self.update_widget_states()
         self.update_scan_results()
-        self.last_verification_data = {}
         self.update_metrics_panel()
+        self.verification_label.config(text="Awaiting Order", style='Info.TLabel')
         self.canvas_frame.nametowidget('package_contents_label').config(text="Package Contents (Disabled until order is confirmed)", foreground="gray")
     
     def on_scanner_press(self, event):
-        if self.scan_mode_active:
-            overlapping_items = self.canvas.find_overlapping(event.x, event.y, event.x, event.y)
-            if self.scanner_id and self.scanner_id in overlapping_items:
+        if self.engine.scan_mode_active:
+            # Hit-test the scanner's outline directly instead of asking Tk for every overlapping item.
+            if self.scanner_id and self.point_on_scanner(event.x, event.y):
                 self.drag_data["item"] = self.scanner_id
                 self.drag_data["x"] = event.x
                 self.drag_data["y"] = event.y
 
     def on_scanner_drag(self, event):
-        if self.scan_mode_active and self.drag_data["item"] is not None:
+        if self.engine.scan_mode_active and self.drag_data["item"] is not None:
             dx = event.x - self.drag_data["x"]
             dy = event.y - self.drag_data["y"]
             self.canvas.move(self.drag_data["item"], dx, dy)
             self.drag_data["x"] = event.x
             self.drag_data["y"] = event.y
-            self.check_for_detected_items()
+            self.scanner_pos = (self.scanner_pos[0] + dx, self.scanner_pos[1] + dy)
+            # Record the sample and leave detection to a coalesced pass.
+            self.pending_scanner_path.append(self.scanner_pos)
+            if self.detection_pass_id is None:
+                self.detection_pass_id = self.after_idle(self.run_detection_pass)
 
     def on_scanner_release(self, event):
         self.drag_data["item"] = None
         self.drag_data["x"] = 0
         self.drag_data["y"] = 0
+        self.flush_detection_pass()
+
+    def run_detection_pass(self):
+        wait_ms = FRAME_INTERVAL_MS - (time.perf_counter() - self.last_detection_pass) * 1000
+        if wait_ms > 0:
+            self.detection_pass_id = self.after(int(wait_ms) + 1, self.run_detection_pass)
+            return
+        self.detection_pass_id = None
+        self.last_detection_pass = time.perf_counter()
+        self.check_for_detected_items()
+
+    def cancel_detection_pass(self):
+        if self.detection_pass_id is not None:
+            self.after_cancel(self.detection_pass_id)
+            self.detection_pass_id = None
+        self.pending_scanner_path.clear()
+
+    def flush_detection_pass(self):
+        if self.detection_pass_id is not None:
+            self.after_cancel(self.detection_pass_id)
+            self.detection_pass_id = None
+        self.check_for_detected_items()
 
     def check_for_detected_items(self):
-        if not self.scanner_id: return
-        scanner_coords = self.canvas.coords(self.scanner_id)
-        if not scanner_coords: return
-        scanner_x = (scanner_coords[0] + scanner_coords[2]) / 2
-        scanner_y = (scanner_coords[1] + scanner_coords[3]) / 2
-        try: scanner_range = int(self.scanner_range_var.get())
-        except ValueError: scanner_range = 80
-        for item in self.placed_items:
-            if not item.detected:
-                distance = math.sqrt((item.x - scanner_x)**2 + (item.y - scanner_y)**2)
-                if distance <= scanner_range:
-                    item.detected = True
-                    self.detected_rfids.add(item.rfid_tag)
-                    self.update_item_visual(item, detected=True)
-                    self.update_scan_results()
-
-    def update_scan_results(self):
-        num_detected = len(self.detected_rfids)
-        self.scanned_items_label.config(text=f"{num_detected} physical items detected")
-        detected_names = [item.name for item in self.placed_items if item.detected]
-        detected_counts = Counter(detected_names)
-        detected_text = ", ".join([f"{name} (x{count})" for name, count in detected_counts.items()])
-        self.details_scan_label.config(text=f"Detected Items: {detected_text if detected_text else 'None'}")
-        self.update_expected_items_status()
+        if not self.scanner_id or not self.pending_scanner_path: return
+        with self.instrumentation.timed("detection_pass"):
+            path, self.pending_scanner_path = self.pending_scanner_path, []
+            self.engine.set_scanner_range(self._read_scanner_range())
+            # Every sample since the last pass is swept, so coalesced jumps still cover the tags in between.
+            newly_detected = self.engine.scan_path(path)
+            if newly_detected:
+                self.detection_rate.add(len(newly_detected))
+                self.update_item_visuals(newly_detected, detected=True)
+                self.update_scan_results(newly_detected)
+
+    def update_scan_results(self, newly_detected=None):
+        with self.instrumentation.timed("scan_results_refresh"):
+            num_detected = len(self.engine.detected_rfids)
+            self.scanned_items_label.config(text=f"{num_detected} physical items detected")
+            detected_counts = self.engine.detected_counts()
+            detected_text = ", ".join([f"{name} (x{count})" for name, count in detected_counts.items()])
+            self.details_scan_label.config(text=f"Detected Items: {detected_text if detected_text else 'None'}")
+            if newly_detected is None:
+                self.update_expected_items_status()
+            else:
+                self.update_expected_items_status({item.name for item in newly_detected})
+
+    def update_expected_items_status(self, changed_names=None):
+        # Full rebuild only when the cart itself changes; detections touch just their own rows.
+        with self.instrumentation.timed("expected_items_refresh"):
+            if changed_names is None:
+                self.rebuild_expected_items()
+                return
+            detected_counts = self.engine.detected_counts()
+            for item_name in changed_names:
+                row = self.expected_item_rows.get(item_name)
+                if row: self.refresh_expected_item_row(row, detected_counts.get(item_name, 0))
 
-    def update_expected_items_status(self):
+    def rebuild_expected_items(self):
         for widget in self.expected_items_frame.winfo_children(): widget.destroy()
-        required_counts = Counter(self.customer_order_list)
-        detected_names = [item.name for item in self.placed_items if item.detected]
-        detected_counts = Counter(detected_names)
+        self.expected_item_rows = {}
+        required_counts = self.engine.order_counts()
+        detected_counts = self.engine.detected_counts()
         ttk.Label(self.expected_items_frame, text="Order ID: Custom", style='Info.TLabel').pack(padx=5, pady=2, anchor="w", fill="x")
         for item_name, required_qty in sorted(required_counts.items()):
-            detected_qty = detected_counts.get(item_name, 0)
             item_frame = ttk.Frame(self.expected_items_frame, style='TFrame')
             item_frame.pack(fill="x", padx=5, pady=1)
             ttk.Label(item_frame, text=f"{item_name} (x{required_qty})").pack(side="left", anchor="w")
             status_label = ttk.Label(item_frame, background="#34495e")
-            if not self.order_confirmed: status_label.config(text="")
-            elif detected_qty == 0: status_label.config(text=f"PENDING (0/{required_qty})", foreground="#f39c12")
-            elif detected_qty < required_qty: status_label.config(text=f"PARTIAL ({detected_qty}/{required_qty})", foreground="#e67e22")
-            else: status_label.config(text=f"DETECTED ({detected_qty}/{required_qty})", foreground="#2ecc71", font=('Segoe UI', 9, 'bold'))
             status_label.pack(side="right")
+            row = {"required": required_qty, "status": status_label, "shown": None}
+            self.expected_item_rows[item_name] = row
+            self.refresh_expected_item_row(row, detected_counts.get(item_name, 0))
+
+    def refresh_expected_item_row(self, row, detected_qty):
+        required_qty = row["required"]
+        if not self.engine.order_confirmed: config = {"text": ""}
+        elif detected_qty == 0: config = {"text": f"PENDING (0/{required_qty})", "foreground": "#f39c12", "font": ('Segoe UI', 10)}
+        elif detected_qty < required_qty: config = {"text": f"PARTIAL ({detected_qty}/{required_qty})", "foreground": "#e67e22", "font": ('Segoe UI', 10)}
+        else: config = {"text": f"DETECTED ({detected_qty}/{required_qty})", "foreground": "#2ecc71", "font": ('Segoe UI', 9, 'bold')}
+        if config["text"] != row["shown"]:
+            row["status"].config(**config)
+            row["shown"] = config["text"]
     
-    def _generate_full_expected_rfid_set(self):
-        full_set = set()
-        temp_counter = Counter()
-        for item_name in self.customer_order_list:
-            temp_counter[item_name] += 1
-            base_rfid = PRODUCT_DATABASE[item_name]
-            unique_rfid = f"{base_rfid}-{temp_counter[item_name]}"
-            full_set.add(unique_rfid)
-        return full_set
-
     def on_canvas_click(self, event):
-        if self.order_confirmed and hasattr(self, 'current_item_to_add') and self.current_item_to_add:
+        if self.conveyor is not None: return
+        if self.engine.order_confirmed and hasattr(self, 'current_item_to_add') and self.current_item_to_add:
             x, y = event.x, event.y
-            if not (self.package_x1 <= x <= self.package_x2 and self.package_y1 <= y <= self.package_y2):
+            if not self.engine.in_package(x, y):
                 messagebox.showwarning("Out of Bounds", "Please click inside the black dashed package boundary.")
                 return
-            item_name, base_rfid = self.current_item_to_add
-            self.item_instance_counter[item_name] += 1
-            instance_count = self.item_instance_counter[item_name]
-            unique_rfid = f"{base_rfid}-{instance_count}"
-            new_item = Item(item_name, unique_rfid, x, y)
-            self.placed_items.append(new_item)
+            item_name, _ = self.current_item_to_add
+            new_item = self.engine.place_item(item_name, x, y)
             self.draw_item(new_item)
             self.current_item_to_add = None
             self.canvas.config(cursor="")
@@ -479,29 +746,166 @@ class RFIDSimulationApp(tk.Tk):
     def add_item_to_package(self):
         selected_item_name = self.item_select_var.get()
         if not selected_item_name: messagebox.showwarning("No Item Selected", "Please select an item to add."); return
-        self.current_item_to_add = (selected_item_name, PRODUCT_DATABASE[selected_item_name])
+        base_rfid = self.product_database.get(selected_item_name)
+        if base_rfid is None: messagebox.showwarning("Unknown Product", f"'{selected_item_name}' is not in the product catalog."); return
+        self.current_item_to_add = (selected_item_name, base_rfid)
         self.canvas.config(cursor="hand2")
 
     def draw_item(self, item):
         item.canvas_id = self.canvas.create_rectangle(item.x - item.size/2, item.y - item.size/2,
-            item.x + item.size/2, item.y + item.size/2, fill="white", outline="gray", width=1)
-        item.text_id = self.canvas.create_text(item.x, item.y + item.size/2 + 8, text=item.name, fill="white", font=('Segoe UI', 7))
-        item.rfid_text_id = self.canvas.create_text(item.x, item.y - item.size/2 - 8, text=f"{item.rfid_tag}", fill="white", font=('Segoe UI', 6))
+            item.x + item.size/2, item.y + item.size/2, width=1, tags=("item",), **ITEM_STYLES[item.detected])
+        self.items_by_canvas_id[item.canvas_id] = item
+        if self.labels_visible and len(self.engine.placed_items) > LABEL_DENSITY_LIMIT:
+            # Too dense to read: drop every per-item label in one call and switch to hover labels.
+            self.canvas.delete("item_label")
+            self.labels_visible = False
+            for placed in self.engine.placed_items: placed.text_id = placed.rfid_text_id = None
+        if self.labels_visible:
+            item.text_id, item.rfid_text_id = self.draw_item_labels(item, "item_label")
+
+    def draw_item_labels(self, item, tag):
+        color = ITEM_STYLES[item.detected]["fill"]
+        text_id = self.canvas.create_text(item.x, item.y + item.size/2 + 8, text=item.name, fill=color, font=('Segoe UI', 7), tags=(tag,))
+        rfid_text_id = self.canvas.create_text(item.x, item.y - item.size/2 - 8, text=f"{item.rfid_tag}", fill=color, font=('Segoe UI', 6), tags=(tag,))
+        return text_id, rfid_text_id
+
+    def on_item_hover(self, event):
+        if self.labels_visible: return
+        current = self.canvas.find_withtag("current")
+        item = self.items_by_canvas_id.get(current[0]) if current else None
+        self.canvas.delete("hover_label")
+        if item is not None:
+            self.draw_item_labels(item, "hover_label")
+
+    # --- Conveyor Mode ---
+    def toggle_conveyor(self):
+        if self.conveyor is not None:
+            self.stop_conveyor()
+            return
+        try:
+            belt_speed = float(self.belt_speed_var.get())
+            per_minute = float(self.arrival_rate_var.get())
+            error_rate = float(self.error_rate_var.get())
+            if belt_speed <= 0 or per_minute <= 0 or not 0 <= error_rate <= 1: raise ValueError
+        except ValueError:
+            messagebox.showerror("Invalid Conveyor Settings", "Belt speed and arrivals must be positive and the error rate between 0 and 1.")
+            return
+        rng = random.Random()
+        source = islice(package_source(rng, error_rate=error_rate, product_database=self.product_database), CONVEYOR_PACKAGES)
+        self.conveyor = Conveyor(arrivals(source, rng, per_minute), self._read_scanner_range(), belt_speed,
+                                 product_database=self.product_database, report_sink=self.report_sink,
+                                 instrumentation=self.instrumentation)
+        # The manual package stays as it is underneath; it is hidden while the belt is shown.
+        self.canvas.itemconfig("package_boundary||item||item_label", state="hidden")
+        self.draw_conveyor_static()
+        self.conveyor_button.config(text="Stop Conveyor")
+        self.update_widget_states()
+        self.conveyor_clock = time.perf_counter()
+        self.conveyor_job = self.after(CONVEYOR_FRAME_MS, self.run_conveyor_frame)
+
+    def stop_conveyor(self):
+        if self.conveyor_job is not None: self.after_cancel(self.conveyor_job)
+        self.conveyor_job = None
+        self.conveyor = None
+        self.canvas.delete("conveyor")
+        self.canvas.itemconfig("package_boundary||item||item_label", state="normal")
+        self.conveyor_button.config(text="Start Conveyor")
+        self.update_widget_states()
+
+    def conveyor_scale(self):
+        # Fit the whole visible belt (infeed to the far edge of the reader zone) into the package area.
+        conveyor = self.conveyor
+        visible = conveyor.reader_position + conveyor.scanner_range + conveyor.package_length
+        return (self.package_x2 - self.package_x1) / visible
+
+    def draw_conveyor_static(self):
+        conveyor, scale = self.conveyor, self.conveyor_scale()
+        height = (conveyor.package_bounds[3] - conveyor.package_bounds[1]) * scale
+        top = (self.package_y1 + self.package_y2 - height) / 2
+        self.conveyor_top = top
+        self.canvas.create_rectangle(self.package_x1, top - 10, self.package_x2, top + height + 10,
+                                     fill="#2c3e50", outline="black", tags=("conveyor",))
+        zone_x1 = self.package_x1 + (conveyor.reader_position - conveyor.scanner_range) * scale
+        zone_x2 = self.package_x1 + (conveyor.reader_position + conveyor.scanner_range) * scale
+        self.canvas.create_rectangle(zone_x1, top - 20, zone_x2, top + height + 20, outline="#1abc9c", width=2,
+                                     dash=(4, 2), tags=("conveyor",))
+        self.canvas.create_text((zone_x1 + zone_x2) / 2, top - 30, text=f"Reader zone ({len(conveyor.antenna_ys)} antennas)",
+                                fill="#1abc9c", font=('Segoe UI', 9, 'bold'), tags=("conveyor",))
+
+    def run_conveyor_frame(self):
+        now = time.perf_counter()
+        # Cap the step so a stalled UI does not teleport packages; detection is swept either way.
+        dt, self.conveyor_clock = min(now - self.conveyor_clock, 0.25), now
+        reports = self.conveyor.step(dt)
+        for report in reports:
+            self.detection_rate.add(report["metrics"]["detectedItemsCount"])
+            self.verification_rate.add()
+        if reports:
+            last = reports[-1]
+            self.verification_label.config(text=f"{last['orderId']}: {last['verificationStatus']}",
+                                           style=STATUS_STYLES[last['verificationStatus']])
+            self.update_metrics_panel(last)
+        self.draw_conveyor_packages()
+        stats = self.conveyor.stats()
+        latency, reads = stats["latency"], stats["reads"]
+        self.conveyor_stats_label.config(
+            text=f"Packages/min: {stats['packagesPerMinute']:.1f}  (verified {stats['verified']})\n"
+                 f"Backlog: {stats['backlog']}  (queued {stats['queued']}, on belt {stats['onBelt']})\n"
+                 f"Latency p50/p95: {latency['p50Ms'] / 1000:.2f}s / {latency['p95Ms'] / 1000:.2f}s\n"
+                 f"Reads: {reads['uniqueReads']:,} unique of {reads['rawReads']:,}")
+        self.conveyor_job = self.after(CONVEYOR_FRAME_MS, self.run_conveyor_frame)
+
+    def draw_conveyor_packages(self):
+        # Only a handful of packages are on the belt at once, so they are simply redrawn each frame.
+        conveyor, scale, top = self.conveyor, self.conveyor_scale(), self.conveyor_top
+        height = (conveyor.package_bounds[3] - conveyor.package_bounds[1]) * scale
+        self.canvas.delete("conveyor_package")
+        for package in conveyor.belt:
+            x2 = self.package_x1 + package.front * scale
+            x1 = x2 - conveyor.package_length * scale
+            if x2 < self.package_x1: continue
+            in_zone = package.engine is not None
+            self.canvas.create_rectangle(max(x1, self.package_x1), top, min(x2, self.package_x2), top + height,
+                                         fill="#7f8c8d", outline="#1abc9c" if in_zone else "gray", width=2,
+                                         tags=("conveyor", "conveyor_package"))
+            read = f"\n{len(package.engine.detected_rfids)}/{len(package.placements)} read" if in_zone else ""
+            self.canvas.create_text((max(x1, self.package_x1) + min(x2, self.package_x2)) / 2, top + height / 2,
+                                    text=f"{package.order_id}{read}", fill="white", font=('Segoe UI', 8),
+                                    tags=("conveyor", "conveyor_package"))
+        self.canvas.tag_raise("conveyor_package")
+
+    def _read_scanner_range(self):
+        try: return int(self.scanner_range_var.get())
+        except ValueError: return DEFAULT_SCANNER_RANGE
 
     def draw_scanner(self, x, y):
         self.canvas.delete("scanner")
-        try: r = int(self.scanner_range_var.get())
-        except ValueError: r = 80
-        self.scanner_id = self.canvas.create_oval(x-r, y-r, x+r, y+r, outline="#1abc9c", width=4, tags="scanner", dash=(4, 2))
+        r = self._read_scanner_range()
+        self.scanner_id = self.canvas.create_oval(x-r, y-r, x+r, y+r, outline="#1abc9c", width=SCANNER_OUTLINE_WIDTH, tags="scanner", dash=(4, 2))
+        self.scanner_pos = (x, y)
         return self.scanner_id
     
-    def update_item_visual(self, item, detected=False):
-        color = "#2ecc71" if detected else "white"
-        outline = "darkgreen" if detected else "gray"
-        self.canvas.itemconfig(item.canvas_id, fill=color, outline=outline)
-        self.canvas.itemconfig(item.text_id, fill=color)
-        self.canvas.itemconfig(item.rfid_text_id, fill=color)
+    def point_on_scanner(self, x, y):
+        # Same hit area as find_overlapping on the unfilled oval: the 4 px dashed outline, not the disc.
+        x1, y1, x2, y2 = self.canvas.coords(self.scanner_id)
+        r = (x2 - x1) / 2
+        distance = ((x - (x1 + x2) / 2) ** 2 + (y - (y1 + y2) / 2) ** 2) ** 0.5
+        return abs(distance - r) <= SCANNER_OUTLINE_WIDTH / 2 + 1
+
+    def update_item_visuals(self, items, detected=False):
+        # Restyle by id: tag expressions make Tk scan every canvas item, ids are direct lookups.
+        # With labels hidden (dense packages) this is one itemconfig per detected item.
+        style = ITEM_STYLES[detected]
+        itemconfig = self.canvas.itemconfig
+        for item in items:
+            itemconfig(item.canvas_id, **style)
+            if item.text_id is not None:
+                itemconfig(item.text_id, fill=style["fill"])
+                itemconfig(item.rfid_text_id, fill=style["fill"])
 
 if __name__ == "__main__":
-    app = RFIDSimulationApp()
+    parser = argparse.ArgumentParser(description="RFID package verification simulator.")
+    parser.add_argument("--catalog", metavar="PATH", help="SQLite product catalog (see product_catalog.py)")
+    args = parser.parse_args()
+    app = RFIDSimulationApp(ProductCatalog(args.catalog) if args.catalog else None)
     app.mainloop()
\ No newline at end of file
@@ -0,0 +1,171 @@
+# batch_verify.py
+# End-of-shift reconciliation: verify recorded tag reads against order manifests across all cores.
+#
+#   python backend/batch_verify.py manifests/ --out reports/ --workers 8 --chunk-size 500
+#   python backend/batch_verify.py manifests/ --ndjson reports/ --gzip
+#
+# Every *.json file holds one manifest (or a list of them) and every *.ndjson file holds one
+# manifest per line:
+#   {"orderId": "A1001", "items": {"Phone Case": 2}, "reads": ["RFID_PC_4Y3Z-1", ...],
+#    "scanDurationSeconds": 3.2}
+# One report per order is written in the last_verification_data schema, either as its own
+# file (--out) or streamed into rotating per-worker NDJSON files (--ndjson).
+# Manifests that are malformed or name unknown products are skipped and listed, never fatal.
+
+import argparse
+import json
+import os
+import re
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+
+from product_catalog import ProductCatalog
+from rfid_engine import PRODUCT_DATABASE
+from report_sink import NDJSONReportWriter
+from verification import build_reverse_index, build_report, ExpectedTags
+
+_product_database = None
+_reverse_index = None
+_report_sink = None
+
+# --- Manifest Loading ---
+def iter_manifests(input_dir):
+    for name in sorted(os.listdir(input_dir)):
+        path = os.path.join(input_dir, name)
+        if name.endswith(".ndjson"):
+            with open(path) as f:
+                for line_no, line in enumerate(f, 1):
+                    line = line.strip()
+                    if not line: continue
+                    try: yield json.loads(line)
+                    except json.JSONDecodeError: yield {"_error": f"{name}:{line_no}: invalid JSON"}
+        elif name.endswith(".json"):
+            try:
+                with open(path) as f: data = json.load(f)
+            except json.JSONDecodeError:
+                yield {"_error": f"{name}: invalid JSON"}
+                continue
+            if isinstance(data, list): yield from data
+            else: yield data
+
+def iter_chunks(records, chunk_size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk: yield chunk
+
+# --- Worker Side ---
+def _init_worker(product_database, ndjson_dir=None, compress=False):
+    global _product_database, _reverse_index, _report_sink
+    _product_database = product_database
+    _reverse_index = build_reverse_index(product_database)
+    if ndjson_dir:
+        _report_sink = NDJSONReportWriter(ndjson_dir, prefix="batch_reports", compress=compress)
+
+def report_filename(order_id):
+    return f"verification_report_{re.sub(r'[^A-Za-z0-9_.-]', '_', str(order_id))}.json"
+
+def manifest_error(manifest, product_database):
+    # Why a manifest cannot be verified, or None; checked up front so a bad record never raises.
+    if not isinstance(manifest, dict): return f"manifest is a {type(manifest).__name__}, not an object"
+    if "_error" in manifest: return manifest["_error"]
+    if not isinstance(manifest.get("orderId"), str) or not manifest["orderId"]: return "missing or non-string orderId"
+    items = manifest.get("items")
+    if not isinstance(items, dict): return "items must be an object of product -> quantity"
+    for name, quantity in items.items():
+        if name not in product_database: return f"unknown product: {name}"
+        if type(quantity) is not int or quantity < 1: return f"bad quantity for {name}: {quantity!r}"
+    reads = manifest.get("reads", [])
+    if not isinstance(reads, list) or not all(isinstance(tag, str) for tag in reads): return "reads must be a list of strings"
+    duration = manifest.get("scanDurationSeconds", 0)
+    if type(duration) not in (int, float) or duration < 0: return f"bad scanDurationSeconds: {duration!r}"
+    timestamp = manifest.get("timestamp")
+    if timestamp is not None:
+        if not isinstance(timestamp, str): return f"bad timestamp: {timestamp!r}"
+        try: datetime.fromisoformat(timestamp)
+        except ValueError: return f"bad timestamp: {timestamp!r}"
+    return None
+
+def verify_manifest(manifest, product_database, reverse_index):
+    timestamp = manifest.get("timestamp")
+    return build_report(
+        ExpectedTags(manifest["items"], product_database, reverse_index), manifest.get("reads", ()),
+        scan_duration=manifest.get("scanDurationSeconds", 0), order_id=manifest["orderId"],
+        now=datetime.fromisoformat(timestamp) if timestamp else None)
+
+def verify_chunk(manifests, out_dir):
+    # Runs in a worker process; writes the reports itself so only a small tally crosses back.
+    statuses = Counter()
+    errors = []
+    for manifest in manifests:
+        error = manifest_error(manifest, _product_database)
+        if error is not None:
+            errors.append(f"{manifest.get('orderId', '?') if isinstance(manifest, dict) else '?'}: {error}")
+            continue
+        report = verify_manifest(manifest, _product_database, _reverse_index)
+        if _report_sink is not None:
+            _report_sink.write(report)
+        else:
+            with open(os.path.join(out_dir, report_filename(report["orderId"])), 'w') as f:
+                json.dump(report, f, indent=4)
+        statuses[report["verificationStatus"]] += 1
+    # Pool workers are not shut down gracefully, so nothing may be left buffered between chunks.
+    if _report_sink is not None: _report_sink.flush()
+    return statuses, errors
+
+# --- Driver ---
+def run_batch(input_dir, out_dir=None, workers=None, chunk_size=500, product_database=PRODUCT_DATABASE,
+              ndjson_dir=None, compress=False):
+    if out_dir: os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    statuses, errors = Counter(), []
+    chunks = iter_chunks(iter_manifests(input_dir), chunk_size)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(product_database, ndjson_dir, compress)) as pool:
+        # Keep a bounded number of chunks in flight so huge inputs are streamed, not loaded up front.
+        in_flight = set()
+        for chunk in chunks:
+            if len(in_flight) >= workers * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk_statuses, chunk_errors = future.result()
+                    statuses.update(chunk_statuses); errors.extend(chunk_errors)
+            in_flight.add(pool.submit(verify_chunk, chunk, out_dir))
+        for future in in_flight:
+            chunk_statuses, chunk_errors = future.result()
+            statuses.update(chunk_statuses); errors.extend(chunk_errors)
+    return statuses, errors
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify recorded tag reads against order manifests in parallel.")
+    parser.add_argument("input_dir", help="directory of *.json / *.ndjson manifests")
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument("--out", help="directory for per-order verification reports")
+    output.add_argument("--ndjson", metavar="DIR", help="stream reports into rotating NDJSON files in DIR")
+    parser.add_argument("--gzip", action="store_true", help="gzip the NDJSON report files")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=500, help="manifests per unit of work")
+    parser.add_argument("--catalog", metavar="PATH", help="SQLite product catalog instead of the built-in products")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    product_database = ProductCatalog(args.catalog) if args.catalog else PRODUCT_DATABASE
+    statuses, errors = run_batch(args.input_dir, args.out, args.workers, args.chunk_size, product_database,
+                                 ndjson_dir=args.ndjson, compress=args.gzip)
+    elapsed = time.perf_counter() - start
+    total = sum(statuses.values())
+    rate = total / elapsed if elapsed else float("inf")
+    print(f"Verified {total} orders in {elapsed:.3f}s ({rate:,.0f} orders/sec)")
+    for status in ("SUCCESS", "CAUTION", "MISMATCH"):
+        print(f"  {status:<9} {statuses.get(status, 0)}")
+    if errors:
+        print(f"Skipped {len(errors)} invalid manifests:")
+        for error in errors[:20]: print(f"  {error}")
+
+if __name__ == "__main__":
+    main()
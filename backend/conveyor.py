@@ -0,0 +1,284 @@
+# conveyor.py
+# Continuous conveyor mode: a generator pipeline feeds packages past a fixed reader zone.
+#
+#   python backend/conveyor.py --packages 2000 --arrivals 40 --belt-speed 800 --range 80
+#
+# package_source -> arrivals -> Conveyor: random orders (headless_sim error model) arrive on an
+# infeed queue, are loaded onto the belt with a fixed gap, and are swept by a row of antennas
+# across the belt as they pass the reader zone. Every antenna reports each tag in its field on
+# every step and overlapping antennas report the same tags, so reads reach the package's engine
+# through ingest_reads and its read filter. A package is verified as its rear edge leaves the zone. Time is simulated, so belt speed and arrival rate can be sized faster than real time.
+
+import argparse
+import math
+import random
+import time
+from collections import Counter, deque
+from itertools import count, islice
+
+from headless_sim import package_contents
+from instrumentation import Instrumentation, LatencyHistogram, RollingRate
+from rfid_engine import SimulationEngine, PRODUCT_DATABASE, DEFAULT_SCANNER_RANGE, PACKAGE_BOUNDS
+from report_sink import NDJSONReportWriter
+
+DEFAULT_BELT_SPEED = 800        # px/s
+DEFAULT_GAP = 100               # px between packages on the belt
+DEFAULT_ARRIVALS_PER_MINUTE = 40
+# Packages pulled onto the infeed queue at most; later arrivals wait upstream until it drains.
+DEFAULT_MAX_INFEED = 1000
+
+# --- Package Pipeline ---
+def package_source(rng, max_units=10, error_rate=0.1, product_database=PRODUCT_DATABASE, bounds=PACKAGE_BOUNDS):
+    # Endless stream of (order id, order, placements); slice it for a fixed-length run.
+    product_names = list(product_database)
+    x1, y1, x2, y2 = bounds
+    for n in count():
+        order, to_place = package_contents(rng, max_units, error_rate, product_names)
+        placements = [(name, rng.uniform(x1, x2), rng.uniform(y1, y2)) for name in to_place]
+        yield f"BELT_{n:07d}", order, placements
+
+def arrivals(packages, rng, per_minute=DEFAULT_ARRIVALS_PER_MINUTE):
+    # Poisson arrivals: (arrival time in seconds, package). per_minute=0 means everything is waiting at t=0.
+    now = 0.0
+    for package in packages:
+        if per_minute: now += rng.expovariate(per_minute / 60)
+        yield now, package
+
+def antenna_rows(bounds, scanner_range, antennas=None):
+    # Lateral antenna positions; by default enough rows for neighbouring read zones to overlap.
+    _, y1, _, y2 = bounds
+    if antennas is None: antennas = max(1, math.ceil((y2 - y1) / (scanner_range * 1.4)))
+    return [y1 + (i + 0.5) * (y2 - y1) / antennas for i in range(antennas)]
+
+# --- Conveyor ---
+class BeltPackage:
+    def __init__(self, order_id, order, placements, arrived_at):
+        self.order_id = order_id
+        self.order = order
+        self.placements = placements
+        self.arrived_at = arrived_at
+        self.front = 0.0            # belt position of the leading edge
+        self.engine = None          # set while the package is inside the reader zone
+        self.scan_x = None          # reader position in package coordinates at the last step
+        self.entered_at = None
+
+
+class Conveyor:
+    def __init__(self, arrivals, scanner_range=DEFAULT_SCANNER_RANGE, belt_speed=DEFAULT_BELT_SPEED, gap=DEFAULT_GAP,
+                 antennas=None, product_database=None, package_bounds=PACKAGE_BOUNDS, report_sink=None,
+                 instrumentation=None, max_infeed=DEFAULT_MAX_INFEED):
+        self.arrivals = iter(arrivals)
+        self.scanner_range = scanner_range
+        self.belt_speed = belt_speed
+        self.gap = gap
+        self.max_infeed = max_infeed
+        self.product_database = product_database if product_database is not None else PRODUCT_DATABASE
+        self.package_bounds = package_bounds
+        self.package_length = package_bounds[2] - package_bounds[0]
+        # The reader sits one package length downstream of the infeed.
+        self.reader_position = self.package_length + scanner_range
+        self.antenna_ys = antenna_rows(package_bounds, scanner_range, antennas)
+        self.report_sink = report_sink
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation(enabled=False)
+        self.now = 0.0
+        self.infeed = deque()
+        self.belt = deque()
+        self.exhausted = False
+        self.verified = 0
+        self.statuses = Counter()
+        self.latency = LatencyHistogram()
+        self.throughput = RollingRate()
+        self.max_backlog = 0
+        self._next_arrival = None
+        # Simulated time at which the infeed end of the belt is clear for the next package.
+        self._infeed_free_at = 0.0
+        self._engines = []
+        # Every engine ever created (each has its own read filter); read_counters() sums them.
+        self._all_engines = []
+
+    @property
+    def backlog(self):
+        # Packages that have arrived but are not verified yet (waiting on the infeed or on the belt).
+        return len(self.infeed) + len(self.belt)
+
+    @property
+    def done(self):
+        return self.exhausted and not self.backlog
+
+    def step(self, dt):
+        # Advance the simulated clock by dt seconds; returns the reports finalized during the step.
+        with self.instrumentation.timed("conveyor_step"):
+            self.now += dt
+            self._receive_arrivals()
+            distance = self.belt_speed * dt
+            for package in self.belt: package.front += distance
+            self._load_belt()
+            reports = []
+            for package in self.belt:
+                report = self._scan(package)
+                if report is not None: reports.append(report)
+            while self.belt and self.belt[0].engine is None and self.belt[0].scan_x is not None:
+                self.belt.popleft()
+            self.max_backlog = max(self.max_backlog, self.backlog)
+        return reports
+
+    def _receive_arrivals(self):
+        # Bounded by max_infeed, so a source that is all due at once (per_minute=0) cannot stall a step.
+        while len(self.infeed) < self.max_infeed:
+            if self._next_arrival is None:
+                self._next_arrival = next(self.arrivals, None)
+                if self._next_arrival is None:
+                    self.exhausted = True
+                    return
+            arrived_at, (order_id, order, placements) = self._next_arrival
+            if arrived_at > self.now: return
+            self.infeed.append(BeltPackage(order_id, order, placements, arrived_at))
+            self._next_arrival = None
+
+    def _load_belt(self):
+        # Packages keep at least `gap` between them. Each one starts where it would be had it been loaded
+        # the moment it could be: on arrival, or once the previous package had cleared the gap.
+        while self.infeed:
+            package = self.infeed[0]
+            front = self.belt_speed * (self.now - max(package.arrived_at, self._infeed_free_at))
+            if front < 0: return
+            self.belt.append(self.infeed.popleft())
+            package.front = front
+            self._infeed_free_at = self.now + (self.package_length + self.gap - front) / self.belt_speed
+
+    def _scan(self, package):
+        # The belt carries the package under fixed antennas, i.e. the antennas sweep the package
+        # from its leading edge (x2 + r) to its trailing edge (x1 - r) in package coordinates.
+        x1, _, x2, _ = self.package_bounds
+        r = self.scanner_range
+        x = x1 + self.reader_position - package.front + self.package_length
+        if package.scan_x is None:
+            if x > x2 + r: return None
+            package.engine = self._start_package(package)
+            package.scan_x, package.entered_at = x2 + r, self.now - (x2 + r - x) / self.belt_speed
+        if package.engine is None: return None
+        engine = package.engine
+        x = max(x, x1 - r)
+        # Each antenna reads every tag its field swept over this step (a horizontal capsule), detected or not.
+        r_sq, x_lo, x_hi = r * r, x, package.scan_x
+        items = engine.placed_items
+        for i, y in enumerate(self.antenna_ys):
+            reads = [item.rfid_tag for item in items
+                     if abs(item.y - y) <= r and max(x_lo - item.x, 0, item.x - x_hi) ** 2 + (item.y - y) ** 2 <= r_sq]
+            if reads: engine.ingest_reads(reads, antenna=f"row{i}", now=self.now)
+        package.scan_x = x
+        if x > x1 - r: return None
+        # Rear edge has left the zone: verify and recycle the engine.
+        time_in_zone = (x2 - x1 + 2 * r) / self.belt_speed
+        report = engine.finalize_verification(order_id=package.order_id, scan_duration=time_in_zone)
+        exit_time = package.entered_at + time_in_zone
+        self.latency.record(exit_time - package.arrived_at)
+        self.throughput.add(1, now=exit_time)
+        self.verified += 1
+        self.statuses[report["verificationStatus"]] += 1
+        self._engines.append(engine)
+        package.engine = None
+        return report
+
+    def _start_package(self, package):
+        if self._engines:
+            engine = self._engines.pop()
+        else:
+            engine = SimulationEngine(self.product_database, self.package_bounds, report_sink=self.report_sink,
+                                      instrumentation=self.instrumentation)
+            self._all_engines.append(engine)
+        engine.reset()
+        engine.set_scanner_range(self.scanner_range)
+        for name, quantity in package.order.items():
+            engine.add_to_cart(name, quantity)
+        engine.confirm_order()
+        for name, item_x, item_y in package.placements:
+            engine.place_item(name, item_x, item_y)
+        return engine
+
+    def read_counters(self):
+        # read_dedup counters summed over every engine's filter.
+        totals, per_antenna = Counter(), Counter()
+        for engine in self._all_engines:
+            counters = engine.read_filter.counters()
+            per_antenna.update(counters.pop("readsPerAntenna"))
+            totals.update(counters)
+        return dict(totals, readsPerAntenna=dict(per_antenna))
+
+    def packages_per_minute(self):
+        # Verified in the last 60 simulated seconds (or per minute so far, early in a run).
+        window = min(60, max(1, int(self.now)))
+        return sum(self.throughput.per_second(window, now=self.now)) * 60 / window
+
+    def stats(self):
+        return {
+            "simulatedSeconds": round(self.now, 3),
+            "verified": self.verified,
+            "packagesPerMinute": round(self.packages_per_minute(), 2),
+            "backlog": self.backlog,
+            "queued": len(self.infeed),
+            "onBelt": len(self.belt),
+            "maxBacklog": self.max_backlog,
+            "latency": self.latency.summary(),
+            "statuses": dict(self.statuses),
+            "reads": self.read_counters(),
+        }
+
+
+def run(packages, arrivals_per_minute, belt_speed, gap, scanner_range, antennas=None, max_units=10, error_rate=0.1,
+        seed=None, dt=0.05, report_sink=None):
+    rng = random.Random(seed)
+    source = islice(package_source(rng, max_units, error_rate), packages)
+    conveyor = Conveyor(arrivals(source, rng, arrivals_per_minute), scanner_range, belt_speed, gap, antennas,
+                        report_sink=report_sink)
+    start = time.perf_counter()
+    while not conveyor.done:
+        conveyor.step(dt)
+    return conveyor, time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate a conveyor of packages passing a fixed RFID reader zone.")
+    parser.add_argument("--packages", type=int, default=1000, help="number of packages to send down the belt")
+    parser.add_argument("--arrivals", type=float, default=DEFAULT_ARRIVALS_PER_MINUTE,
+                        help="mean package arrivals per minute (0: all waiting at the start)")
+    parser.add_argument("--belt-speed", type=float, default=DEFAULT_BELT_SPEED, help="belt speed in px/s")
+    parser.add_argument("--gap", type=float, default=DEFAULT_GAP, help="spacing between packages in px")
+    parser.add_argument("--range", type=int, default=DEFAULT_SCANNER_RANGE, dest="scanner_range", help="antenna range in px")
+    parser.add_argument("--antennas", type=int, default=None, help="antennas across the belt (default: enough to overlap)")
+    parser.add_argument("--max-units", type=int, default=10, help="maximum units per random order")
+    parser.add_argument("--error-rate", type=float, default=0.1, help="chance of a missing and of an extra item per package")
+    parser.add_argument("--step", type=float, default=0.05, help="simulated seconds per step")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for reproducible runs")
+    parser.add_argument("--ndjson", metavar="DIR", default=None, help="stream every report into rotating NDJSON files in DIR")
+    args = parser.parse_args(argv)
+    if args.packages < 0: parser.error("--packages must not be negative")
+    if args.arrivals < 0: parser.error("--arrivals must not be negative")
+    if args.belt_speed <= 0: parser.error("--belt-speed must be positive")
+    if args.gap < 0: parser.error("--gap must not be negative")
+    if args.step <= 0: parser.error("--step must be positive")
+    if args.scanner_range <= 0: parser.error("--range must be positive")
+    if args.antennas is not None and args.antennas < 1: parser.error("--antennas must be at least 1")
+
+    report_sink = NDJSONReportWriter(args.ndjson) if args.ndjson else None
+    try:
+        conveyor, elapsed = run(args.packages, args.arrivals, args.belt_speed, args.gap, args.scanner_range,
+                                args.antennas, args.max_units, args.error_rate, args.seed, args.step, report_sink)
+    finally:
+        if report_sink: report_sink.close()
+    stats = conveyor.stats()
+    latency = stats["latency"]
+    capacity = args.belt_speed / (conveyor.package_length + args.gap) * 60
+    print(f"Verified {stats['verified']} packages in {stats['simulatedSeconds']:.1f} simulated seconds "
+          f"({stats['verified'] / stats['simulatedSeconds'] * 60:,.1f} packages/min; belt capacity {capacity:,.1f}/min) "
+          f"using {len(conveyor.antenna_ys)} antennas")
+    print(f"  max backlog {stats['maxBacklog']}, latency p50 {latency['p50Ms'] / 1000:.2f}s, "
+          f"p95 {latency['p95Ms'] / 1000:.2f}s, p99 {latency['p99Ms'] / 1000:.2f}s")
+    for status in ("SUCCESS", "CAUTION", "MISMATCH"):
+        print(f"  {status:<9} {stats['statuses'].get(status, 0)}")
+    reads = stats["reads"]
+    print(f"Reads: {reads['rawReads']:,} raw, {reads['uniqueReads']:,} unique, {reads['suppressedReads']:,} suppressed "
+          f"across {len(reads['readsPerAntenna'])} antennas")
+    print(f"Simulated in {elapsed:.3f}s wall time ({stats['verified'] / elapsed:,.0f} packages/sec)")
+
+if __name__ == "__main__":
+    main()
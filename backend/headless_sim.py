@@ -0,0 +1,121 @@
+# headless_sim.py
+# Command-line load test for the verification logic, no display required.
+#
+#   python backend/headless_sim.py --packages 5000 --max-units 12 --error-rate 0.1
+
+import argparse
+import random
+import time
+from collections import Counter
+
+from instrumentation import Instrumentation
+from rfid_engine import SimulationEngine, PRODUCT_DATABASE, DEFAULT_SCANNER_RANGE
+from history_store import VerificationHistory
+from report_sink import NDJSONReportWriter, FanOutSink
+
+# --- Synthetic Package Generation ---
+def random_order(rng, max_units, product_names):
+    order = Counter()
+    for _ in range(rng.randint(1, max_units)):
+        order[rng.choice(product_names)] += 1
+    return order
+
+def raster_path(engine, scanner_range):
+    # Serpentine sweep whose rows are spaced so adjacent scanner circles overlap.
+    step = max(1, int(scanner_range * 1.4))
+    path = []
+    y, row = engine.package_y1, 0
+    while y <= engine.package_y2 + step:
+        xs = list(range(engine.package_x1, engine.package_x2 + step, step))
+        if row % 2: xs.reverse()
+        path.extend((x, y) for x in xs)
+        y += step; row += 1
+    return path
+
+def package_contents(rng, max_units, error_rate, product_names):
+    # A random order and the units actually packed: maybe one missing, maybe one extra, never empty.
+    order = random_order(rng, max_units, product_names)
+    to_place = list(order.elements())
+    if to_place and rng.random() < error_rate:
+        to_place.pop(rng.randrange(len(to_place)))
+    if rng.random() < error_rate:
+        to_place.append(rng.choice(product_names))
+    if not to_place:
+        to_place.append(rng.choice(product_names))
+    return order, to_place
+
+def simulate_package(engine, rng, max_units, error_rate, scanner_range, order_id=None):
+    product_names = list(engine.product_database.keys())
+    engine.reset()
+    engine.set_scanner_range(scanner_range)
+    order, to_place = package_contents(rng, max_units, error_rate, product_names)
+    for item_name, quantity in order.items():
+        engine.add_to_cart(item_name, quantity)
+    engine.confirm_order()
+
+    for item_name in to_place:
+        x = rng.uniform(engine.package_x1, engine.package_x2)
+        y = rng.uniform(engine.package_y1, engine.package_y2)
+        engine.place_item(item_name, x, y)
+
+    path = raster_path(engine, scanner_range)
+    engine.start_scan(*path[0])
+    engine.scan_path(path)
+    return engine.finalize_verification(order_id=order_id)
+
+def make_spatial_index(detector):
+    if detector == "numpy":
+        from vectorized_detection import TagArray
+        return TagArray()
+    return None
+
+def run(packages, max_units, error_rate, scanner_range, seed, detector="grid", report_sink=None, instrumentation=None):
+    rng = random.Random(seed)
+    engine = SimulationEngine(PRODUCT_DATABASE, spatial_index=make_spatial_index(detector), report_sink=report_sink,
+                              instrumentation=instrumentation)
+    statuses = Counter()
+    start = time.perf_counter()
+    for n in range(packages):
+        data = simulate_package(engine, rng, max_units, error_rate, scanner_range, order_id=f"SIM_{n:07d}")
+        statuses[data["verificationStatus"]] += 1
+    elapsed = time.perf_counter() - start
+    return statuses, elapsed, engine.read_filter.counters()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless RFID package verification load test.")
+    parser.add_argument("--packages", type=int, default=1000, help="number of packages to simulate")
+    parser.add_argument("--max-units", type=int, default=10, help="maximum units per random order")
+    parser.add_argument("--error-rate", type=float, default=0.1, help="chance of a missing and of an extra item per package")
+    parser.add_argument("--range", type=int, default=DEFAULT_SCANNER_RANGE, dest="scanner_range", help="scanner range in px")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for reproducible runs")
+    parser.add_argument("--detector", choices=("grid", "numpy"), default="grid", help="scanner-range detection backend")
+    parser.add_argument("--ndjson", metavar="DIR", default=None, help="stream every report into rotating NDJSON files in DIR")
+    parser.add_argument("--gzip", action="store_true", help="gzip the NDJSON report files")
+    parser.add_argument("--history", metavar="PATH", default=None, help="also persist every report in this SQLite history database")
+    parser.add_argument("--timings", metavar="PATH", nargs="?", const="-", default=None,
+                        help="print per-stage latency percentiles, or export them as JSON to PATH")
+    args = parser.parse_args(argv)
+
+    sinks = [NDJSONReportWriter(args.ndjson, compress=args.gzip)] if args.ndjson else []
+    if args.history: sinks.append(VerificationHistory(args.history))
+    report_sink = FanOutSink(*sinks) if sinks else None
+    instrumentation = Instrumentation() if args.timings else None
+    try:
+        statuses, elapsed, reads = run(args.packages, args.max_units, args.error_rate, args.scanner_range, args.seed,
+                                args.detector, report_sink, instrumentation)
+    finally:
+        if report_sink: report_sink.close()
+    rate = args.packages / elapsed if elapsed else float("inf")
+    print(f"Simulated {args.packages} packages in {elapsed:.3f}s ({rate:,.0f} packages/sec)")
+    for status in ("SUCCESS", "CAUTION", "MISMATCH"):
+        print(f"  {status:<9} {statuses.get(status, 0)}")
+    print(f"Reads: {reads['rawReads']:,} raw, {reads['uniqueReads']:,} unique, {reads['suppressedReads']:,} suppressed")
+    if args.timings == "-":
+        print(f"{'stage':<14} {'n':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for stage, summary in instrumentation.snapshot().items():
+            print(f"{stage:<14} {summary['count']:>9} {summary['p50Ms']:>9.3f} {summary['p95Ms']:>9.3f} {summary['p99Ms']:>9.3f}")
+    elif args.timings:
+        instrumentation.export_json(args.timings)
+
+if __name__ == "__main__":
+    main()
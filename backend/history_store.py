@@ -0,0 +1,274 @@
+# history_store.py
+# Persistent verification history: every report in a local SQLite database (WAL mode).
+#
+#   python backend/history_store.py verification_history.db summary --hours 24
+#   python backend/history_store.py verification_history.db import verification_reports/
+#
+# VerificationHistory is a report sink (write/maybe_flush/flush/close, like NDJSONReportWriter):
+# reports are buffered and inserted in one transaction per batch. Besides one row per report and
+# one row per (report, SKU), an hourly per-SKU rollup is upserted in the same transaction, so
+# "mismatch rate per SKU per hour" reads a few hundred pre-aggregated rows instead of scanning
+# millions of reports.
+
+import argparse
+import gzip
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+DEFAULT_HISTORY_PATH = "verification_history.db"
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS verifications (
+        id INTEGER PRIMARY KEY,
+        order_id TEXT NOT NULL,
+        ts REAL NOT NULL,
+        status TEXT NOT NULL,
+        scan_duration REAL NOT NULL,
+        expected_count INTEGER NOT NULL,
+        detected_count INTEGER NOT NULL,
+        missing_count INTEGER NOT NULL,
+        extra_count INTEGER NOT NULL,
+        report TEXT NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS verification_skus (
+        verification_id INTEGER NOT NULL,
+        sku TEXT NOT NULL,
+        ts REAL NOT NULL,
+        status TEXT NOT NULL,
+        expected INTEGER NOT NULL,
+        detected INTEGER NOT NULL,
+        missing INTEGER NOT NULL,
+        extra INTEGER NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS sku_hourly (
+        sku TEXT NOT NULL,
+        hour REAL NOT NULL,
+        verifications INTEGER NOT NULL,
+        mismatched_orders INTEGER NOT NULL,
+        sku_mismatches INTEGER NOT NULL,
+        missing_units INTEGER NOT NULL,
+        extra_units INTEGER NOT NULL,
+        PRIMARY KEY (sku, hour)
+    ) WITHOUT ROWID""",
+    # Covers the time-window status and duration queries without touching the (large) report rows.
+    "CREATE INDEX IF NOT EXISTS verifications_ts ON verifications (ts, status, scan_duration)",
+    # One row per report: re-importing the same NDJSON files is a no-op (INSERT OR IGNORE).
+    "CREATE UNIQUE INDEX IF NOT EXISTS verifications_order_ts ON verifications (order_id, ts)",
+    "CREATE INDEX IF NOT EXISTS verifications_status_ts ON verifications (status, ts)",
+    "CREATE INDEX IF NOT EXISTS verification_skus_sku_ts ON verification_skus (sku, ts)",
+    "CREATE INDEX IF NOT EXISTS verification_skus_ts ON verification_skus (ts)",
+    "CREATE INDEX IF NOT EXISTS sku_hourly_hour ON sku_hourly (hour)",
+)
+
+UPSERT_HOURLY = """
+INSERT INTO sku_hourly VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (sku, hour) DO UPDATE SET
+    verifications = verifications + excluded.verifications,
+    mismatched_orders = mismatched_orders + excluded.mismatched_orders,
+    sku_mismatches = sku_mismatches + excluded.sku_mismatches,
+    missing_units = missing_units + excluded.missing_units,
+    extra_units = extra_units + excluded.extra_units
+"""
+
+
+def report_timestamp(report):
+    return datetime.fromisoformat(report["timestamp"]).timestamp()
+
+def hour_start(ts):
+    # Local-time hour, like start_of_today() and the displayed timestamps (UTC offsets need not be whole hours).
+    return datetime.fromtimestamp(ts).replace(minute=0, second=0, microsecond=0).timestamp()
+
+def start_of_today():
+    return datetime.combine(datetime.now().date(), datetime.min.time()).timestamp()
+
+
+class VerificationHistory:
+    def __init__(self, path=DEFAULT_HISTORY_PATH, flush_interval=1.0, batch_records=500):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_records = batch_records
+        self.records_written = 0
+        self.duplicates_skipped = 0
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        # WAL + NORMAL: commits survive an application crash; only an OS crash may lose the last batch.
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        with self.connection:
+            for statement in SCHEMA:
+                self.connection.execute(statement)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Report Sink Interface ---
+    def write(self, report):
+        with self._lock:
+            self._buffer.append(report)
+            if len(self._buffer) >= self.batch_records or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush_locked()
+
+    def maybe_flush(self):
+        with self._lock:
+            if self._buffer and time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            self.connection.close()
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer: return
+        reports, self._buffer = self._buffer, []
+        inserted = 0
+        hourly = defaultdict(lambda: [0, 0, 0, 0, 0])
+        sku_rows = []
+        with self.connection:
+            cursor = self.connection.cursor()
+            for report in reports:
+                ts = report_timestamp(report)
+                status = report["verificationStatus"]
+                metrics = report["metrics"]
+                cursor.execute(
+                    "INSERT OR IGNORE INTO verifications (order_id, ts, status, scan_duration, expected_count, detected_count,"
+                    " missing_count, extra_count, report) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (report["orderId"], ts, status, report["scanDurationSeconds"], metrics["expectedItemsCount"],
+                     metrics["detectedItemsCount"], metrics["missingItemsCount"], metrics["extraItemsCount"],
+                     json.dumps(report, separators=(",", ":"))))
+                # Already stored (same order id and timestamp): so are its SKU rows and rollup counts.
+                if not cursor.rowcount: continue
+                inserted += 1
+                verification_id = cursor.lastrowid
+                expected, detected = report["expectedItems"], report["detectedItems"]
+                missing, extra = report["missingItemsDetail"], report["extraItemsDetail"]
+                hour = hour_start(ts)
+                for sku in expected.keys() | detected.keys():
+                    sku_missing, sku_extra = missing.get(sku, 0), extra.get(sku, 0)
+                    sku_rows.append((verification_id, sku, ts, status, expected.get(sku, 0), detected.get(sku, 0),
+                                     sku_missing, sku_extra))
+                    totals = hourly[sku, hour]
+                    totals[0] += 1
+                    totals[1] += status == "MISMATCH"
+                    totals[2] += bool(sku_missing or sku_extra)
+                    totals[3] += sku_missing
+                    totals[4] += sku_extra
+            cursor.executemany("INSERT INTO verification_skus VALUES (?, ?, ?, ?, ?, ?, ?, ?)", sku_rows)
+            cursor.executemany(UPSERT_HOURLY, [(sku, hour, *totals) for (sku, hour), totals in hourly.items()])
+        self.records_written += inserted
+        self.duplicates_skipped += len(reports) - inserted
+
+    # --- Queries ---
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self.connection.execute(sql, params).fetchall()
+
+    def count(self):
+        return self._query("SELECT COUNT(*) FROM verifications")[0][0]
+
+    def recent(self, limit=20, status=None):
+        where, params = ("WHERE status = ?", (status,)) if status else ("", ())
+        return self._query(f"SELECT order_id, ts, status, scan_duration FROM verifications {where} "
+                           "ORDER BY ts DESC LIMIT ?", params + (limit,))
+
+    def status_counts(self, since, until=None):
+        # Status -> number of verifications in [since, until).
+        until = until if until is not None else float("inf")
+        return dict(self._query("SELECT status, COUNT(*) FROM verifications WHERE ts >= ? AND ts < ? GROUP BY status",
+                                (since, until)))
+
+    def slowest_scans(self, since, until=None, limit=10):
+        until = until if until is not None else float("inf")
+        # Ranked on the covering index first, so only the winning rows are read from the table.
+        return self._query("SELECT order_id, ts, status, scan_duration FROM verifications WHERE id IN"
+                           " (SELECT id FROM verifications WHERE ts >= ? AND ts < ? ORDER BY scan_duration DESC LIMIT ?)"
+                           " ORDER BY scan_duration DESC", (since, until, limit))
+
+    def mismatch_rate_by_sku_hour(self, since, until=None, sku=None):
+        # (sku, hour start, verifications, SKU mismatch rate, order mismatch rate) from the hourly rollup.
+        until = until if until is not None else float("inf")
+        sku_filter, params = ("AND sku = ?", (sku,)) if sku else ("", ())
+        return self._query(
+            "SELECT sku, hour, verifications, CAST(sku_mismatches AS REAL) / verifications,"
+            " CAST(mismatched_orders AS REAL) / verifications FROM sku_hourly"
+            f" WHERE hour >= ? AND hour < ? {sku_filter} ORDER BY hour, sku", (hour_start(since), until) + params)
+
+    def worst_skus(self, since, until=None, limit=10):
+        # SKUs ranked by how often they were missing or extra, aggregated over the rollup hours.
+        until = until if until is not None else float("inf")
+        return self._query(
+            "SELECT sku, SUM(verifications) AS n, CAST(SUM(sku_mismatches) AS REAL) / SUM(verifications) AS rate,"
+            " SUM(missing_units), SUM(extra_units) FROM sku_hourly WHERE hour >= ? AND hour < ?"
+            " GROUP BY sku ORDER BY rate DESC, n DESC LIMIT ?", (hour_start(since), until, limit))
+
+    def sku_verifications(self, sku, since, until=None, limit=50):
+        until = until if until is not None else float("inf")
+        return self._query(
+            "SELECT v.order_id, s.ts, s.status, s.expected, s.detected, s.missing, s.extra FROM verification_skus s"
+            " JOIN verifications v ON v.id = s.verification_id WHERE s.sku = ? AND s.ts >= ? AND s.ts < ?"
+            " ORDER BY s.ts DESC LIMIT ?", (sku, since, until, limit))
+
+
+# --- Backfill ---
+def iter_ndjson_reports(directory):
+    # Reports from NDJSON sink files (plain or gzip), oldest file first.
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if name.endswith(".ndjson.gz"): opener = gzip.open
+        elif name.endswith(".ndjson"): opener = open
+        else: continue
+        with opener(path, "rt") as f:
+            for line in f:
+                if line.strip(): yield json.loads(line)
+
+def format_ts(ts):
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query or backfill the verification history store.")
+    parser.add_argument("path", help="history database")
+    commands = parser.add_subparsers(dest="command", required=True)
+    summary = commands.add_parser("summary", help="status counts, slowest scans and worst SKUs")
+    summary.add_argument("--hours", type=float, default=24, help="look-back window in hours")
+    summary.add_argument("--limit", type=int, default=10, help="rows per table")
+    backfill = commands.add_parser("import", help="load reports from an NDJSON report directory")
+    backfill.add_argument("directory", help="directory of *.ndjson / *.ndjson.gz report files")
+    args = parser.parse_args(argv)
+
+    with VerificationHistory(args.path, flush_interval=60, batch_records=5000) as history:
+        start = time.perf_counter()
+        if args.command == "import":
+            for report in iter_ndjson_reports(args.directory):
+                history.write(report)
+            history.flush()
+            print(f"Imported {history.records_written:,} reports ({history.duplicates_skipped:,} already stored) "
+                  f"in {time.perf_counter() - start:.2f}s")
+            return
+        since = (datetime.now() - timedelta(hours=args.hours)).timestamp()
+        statuses = history.status_counts(since)
+        print(f"Last {args.hours:g}h: " + ", ".join(f"{s} {statuses.get(s, 0)}" for s in ("SUCCESS", "CAUTION", "MISMATCH")))
+        print("Slowest scans:")
+        for order_id, ts, status, duration in history.slowest_scans(since, limit=args.limit):
+            print(f"  {order_id:<28} {format_ts(ts)} {status:<9} {duration:>8.2f}s")
+        print("SKUs most often missing or extra:")
+        for sku, n, rate, missing_units, extra_units in history.worst_skus(since, limit=args.limit):
+            print(f"  {sku:<28} {n:>8} orders {rate:>7.1%}  missing {missing_units}  extra {extra_units}")
+        print(f"Queried in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# instrumentation.py
+# perf_counter-based stage timing with rolling latency percentiles (p50/p95/p99).
+#
+#   instrumentation = Instrumentation()
+#   with instrumentation.timed("detection"):
+#       ...
+#   instrumentation.snapshot()  # {"detection": {"count": .., "p50Ms": .., ...}}
+
+import math
+import time
+from collections import deque
+
+
+class LatencyHistogram:
+    # Keeps the most recent `window` samples so percentiles follow the current workload.
+    def __init__(self, window=1024):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total_seconds += seconds
+        if seconds > self.max_seconds: self.max_seconds = seconds
+
+    def percentile(self, p, ordered=None):
+        ordered = ordered if ordered is not None else sorted(self.samples)
+        if not ordered: return 0.0
+        # Nearest-rank percentile.
+        rank = max(0, min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1))
+        return ordered[rank]
+
+    def summary(self):
+        ordered = sorted(self.samples)
+        return {
+            "count": self.count,
+            "p50Ms": round(self.percentile(50, ordered) * 1000, 3),
+            "p95Ms": round(self.percentile(95, ordered) * 1000, 3),
+            "p99Ms": round(self.percentile(99, ordered) * 1000, 3),
+            "maxMs": round(self.max_seconds * 1000, 3),
+            "meanMs": round(self.total_seconds / self.count * 1000, 3) if self.count else 0.0,
+        }
+
+
+class _StageTimer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.record(time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class RollingRate:
+    # Event counts in one-second buckets, keeping only the last `horizon_seconds` of history.
+    def __init__(self, horizon_seconds=120):
+        self.horizon_seconds = horizon_seconds
+        self.buckets = {}
+        self.total = 0
+
+    def add(self, count=1, now=None):
+        second = int(time.monotonic() if now is None else now)
+        self.buckets[second] = self.buckets.get(second, 0) + count
+        self.total += count
+        if len(self.buckets) > self.horizon_seconds:
+            cutoff = second - self.horizon_seconds
+            for key in [key for key in self.buckets if key <= cutoff]: del self.buckets[key]
+
+    def per_second(self, seconds, now=None):
+        # Counts for the last `seconds` whole seconds, oldest first, ending with the current one.
+        current = int(time.monotonic() if now is None else now)
+        return [self.buckets.get(second, 0) for second in range(current - seconds + 1, current + 1)]
+
+    def rolling_sums(self, seconds, span, now=None):
+        # For each of the last `seconds` seconds, the number of events in the `span` seconds ending there.
+        counts = self.per_second(seconds + span - 1, now)
+        sums, running = [], sum(counts[:span - 1])
+        for i in range(span - 1, len(counts)):
+            running += counts[i]
+            sums.append(running)
+            running -= counts[i - span + 1]
+        return sums
+
+
+class Instrumentation:
+    def __init__(self, window=1024, enabled=True):
+        self.window = window
+        self.enabled = enabled
+        self.stages = {}
+
+    def histogram(self, stage):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = LatencyHistogram(self.window)
+        return histogram
+
+    def timed(self, stage):
+        # Nested stages are timed independently, so an outer stage includes its inner ones.
+        if not self.enabled: return _NULL_TIMER
+        return _StageTimer(self.histogram(stage))
+
+    def record(self, stage, seconds):
+        if self.enabled: self.histogram(stage).record(seconds)
+
+    def reset(self):
+        self.stages.clear()
+
+    def snapshot(self):
+        return {stage: histogram.summary() for stage, histogram in self.stages.items()}
+
+    def export_json(self, path):
+        import json  # Only needed on export; keeps `import rfid_engine` free of json/re.
+        with open(path, 'w') as f:
+            json.dump({"exportedAt": time.strftime("%Y-%m-%dT%H:%M:%S"), "windowSize": self.window,
+                       "stages": self.snapshot()}, f, indent=4)
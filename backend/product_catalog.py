@@ -0,0 +1,231 @@
+# product_catalog.py
+# SQLite-backed product catalog for catalogs far larger than PRODUCT_DATABASE.
+#
+#   python backend/product_catalog.py build catalog.db --csv products.csv     # name,base_tag rows
+#   python backend/product_catalog.py build catalog.db --synthetic 1000000
+#   python backend/product_catalog.py search catalog.db "wire"
+#
+# ProductCatalog behaves like the PRODUCT_DATABASE dict where the engine needs it (catalog[name],
+# `name in catalog`), but nothing is loaded up front: every lookup is an indexed query, with an
+# LRU cache in front for hot SKUs. Names and base tags are both unique and indexed, and prefix
+# search walks a case-folded index one page at a time.
+
+import argparse
+import csv
+import os
+import sqlite3
+import time
+from functools import lru_cache
+
+from rfid_engine import PRODUCT_DATABASE
+
+DEFAULT_CACHE_SIZE = 4096
+DEFAULT_PAGE_SIZE = 50
+MMAP_BYTES = 256 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    name TEXT PRIMARY KEY,
+    base_tag TEXT NOT NULL,
+    search_key TEXT NOT NULL
+) WITHOUT ROWID
+"""
+INDEXES = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS products_base_tag ON products (base_tag)",
+    "CREATE INDEX IF NOT EXISTS products_search_key ON products (search_key, name)",
+)
+
+
+def prefix_upper_bound(prefix):
+    # Smallest string greater than every string starting with `prefix`.
+    return prefix + "\U0010ffff"
+
+
+class ProductCatalog:
+    def __init__(self, path, cache_size=DEFAULT_CACHE_SIZE):
+        if not os.path.exists(path): raise FileNotFoundError(path)
+        self.path = path
+        self.cache_size = cache_size
+        self._connect()
+
+    def _connect(self):
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute("PRAGMA query_only = ON")
+        self.connection.execute(f"PRAGMA mmap_size = {MMAP_BYTES}")
+        self._tag_for_name = lru_cache(maxsize=self.cache_size)(self._query_tag_for_name)
+        self._name_for_tag = lru_cache(maxsize=self.cache_size)(self._query_name_for_tag)
+        self._count = None
+
+    # Worker processes (batch_verify) receive the path and reopen the database themselves.
+    def __getstate__(self):
+        return {"path": self.path, "cache_size": self.cache_size}
+
+    def __setstate__(self, state):
+        self.path, self.cache_size = state["path"], state["cache_size"]
+        self._connect()
+
+    def close(self):
+        self.connection.close()
+
+    # --- Lookups ---
+    def _query_tag_for_name(self, name):
+        row = self.connection.execute("SELECT base_tag FROM products WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _query_name_for_tag(self, base_tag):
+        row = self.connection.execute("SELECT name FROM products WHERE base_tag = ?", (base_tag,)).fetchone()
+        return row[0] if row else None
+
+    def __getitem__(self, name):
+        base_tag = self._tag_for_name(name)
+        if base_tag is None: raise KeyError(name)
+        return base_tag
+
+    def get(self, name, default=None):
+        base_tag = self._tag_for_name(name)
+        return default if base_tag is None else base_tag
+
+    def __contains__(self, name):
+        return self._tag_for_name(name) is not None
+
+    def name_for_tag(self, base_tag, default=None):
+        name = self._name_for_tag(base_tag)
+        return default if name is None else name
+
+    def reverse_index(self):
+        # Stands in for verification.build_reverse_index(): base tag -> name, queried on demand.
+        return TagLookup(self)
+
+    def __len__(self):
+        if self._count is None:
+            self._count = self.connection.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+        return self._count
+
+    def __iter__(self):
+        # Streams names in order; the cursor never materializes the whole catalog.
+        for (name,) in self.connection.execute("SELECT name FROM products ORDER BY name"):
+            yield name
+
+    def keys(self):
+        return iter(self)
+
+    def items(self):
+        return iter(self.connection.execute("SELECT name, base_tag FROM products ORDER BY name"))
+
+    def cache_info(self):
+        return {"names": self._tag_for_name.cache_info()._asdict(), "tags": self._name_for_tag.cache_info()._asdict()}
+
+    # --- Prefix Search ---
+    def search_prefix(self, prefix, limit=DEFAULT_PAGE_SIZE, after=None):
+        # Case-insensitive prefix match in name order; pass the last name of a page as `after` for the next.
+        key = prefix.casefold()
+        if after is None:
+            rows = self.connection.execute(
+                "SELECT name FROM products WHERE search_key >= ? AND search_key < ? ORDER BY search_key, name LIMIT ?",
+                (key, prefix_upper_bound(key), limit))
+        else:
+            rows = self.connection.execute(
+                "SELECT name FROM products WHERE (search_key, name) > (?, ?) AND search_key < ? "
+                "ORDER BY search_key, name LIMIT ?", (after.casefold(), after, prefix_upper_bound(key), limit))
+        return [name for (name,) in rows]
+
+    def iter_prefix(self, prefix, page_size=DEFAULT_PAGE_SIZE):
+        # Pages of matches, fetched only as the caller asks for them.
+        after = None
+        while True:
+            page = self.search_prefix(prefix, page_size, after)
+            if not page: return
+            yield page
+            if len(page) < page_size: return
+            after = page[-1]
+
+
+class TagLookup:
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def get(self, base_tag, default=None):
+        return self.catalog.name_for_tag(base_tag, default)
+
+    def __getitem__(self, base_tag):
+        name = self.catalog.name_for_tag(base_tag)
+        if name is None: raise KeyError(base_tag)
+        return name
+
+    def __contains__(self, base_tag):
+        return self.catalog.name_for_tag(base_tag) is not None
+
+
+def search_products(product_database, prefix, limit=DEFAULT_PAGE_SIZE):
+    # Product picker helper for either a catalog or a plain name -> tag dict.
+    if hasattr(product_database, "search_prefix"): return product_database.search_prefix(prefix, limit)
+    key = prefix.casefold()
+    return [name for name in product_database if name.casefold().startswith(key)][:limit]
+
+
+# --- Building ---
+def build_catalog(path, rows, batch_size=50_000):
+    # rows: iterable of (name, base_tag). Indexes are created after the bulk insert, which is much faster.
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.execute(SCHEMA)
+        batch = []
+        count = 0
+        for name, base_tag in rows:
+            batch.append((name, base_tag, name.casefold()))
+            if len(batch) >= batch_size:
+                connection.executemany("INSERT INTO products VALUES (?, ?, ?)", batch)
+                count += len(batch); batch = []
+        if batch:
+            connection.executemany("INSERT INTO products VALUES (?, ?, ?)", batch)
+            count += len(batch)
+        for statement in INDEXES:
+            connection.execute(statement)
+        connection.commit()
+        connection.execute("ANALYZE")
+    finally:
+        connection.close()
+    return count
+
+def csv_rows(csv_path):
+    with open(csv_path, newline='') as f:
+        for row in csv.reader(f):
+            if len(row) >= 2 and row[0] and row[0] != "name": yield row[0].strip(), row[1].strip()
+
+def synthetic_rows(count):
+    # The built-in products plus `count` generated SKUs with unique names and base tags.
+    yield from PRODUCT_DATABASE.items()
+    kinds = ["Cable", "Case", "Charger", "Dock", "Headset", "Mount", "Adapter", "Speaker", "Stylus", "Hub"]
+    for n in range(count):
+        yield f"{kinds[n % len(kinds)]} Model {n:07d}", f"RFID_SKU_{n:07d}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query an SQLite product catalog.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="create a catalog database")
+    build.add_argument("path", help="catalog database to create")
+    source = build.add_mutually_exclusive_group(required=True)
+    source.add_argument("--csv", help="CSV file of name,base_tag rows")
+    source.add_argument("--synthetic", type=int, help="generate this many SKUs (plus the built-in products)")
+    search = commands.add_parser("search", help="prefix search by product name")
+    search.add_argument("path", help="catalog database")
+    search.add_argument("prefix", help="case-insensitive name prefix")
+    search.add_argument("--limit", type=int, default=DEFAULT_PAGE_SIZE, help="maximum names to print")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.command == "build":
+        if os.path.exists(args.path): parser.error(f"{args.path} already exists")
+        rows = csv_rows(args.csv) if args.csv else synthetic_rows(args.synthetic)
+        count = build_catalog(args.path, rows)
+        print(f"Built {args.path} with {count:,} products in {time.perf_counter() - start:.2f}s")
+    else:
+        catalog = ProductCatalog(args.path)
+        names = catalog.search_prefix(args.prefix, args.limit)
+        for name in names: print(f"{name}\t{catalog[name]}")
+        print(f"{len(names)} match(es) in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# read_dedup.py
+# Read-ingestion stage: suppresses repeat reports of a tag across all antennas within a time window.
+#
+# Real readers report a tag many times per second, and overlapping antennas report it again.
+# Tags are tracked in an OrderedDict kept in last-seen order (an LRU), so expired entries are
+# dropped from the front and memory is capped at max_tags entries however long the run is.
+# A tag read again while tracked refreshes its last-seen time, so a tag sitting in the field
+# produces one unique read until it has been silent for window_seconds.
+
+import time
+from collections import Counter, OrderedDict
+
+DEFAULT_WINDOW_SECONDS = 2.0
+DEFAULT_MAX_TAGS = 65_536
+
+
+class ReadDeduplicator:
+    def __init__(self, window_seconds=DEFAULT_WINDOW_SECONDS, max_tags=DEFAULT_MAX_TAGS):
+        self.window_seconds = window_seconds
+        self.max_tags = max_tags
+        # key (tag, or e.g. (order id, tag)) -> last time it was read by any antenna
+        self.last_seen = OrderedDict()
+        self.raw_reads = 0
+        self.unique_reads = 0
+        self.evictions = 0
+        self.antenna_reads = Counter()
+
+    def accept(self, key, antenna=None, now=None):
+        # True for the first read of `key` in the window; False for a duplicate.
+        if now is None: now = time.monotonic()
+        self.raw_reads += 1
+        self.antenna_reads[antenna] += 1
+        last_seen = self.last_seen
+        last = last_seen.get(key)
+        last_seen[key] = now
+        last_seen.move_to_end(key)
+        if last is not None and now - last < self.window_seconds:
+            return False
+        self.unique_reads += 1
+        self._expire(now)
+        return True
+
+    def filter(self, keys, antenna=None, now=None):
+        if now is None: now = time.monotonic()
+        return [key for key in keys if self.accept(key, antenna, now)]
+
+    def _expire(self, now):
+        last_seen = self.last_seen
+        cutoff = now - self.window_seconds
+        while last_seen:
+            key, seen_at = next(iter(last_seen.items()))
+            if seen_at > cutoff: break
+            del last_seen[key]
+        while len(last_seen) > self.max_tags:
+            # Still inside its window: a later read of this tag will count as unique again.
+            last_seen.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        # Forgets tracked tags (e.g. a new package reuses tag serials); counters keep running.
+        self.last_seen.clear()
+
+    def counters(self):
+        return {
+            "rawReads": self.raw_reads,
+            "uniqueReads": self.unique_reads,
+            "suppressedReads": self.raw_reads - self.unique_reads,
+            "trackedTags": len(self.last_seen),
+            "evictions": self.evictions,
+            "readsPerAntenna": {str(antenna): count for antenna, count in self.antenna_reads.items()},
+        }
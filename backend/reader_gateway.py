@@ -0,0 +1,245 @@
+# reader_gateway.py
+# asyncio TCP gateway: many dock-door readers stream tag reads into per-order verification sessions.
+#
+#   python backend/reader_gateway.py --port 7300 --ndjson reports/
+#
+# Newline-delimited JSON in both directions. A reader opens an order, streams reads for it and
+# closes it; the report (same schema and SUCCESS/CAUTION/MISMATCH rules as finalize_verification)
+# is pushed to the connection that opened the order and to every connection that subscribed.
+#   {"type": "open", "orderId": "A1001", "items": {"Phone Case": 2}, "reader": "dock-3"}
+#   {"type": "read", "orderId": "A1001", "tag": "RFID_PC_4Y3Z-1"}
+#   {"type": "read", "reader": "dock-3", "tags": ["RFID_PC_4Y3Z-2", ...]}   # routed by the reader's open order
+#   {"type": "read", "reader": "dock-3", "antenna": "dock-3/2", "tag": "RFID_PC_4Y3Z-2"}
+#   {"type": "close", "orderId": "A1001"}
+#   {"type": "subscribe"} / {"type": "stats"}
+#   <- {"type": "result", "report": {...}} / {"type": "stats", ...} / {"type": "error", "message": ...}
+# Orders with no reads for --idle-timeout seconds are finalized as they stand. Repeat reads of a
+# tag for the same order (from any antenna) within --dedup-window seconds are dropped on arrival.
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from collections import Counter
+
+from instrumentation import Instrumentation
+from product_catalog import ProductCatalog
+from read_dedup import ReadDeduplicator, DEFAULT_WINDOW_SECONDS
+from rfid_engine import PRODUCT_DATABASE
+from history_store import VerificationHistory
+from report_sink import NDJSONReportWriter, FanOutSink
+from verification import build_reverse_index, build_report, ExpectedTags
+
+DEFAULT_PORT = 7300
+DEFAULT_IDLE_TIMEOUT = 30.0
+MAX_LINE_BYTES = 1024 * 1024
+
+log = logging.getLogger("reader_gateway")
+
+
+class GatewayError(Exception):
+    pass
+
+
+# --- Sessions ---
+class OrderSession:
+    def __init__(self, order_id, expected, owner=None, reader=None):
+        self.order_id = order_id
+        self.expected = expected
+        # Connection that opened the order; it always receives the result while connected.
+        self.owner = owner
+        self.reader = reader
+        self.detected_rfids = set()
+        self.reads = 0
+        self.opened_at = time.perf_counter()
+        self.last_read_at = self.opened_at
+
+    def add_reads(self, tags, raw_count):
+        self.detected_rfids.update(tags)
+        self.reads += raw_count
+        self.last_read_at = time.perf_counter()
+
+
+# --- Gateway ---
+class ReaderGateway:
+    def __init__(self, product_database=PRODUCT_DATABASE, report_sink=None, instrumentation=None,
+                 idle_timeout=DEFAULT_IDLE_TIMEOUT, read_filter=None):
+        self.product_database = product_database
+        self.reverse_index = build_reverse_index(product_database)
+        self.report_sink = report_sink
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation(enabled=False)
+        self.idle_timeout = idle_timeout
+        # Keyed by (order id, tag): serials restart at 1 in every order.
+        self.read_filter = read_filter if read_filter is not None else ReadDeduplicator()
+        self.sessions = {}
+        # Reader id -> order id it is currently reading for.
+        self.reader_orders = {}
+        self.subscribers = set()
+        self.reads_received = 0
+        self.statuses = Counter()
+
+    def open_session(self, order_id, items, owner=None, reader=None):
+        if order_id in self.sessions: raise GatewayError(f"Order {order_id} is already open.")
+        expected_counts = Counter()
+        for name, quantity in items.items():
+            if name not in self.product_database: raise GatewayError(f"Unknown product: {name}")
+            if not isinstance(quantity, int) or quantity < 1: raise GatewayError(f"Bad quantity for {name}: {quantity}")
+            expected_counts[name] += quantity
+        expected = ExpectedTags(expected_counts, self.product_database, self.reverse_index)
+        session = self.sessions[order_id] = OrderSession(order_id, expected, owner, reader)
+        if reader is not None: self.reader_orders[reader] = order_id
+        return session
+
+    def session_for(self, message):
+        order_id = message.get("orderId")
+        if order_id is None: order_id = self.reader_orders.get(message.get("reader"))
+        session = self.sessions.get(order_id)
+        if session is None: raise GatewayError(f"No open order for {order_id or message.get('reader')}.")
+        return session
+
+    def record_reads(self, message):
+        session = self.session_for(message)
+        tags = message["tags"] if "tags" in message else (message["tag"],)
+        if not isinstance(tags, (list, tuple)) or not all(isinstance(tag, str) for tag in tags):
+            raise GatewayError("Tags must be strings.")
+        antenna = message.get("antenna", message.get("reader"))
+        now = time.monotonic()
+        accept, order_id = self.read_filter.accept, session.order_id
+        session.add_reads([tag for tag in tags if accept((order_id, tag), antenna, now)], len(tags))
+        self.reads_received += len(tags)
+
+    def finalize(self, order_id):
+        session = self.sessions.get(order_id)
+        if session is None: raise GatewayError(f"No open order {order_id}.")
+        # The session is only closed once its report exists, and the result is published before it is
+        # persisted, so neither a failed report nor a failing sink (full disk, locked database) loses the order.
+        with self.instrumentation.timed("verification"):
+            report = build_report(session.expected, session.detected_rfids,
+                                  scan_duration=time.perf_counter() - session.opened_at, order_id=order_id)
+        del self.sessions[order_id]
+        if session.reader is not None and self.reader_orders.get(session.reader) == order_id:
+            del self.reader_orders[session.reader]
+        self.statuses[report["verificationStatus"]] += 1
+        self.publish(session, report)
+        if self.report_sink is not None:
+            try:
+                with self.instrumentation.timed("report_write"):
+                    self.report_sink.write(report)
+            except Exception:
+                log.exception("Failed to persist the report for order %s", order_id)
+        return report
+
+    def publish(self, session, report):
+        line = (json.dumps({"type": "result", "report": report}, separators=(",", ":")) + "\n").encode()
+        targets = set(self.subscribers)
+        if session.owner is not None: targets.add(session.owner)
+        for writer in targets:
+            if not writer.is_closing(): writer.write(line)
+
+    def stats(self):
+        return {"type": "stats", "openSessions": len(self.sessions), "readsReceived": self.reads_received,
+                "ordersFinalized": sum(self.statuses.values()), "statuses": dict(self.statuses),
+                "reads": self.read_filter.counters()}
+
+    def handle_message(self, message, writer):
+        # Returns a reply dict, or None when the message needs no reply (reads are fire-and-forget).
+        kind = message.get("type")
+        if kind == "read":
+            self.record_reads(message)
+        elif kind == "open":
+            self.open_session(message["orderId"], message.get("items", {}), writer, message.get("reader"))
+        elif kind == "close":
+            self.finalize(message["orderId"])
+        elif kind == "subscribe":
+            self.subscribers.add(writer)
+        elif kind == "stats":
+            return self.stats()
+        else:
+            raise GatewayError(f"Unknown message type: {kind}")
+        return None
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line: break
+                try:
+                    message = json.loads(line)
+                    reply = self.handle_message(message, writer)
+                except (GatewayError, KeyError, TypeError, AttributeError, ValueError) as e:
+                    reply = {"type": "error", "message": str(e) if isinstance(e, GatewayError) else f"Bad message: {e!r}"}
+                if reply is not None:
+                    writer.write((json.dumps(reply) + "\n").encode())
+                # Apply backpressure only once something has been queued for this connection.
+                if writer.transport.get_write_buffer_size(): await writer.drain()
+        except (ConnectionError, ValueError):
+            # ValueError: a line longer than MAX_LINE_BYTES; the stream cannot be resynchronized.
+            pass
+        finally:
+            self.subscribers.discard(writer)
+            # Orders outlive their connection; they are finalized by close or by the idle timeout.
+            for session in self.sessions.values():
+                if session.owner is writer: session.owner = None
+            writer.close()
+
+    async def housekeeping(self):
+        # Once a second: finalize idle orders and flush buffered reports when traffic is quiet.
+        while True:
+            await asyncio.sleep(1.0)
+            if self.idle_timeout:
+                cutoff = time.perf_counter() - self.idle_timeout
+                for order_id in [order_id for order_id, s in self.sessions.items() if s.last_read_at < cutoff]:
+                    # One bad order must not stop the loop that expires every other order.
+                    try:
+                        self.finalize(order_id)
+                    except Exception:
+                        log.exception("Failed to finalize idle order %s", order_id)
+            if self.report_sink is not None: self.report_sink.maybe_flush()
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_LINE_BYTES)
+        return server, asyncio.create_task(self.housekeeping())
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT):
+        server, housekeeping = await self.start(host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            housekeeping.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TCP gateway verifying streamed RFID reads against open orders.")
+    parser.add_argument("--host", default="127.0.0.1", help="interface to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="TCP port to listen on")
+    parser.add_argument("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT,
+                        help="finalize orders with no reads for this many seconds (0 disables)")
+    parser.add_argument("--dedup-window", type=float, default=DEFAULT_WINDOW_SECONDS,
+                        help="drop repeat reads of a tag within this many seconds")
+    parser.add_argument("--catalog", metavar="PATH", help="SQLite product catalog instead of the built-in products")
+    parser.add_argument("--ndjson", metavar="DIR", default=None, help="stream every report into rotating NDJSON files in DIR")
+    parser.add_argument("--gzip", action="store_true", help="gzip the NDJSON report files")
+    parser.add_argument("--history", metavar="PATH", default=None, help="also persist every report in this SQLite history database")
+    args = parser.parse_args(argv)
+
+    sinks = [NDJSONReportWriter(args.ndjson, compress=args.gzip)] if args.ndjson else []
+    if args.history: sinks.append(VerificationHistory(args.history))
+    report_sink = FanOutSink(*sinks) if sinks else None
+    product_database = ProductCatalog(args.catalog) if args.catalog else PRODUCT_DATABASE
+    gateway = ReaderGateway(product_database, report_sink=report_sink, idle_timeout=args.idle_timeout,
+                            read_filter=ReadDeduplicator(args.dedup_window))
+    print(f"Reader gateway listening on {args.host}:{args.port}")
+    try:
+        asyncio.run(gateway.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if report_sink: report_sink.close()
+        counters = gateway.read_filter.counters()
+        print(f"Received {counters['rawReads']} reads ({counters['uniqueReads']} unique), "
+              f"finalized {sum(gateway.statuses.values())} orders")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# reader_loadgen.py
+# Local load generator for reader_gateway: concurrent simulated dock-door readers on one machine.
+#
+#   python backend/reader_gateway.py &
+#   python backend/reader_loadgen.py --readers 50 --orders 5000 --batch 1
+#   python backend/reader_loadgen.py --local --readers 50 --orders 5000   # gateway in this process
+#
+# Each reader opens an order, sends its tag reads (--batch tags per message; every tag --repeats
+# times across the reader's --antennas antennas), closes it and waits for the pushed result.
+# Reports sustained reads/sec and close-to-result latency percentiles, and checks every pushed
+# status against the one expected from the generated reads.
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+
+from headless_sim import package_contents
+from instrumentation import LatencyHistogram
+from reader_gateway import ReaderGateway, DEFAULT_PORT, MAX_LINE_BYTES
+from rfid_engine import PRODUCT_DATABASE
+from verification import build_reverse_index, verification_status, ExpectedTags
+
+# --- Synthetic Reads ---
+def package_reads(rng, max_units, error_rate, product_database=PRODUCT_DATABASE):
+    # Same error model as headless_sim.simulate_package: maybe one unit missing, maybe one extra.
+    order, units = package_contents(rng, max_units, error_rate, list(product_database))
+    serials = Counter()
+    tags = []
+    for name in units:
+        serials[name] += 1
+        tags.append(f"{product_database[name]}-{serials[name]}")
+    rng.shuffle(tags)
+    return order, tags
+
+def expected_status(order, tags, reverse_index):
+    _, missing, extra = ExpectedTags(order, PRODUCT_DATABASE, reverse_index).diff(tags)
+    return verification_status(sum(missing.values()), sum(extra.values()))
+
+# --- Readers ---
+def antenna_reads(rng, tags, repeats, antennas):
+    # (antenna index, tag) pairs as a reader reports them: every tag several times, interleaved.
+    reads = [(k % antennas, tag) for tag in tags for k in range(repeats)]
+    rng.shuffle(reads)
+    return reads
+
+async def run_reader(reader_id, host, port, n_orders, rng, max_units, error_rate, batch, stats, repeats=1, antennas=1):
+    reader, writer = await asyncio.open_connection(host, port, limit=MAX_LINE_BYTES)
+    reverse_index = build_reverse_index(PRODUCT_DATABASE)
+    try:
+        for n in range(n_orders):
+            order_id = f"{reader_id}_{n:06d}"
+            order, tags = package_reads(rng, max_units, error_rate)
+            lines = [{"type": "open", "orderId": order_id, "items": dict(order), "reader": reader_id}]
+            reads = antenna_reads(rng, tags, repeats, antennas)
+            for i in range(0, len(reads), batch):
+                chunk = reads[i:i + batch]
+                # A read message comes from one antenna, so a batch is split where the antenna changes.
+                for antenna in sorted({k for k, _ in chunk}):
+                    chunk_tags = [tag for k, tag in chunk if k == antenna]
+                    message = {"type": "read", "reader": reader_id, "antenna": f"{reader_id}/{antenna}"}
+                    if len(chunk_tags) == 1: message["tag"] = chunk_tags[0]
+                    else: message["tags"] = chunk_tags
+                    lines.append(message)
+            lines.append({"type": "close", "orderId": order_id})
+            writer.write("".join(json.dumps(line) + "\n" for line in lines).encode())
+            await writer.drain()
+            sent_at = time.perf_counter()
+            while True:
+                line = await reader.readline()
+                if not line: raise ConnectionError(f"Gateway closed the connection before answering {order_id}.")
+                reply = json.loads(line)
+                if reply["type"] == "result" and reply["report"]["orderId"] == order_id: break
+                if reply["type"] == "error": stats["errors"] += 1
+            stats["latency"].record(time.perf_counter() - sent_at)
+            stats["reads"] += len(reads)
+            status = reply["report"]["verificationStatus"]
+            stats["statuses"][status] += 1
+            if status != expected_status(order, tags, reverse_index): stats["unexpected"] += 1
+    finally:
+        writer.close()
+
+async def run_load(host, port, readers, orders, max_units=10, error_rate=0.1, batch=1, seed=None, local=False,
+                   repeats=1, antennas=1):
+    gateway = server = housekeeping = None
+    if local:
+        gateway = ReaderGateway(idle_timeout=0)
+        server, housekeeping = await gateway.start(host, 0)
+        port = server.sockets[0].getsockname()[1]
+    rng = random.Random(seed)
+    stats = {"reads": 0, "errors": 0, "unexpected": 0, "statuses": Counter(), "latency": LatencyHistogram(window=max(orders, 1))}
+    per_reader = [orders // readers + (1 if i < orders % readers else 0) for i in range(readers)]
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(run_reader(f"dock-{i}", host, port, n, random.Random(rng.random()), max_units,
+                                          error_rate, batch, stats, repeats, antennas)
+                               for i, n in enumerate(per_reader) if n))
+    finally:
+        if server is not None:
+            housekeeping.cancel()
+            server.close()
+            await server.wait_closed()
+            stats["gateway"] = gateway.read_filter.counters()
+    return stats, time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent reader load generator for reader_gateway.")
+    parser.add_argument("--host", default="127.0.0.1", help="gateway host")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="gateway port")
+    parser.add_argument("--local", action="store_true", help="run a gateway inside this process on a free port")
+    parser.add_argument("--readers", type=int, default=20, help="concurrent reader connections")
+    parser.add_argument("--orders", type=int, default=1000, help="total orders across all readers")
+    parser.add_argument("--max-units", type=int, default=10, help="maximum units per random order")
+    parser.add_argument("--error-rate", type=float, default=0.1, help="chance of a missing and of an extra item per order")
+    parser.add_argument("--batch", type=int, default=1, help="tag reads per read message")
+    parser.add_argument("--repeats", type=int, default=1, help="times each tag is reported (duplicate reads)")
+    parser.add_argument("--antennas", type=int, default=1, help="antennas per reader sharing those reports")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for reproducible runs")
+    args = parser.parse_args(argv)
+    if args.readers < 1: parser.error("--readers must be at least 1")
+    if args.orders < 0: parser.error("--orders must not be negative")
+
+    stats, elapsed = asyncio.run(run_load(args.host, args.port, args.readers, args.orders, args.max_units,
+                                          args.error_rate, max(1, args.batch), args.seed, args.local,
+                                          max(1, args.repeats), max(1, args.antennas)))
+    finalized = sum(stats["statuses"].values())
+    print(f"{args.readers} readers sent {stats['reads']:,} reads for {finalized:,} orders in {elapsed:.3f}s "
+          f"({stats['reads'] / elapsed:,.0f} reads/sec, {finalized / elapsed:,.0f} orders/sec)")
+    for status in ("SUCCESS", "CAUTION", "MISMATCH"):
+        print(f"  {status:<9} {stats['statuses'].get(status, 0)}")
+    latency = stats["latency"].summary()
+    print(f"Close-to-result latency: p50 {latency['p50Ms']:.3f} ms, p95 {latency['p95Ms']:.3f} ms, "
+          f"p99 {latency['p99Ms']:.3f} ms, max {latency['maxMs']:.3f} ms")
+    if "gateway" in stats:
+        counters = stats["gateway"]
+        print(f"Gateway reads: {counters['rawReads']:,} raw, {counters['uniqueReads']:,} unique, "
+              f"{counters['suppressedReads']:,} suppressed, {counters['trackedTags']:,} tags tracked")
+    if stats["errors"] or stats["unexpected"]:
+        print(f"{stats['errors']} gateway errors, {stats['unexpected']} results with an unexpected status")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# report_sink.py
+# Buffered, append-only NDJSON stream of verification reports with size/time-based rotation.
+# FanOutSink tees reports into several sinks.
+#
+# Records are buffered in memory and written in batches (every flush_interval seconds or
+# buffer_records records); there is no fsync per record. With compress=True every batch is
+# appended as its own gzip member, so files stay readable (gzip.open / zcat) even if the
+# process dies without closing the writer.
+
+import gzip
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+DEFAULT_REPORTS_DIR = "verification_reports"
+
+
+class NDJSONReportWriter:
+    def __init__(self, directory=DEFAULT_REPORTS_DIR, prefix="verification_reports", max_bytes=64 * 1024 * 1024,
+                 max_age_seconds=3600, compress=False, flush_interval=1.0, buffer_records=1000):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.compress = compress
+        self.flush_interval = flush_interval
+        self.buffer_records = buffer_records
+        self.records_written = 0
+        self.files_opened = []
+        self._buffer = []
+        self._file = None
+        self._file_bytes = 0
+        self._file_opened_at = 0.0
+        self._last_flush = time.monotonic()
+        self._sequence = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def current_path(self):
+        return self._file.name if self._file else None
+
+    def write(self, record):
+        line = json.dumps(record, separators=(",", ":"))
+        with self._lock:
+            self._buffer.append(line)
+            if len(self._buffer) >= self.buffer_records or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush_locked()
+
+    def maybe_flush(self):
+        # For callers with their own timer (e.g. Tk's after loop) when no records are arriving.
+        with self._lock:
+            if self._buffer and time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer: return
+        payload = ("\n".join(self._buffer) + "\n").encode("utf-8")
+        count = len(self._buffer)
+        self._buffer = []
+        if self._file is None or self._needs_rotation():
+            self._rotate()
+        data = gzip.compress(payload) if self.compress else payload
+        self._file.write(data)
+        self._file.flush()
+        self._file_bytes += len(data)
+        self.records_written += count
+
+    def _needs_rotation(self):
+        if self.max_bytes and self._file_bytes >= self.max_bytes: return True
+        if self.max_age_seconds and time.monotonic() - self._file_opened_at >= self.max_age_seconds: return True
+        return False
+
+    def _rotate(self):
+        if self._file: self._file.close()
+        self._sequence += 1
+        suffix = ".ndjson.gz" if self.compress else ".ndjson"
+        name = f"{self.prefix}-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._sequence:04d}{suffix}"
+        path = os.path.join(self.directory, name)
+        self._file = open(path, "ab")
+        self._file_bytes = self._file.tell()
+        self._file_opened_at = time.monotonic()
+        self.files_opened.append(path)
+
+
+class FanOutSink:
+    # Sends every report to several sinks (e.g. NDJSON files and the history database).
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, record):
+        for sink in self.sinks: sink.write(record)
+
+    def maybe_flush(self):
+        for sink in self.sinks: sink.maybe_flush()
+
+    def flush(self):
+        for sink in self.sinks: sink.flush()
+
+    def close(self):
+        for sink in self.sinks: sink.close()
@@ -0,0 +1,259 @@
+# rfid_benchmarks.py
+# Reproducible, display-free benchmarks for detection, expected-tag generation, verification and reporting.
+#
+#   python backend/rfid_benchmarks.py                              # run and print a table
+#   python backend/rfid_benchmarks.py --save-baseline bench.json   # store results
+#   python backend/rfid_benchmarks.py --compare bench.json         # exit 1 on regressions
+#   python backend/rfid_benchmarks.py --import-budget-ms 50        # exit 1 on slow imports
+#
+# Each case is timed around the operation only (setup excluded). Fast operations are batched
+# so one timed repeat lasts at least BATCH_SECONDS; ops/sec is taken from the fastest repeat
+# and peak memory from one extra run under tracemalloc. Import times are measured in fresh
+# interpreters so a heavy module-level import (e.g. matplotlib) shows up as a regression.
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+
+from rfid_engine import SimulationEngine, PRODUCT_DATABASE, DEFAULT_SCANNER_RANGE, PACKAGE_BOUNDS
+from report_sink import NDJSONReportWriter
+from verification import ExpectedTags, build_report
+
+DEFAULT_SIZES = (10, 100, 1000, 10_000, 100_000)
+DEFAULT_TOLERANCE = 0.25
+BATCH_SECONDS = 0.01
+IMPORT_MODULES = ("rfid_engine", "headless_sim", "batch_verify", "advanced_rfid_sim")
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# --- Synthetic Workloads ---
+def synthetic_package(n_items, seed=0, missing_rate=0.02, extra_rate=0.01):
+    # Order quantities, placed item positions and the tags a reader would see, all seeded.
+    rng = random.Random(seed)
+    names = list(PRODUCT_DATABASE)
+    order = Counter(rng.choice(names) for _ in range(n_items))
+    x1, y1, x2, y2 = PACKAGE_BOUNDS
+    placements = []
+    for name, quantity in order.items():
+        for _ in range(quantity):
+            if rng.random() >= missing_rate:
+                placements.append((name, rng.uniform(x1, x2), rng.uniform(y1, y2)))
+    for _ in range(int(n_items * extra_rate) + 1):
+        placements.append((rng.choice(names), rng.uniform(x1, x2), rng.uniform(y1, y2)))
+    return order, placements
+
+def serpentine_path(bounds, scanner_range, samples_per_row=40):
+    x1, y1, x2, y2 = bounds
+    step_y = scanner_range * 1.4
+    path, y, row = [], y1, 0
+    while y <= y2 + step_y:
+        xs = [x1 + (x2 - x1) * i / (samples_per_row - 1) for i in range(samples_per_row)]
+        if row % 2: xs.reverse()
+        path.extend((x, y) for x in xs)
+        y += step_y; row += 1
+    return path
+
+def loaded_engine(order, placements, spatial_index=None):
+    engine = SimulationEngine(spatial_index=spatial_index)
+    for name, quantity in order.items():
+        engine.add_to_cart(name, quantity)
+    engine.confirm_order()
+    for name, x, y in placements:
+        engine.place_item(name, x, y)
+    return engine
+
+def scanned_tags(order, placements):
+    engine = loaded_engine(order, placements)
+    return {item.rfid_tag for item in engine.placed_items}
+
+# --- Benchmark Cases ---
+# Each factory returns (ops_per_call, setup, op): setup() builds fresh state, op(state) is timed.
+def case_detection(n_items, detector):
+    order, placements = synthetic_package(n_items)
+    path = serpentine_path(PACKAGE_BOUNDS, DEFAULT_SCANNER_RANGE)
+
+    def setup():
+        spatial_index = None
+        if detector == "numpy":
+            from vectorized_detection import TagArray
+            spatial_index = TagArray(capacity=len(placements))
+        engine = loaded_engine(order, placements, spatial_index)
+        engine.start_scan(*path[0])
+        return engine
+
+    def op(engine):
+        engine.scan_path(path)
+    return len(path), setup, op
+
+def case_expected_tags(n_items):
+    order, placements = synthetic_package(n_items)
+    tags = scanned_tags(order, placements)
+    reverse_index = SimulationEngine().reverse_index
+
+    def op(_):
+        # Builds the serial ranges and checks membership only; matching is timed by verification_diff.
+        expected = ExpectedTags(order, PRODUCT_DATABASE, reverse_index)
+        for tag in tags: tag in expected
+    return 1, lambda: None, op
+
+def case_verification(n_items):
+    order, placements = synthetic_package(n_items)
+    tags = scanned_tags(order, placements)
+    reverse_index = SimulationEngine().reverse_index
+
+    def op(_):
+        build_report(ExpectedTags(order, PRODUCT_DATABASE, reverse_index), tags, placed_count=len(placements))
+    return 1, lambda: None, op
+
+def case_report_serialization(n_items, directory, records=200):
+    order, placements = synthetic_package(n_items)
+    report = build_report(ExpectedTags(order, PRODUCT_DATABASE), scanned_tags(order, placements))
+
+    def setup():
+        return NDJSONReportWriter(directory, prefix="bench", flush_interval=3600, buffer_records=records)
+
+    def op(writer):
+        for _ in range(records):
+            writer.write(report)
+        writer.close()
+    return records, setup, op
+
+def benchmark_cases(sizes, detectors, scratch_dir):
+    for n in sizes:
+        for detector in detectors:
+            yield f"detection[{detector}]", n, "positions/sec", lambda n=n, d=detector: case_detection(n, d)
+        yield "expected_tags", n, "orders/sec", lambda n=n: case_expected_tags(n)
+        yield "verification_diff", n, "orders/sec", lambda n=n: case_verification(n)
+        yield "report_serialization", n, "reports/sec", lambda n=n: case_report_serialization(n, scratch_dir)
+
+# --- Runner ---
+def time_batch(setup, op, number):
+    states = [setup() for _ in range(number)]
+    start = time.perf_counter()
+    for state in states:
+        op(state)
+    return (time.perf_counter() - start) / number
+
+def measure(factory, min_time=0.2, max_repeats=20):
+    ops_per_call, setup, op = factory()
+    # Warm-up run doubles as calibration of the batch size.
+    number = max(1, min(10_000, int(BATCH_SECONDS / max(time_batch(setup, op, 1), 1e-7))))
+    best, total, repeats = float("inf"), 0.0, 0
+    while repeats < max_repeats and (total < min_time or repeats < 3):
+        elapsed = time_batch(setup, op, number)
+        best = min(best, elapsed); total += elapsed * number; repeats += 1
+    state = setup()
+    tracemalloc.start()
+    op(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "opsPerSec": ops_per_call / best if best else float("inf"),
+        "bestSeconds": best,
+        "repeats": repeats,
+        "peakMemoryBytes": peak,
+    }
+
+def measure_import(module, repeats=5):
+    # Time of `import module` alone (interpreter startup excluded), best of `repeats` fresh processes.
+    code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+    best = float("inf")
+    for _ in range(repeats):
+        result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True)
+        if result.returncode: return None
+        best = min(best, float(result.stdout))
+    return {"opsPerSec": 1 / best, "bestSeconds": best, "repeats": repeats, "unit": "imports/sec"}
+
+def run_import_benchmarks(modules=IMPORT_MODULES):
+    results = {}
+    for module in modules:
+        key = f"import/{module}"
+        result = measure_import(module)
+        if result is None:
+            print(f"{key:<36} {'skipped (import failed)':>14}", flush=True)
+            continue
+        results[key] = result
+        print(f"{key:<36} {result['bestSeconds'] * 1000:>14,.1f} ms", flush=True)
+    return results
+
+def run_benchmarks(sizes=DEFAULT_SIZES, detectors=("grid", "numpy"), min_time=0.2):
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="rfid_bench_") as scratch_dir:
+        for name, n, unit, factory in benchmark_cases(sizes, detectors, scratch_dir):
+            key = f"{name}/{n}"
+            result = measure(factory, min_time=min_time)
+            result["unit"] = unit
+            results[key] = result
+            print(f"{key:<36} {result['opsPerSec']:>14,.1f} {unit:<14} peak {result['peakMemoryBytes'] / 1024:>10,.1f} KiB",
+                  flush=True)
+    return results
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    # A case regresses when it is slower than (1 - tolerance) x baseline ops/sec.
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if not base: continue
+        ratio = result["opsPerSec"] / base["opsPerSec"] if base["opsPerSec"] else float("inf")
+        if ratio < 1 - tolerance:
+            regressions.append((key, ratio))
+    return regressions
+
+def available_detectors():
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return ("grid",)
+    return ("grid", "numpy")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless RFID simulation benchmarks.")
+    parser.add_argument("--sizes", default=",".join(str(n) for n in DEFAULT_SIZES),
+                        help="comma-separated package sizes (items)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum timed seconds per case")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write results as a baseline JSON file")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a baseline JSON file")
+    parser.add_argument("--import-budget-ms", type=float, default=None,
+                        help="fail if importing any measured module takes longer than this")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed fractional slowdown before a case counts as a regression")
+    args = parser.parse_args(argv)
+
+    sizes = [int(n) for n in args.sizes.split(",") if n]
+    results = run_benchmarks(sizes, available_detectors(), args.min_time)
+    import_results = run_import_benchmarks()
+    results.update(import_results)
+
+    if args.save_baseline:
+        meta = {"python": sys.version.split()[0], "platform": platform.platform(), "cpus": os.cpu_count()}
+        with open(args.save_baseline, 'w') as f:
+            json.dump({"meta": meta, "results": results}, f, indent=4)
+        print(f"Baseline saved to {args.save_baseline}")
+    if args.import_budget_ms is not None:
+        slow = [(key, result["bestSeconds"] * 1000) for key, result in import_results.items()
+                if result["bestSeconds"] * 1000 > args.import_budget_ms]
+        if slow:
+            print(f"{len(slow)} import(s) over the {args.import_budget_ms:g} ms budget:")
+            for key, ms in slow:
+                print(f"  {key:<36} {ms:.1f} ms")
+            sys.exit(1)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for key, ratio in regressions:
+                print(f"  {key:<36} {ratio:.2f}x baseline")
+            sys.exit(1)
+        print("No regressions against baseline.")
+
+if __name__ == "__main__":
+    main()
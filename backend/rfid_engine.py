@@ -0,0 +1,241 @@
+# rfid_engine.py
+# Display-free simulation core: orders, placed items, scanner and verification.
+
+from collections import Counter
+import time
+
+from instrumentation import Instrumentation
+from read_dedup import ReadDeduplicator
+from spatial_index import UniformGrid
+from verification import build_reverse_index, build_report, split_tag, ExpectedTags
+
+# --- (1) Core Simulation Data ---
+PRODUCT_DATABASE = {
+    'Bluetooth Headphones': 'RFID_BH_9X01',
+    'USB-C Cable': 'RFID_USBC_2A8X',
+    'Phone Case': 'RFID_PC_4Y3Z',
+    'Charging Dock': 'RFID_CD_A7V1',
+    'Screen Protector': 'RFID_SP_E2W3',
+    'Wireless Charger': 'RFID_WC_G5T6',
+    'Power Bank': 'RFID_PB_H9J2',
+    'Bonus Item (Keychain)': 'RFID_BI_F8C9'
+}
+
+DEFAULT_SCANNER_RANGE = 80
+PACKAGE_BOUNDS = (50, 50, 700, 650)
+
+# --- Item Class ---
+class Item:
+    def __init__(self, name, rfid_tag, x, y, size=20):
+        self.name = name
+        self.rfid_tag = rfid_tag
+        self.x = x
+        self.y = y
+        self.size = size
+        self.canvas_id = None
+        self.text_id = None
+        self.rfid_text_id = None
+        self.detected = False
+
+# --- Simulation Engine ---
+class SimulationEngine:
+    def __init__(self, product_database=None, package_bounds=PACKAGE_BOUNDS, spatial_index=None, report_sink=None,
+                 instrumentation=None, read_filter=None, recorder=None):
+        self.product_database = product_database if product_database is not None else PRODUCT_DATABASE
+        self.reverse_index = build_reverse_index(self.product_database)
+        # Optional report_sink.NDJSONReportWriter; every finalized report is streamed into it.
+        self.report_sink = report_sink
+        # Stage timings ("detection", "verification", "report_write"); disabled unless one is passed in.
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation(enabled=False)
+        self.package_x1, self.package_y1, self.package_x2, self.package_y2 = package_bounds
+        # Every read, from the scanner or any other antenna, passes through this before detection.
+        self.read_filter = read_filter if read_filter is not None else ReadDeduplicator()
+        # Optional session_recording.SessionRecorder; every state change is appended to it for replay.
+        self.recorder = recorder
+
+        # --- State Management Variables ---
+        # Product name -> quantity, in the order lines were first added.
+        self.customer_order = Counter()
+        self.placed_items = []
+        self.items_by_tag = {}
+        # Undetected items only; detected ones are dropped so later scanner moves skip them.
+        # Any object with insert/remove/clear/query_circle works (e.g. vectorized_detection.TagArray).
+        self.spatial_index = spatial_index if spatial_index is not None else UniformGrid(cell_size=DEFAULT_SCANNER_RANGE)
+        self.detected_rfids = set()
+        self.detected_counter = Counter()
+        # ExpectedTags for customer_order, built on demand and dropped whenever the cart changes.
+        self._expected_tags = None
+        self.item_instance_counter = Counter()
+        self.order_confirmed = False
+        self.scan_mode_active = False
+        self.scan_start_time = None
+        self.scanner_x, self.scanner_y = 0, 0
+        self.scanner_range = DEFAULT_SCANNER_RANGE
+        self.last_verification_data = {}
+
+    # --- Order Building ---
+    def add_to_cart(self, item_name, quantity=1):
+        if item_name not in self.product_database:
+            raise KeyError(item_name)
+        quantity = int(quantity)
+        if quantity < 1: raise ValueError("Quantity must be a positive number.")
+        self.customer_order[item_name] += quantity
+        self._expected_tags = None
+        if self.recorder is not None: self.recorder.add_to_cart(item_name, self.product_database[item_name], quantity)
+
+    def clear_cart(self):
+        self.customer_order.clear()
+        self._expected_tags = None
+        if self.recorder is not None: self.recorder.clear_cart()
+
+    def confirm_order(self):
+        if not self.customer_order:
+            raise ValueError("Cannot confirm an empty order.")
+        self.order_confirmed = True
+        if self.recorder is not None: self.recorder.confirm_order()
+
+    # --- Package Contents ---
+    def in_package(self, x, y):
+        return self.package_x1 <= x <= self.package_x2 and self.package_y1 <= y <= self.package_y2
+
+    def place_item(self, item_name, x, y):
+        if not self.in_package(x, y):
+            raise ValueError("Item position is outside the package boundary.")
+        base_rfid = self.product_database[item_name]
+        if self.recorder is not None: self.recorder.place_item(item_name, base_rfid, x, y)
+        self.item_instance_counter[item_name] += 1
+        instance_count = self.item_instance_counter[item_name]
+        unique_rfid = f"{base_rfid}-{instance_count}"
+        new_item = Item(item_name, unique_rfid, x, y)
+        self.placed_items.append(new_item)
+        self.items_by_tag[unique_rfid] = new_item
+        self.spatial_index.insert(new_item)
+        return new_item
+
+    def reset(self):
+        self.placed_items.clear()
+        self.items_by_tag.clear()
+        self.read_filter.clear()
+        self.spatial_index.clear()
+        self.order_confirmed = False; self.scan_mode_active = False
+        self.detected_rfids.clear(); self.detected_counter.clear()
+        self._expected_tags = None
+        self.item_instance_counter.clear(); self.customer_order.clear()
+        self.scan_start_time = None
+        self.last_verification_data = {}
+        if self.recorder is not None: self.recorder.reset()
+
+    # --- Scanner ---
+    def set_scanner_range(self, scanner_range):
+        if self.recorder is not None: self.recorder.set_scanner_range(scanner_range)
+        self.scanner_range = scanner_range
+
+    def start_scan(self, x, y):
+        if not self.placed_items:
+            raise ValueError("Please add items to the package before scanning.")
+        if self.recorder is not None: self.recorder.start_scan(x, y)
+        self.scan_start_time = time.perf_counter()
+        self.scan_mode_active = True
+        self.scanner_x, self.scanner_y = x, y
+
+    def move_scanner(self, x, y, swept=True):
+        if self.recorder is not None: self.recorder.scan_path([(x, y)], swept)
+        return self._move_scanner(x, y, swept)
+
+    def _move_scanner(self, x, y, swept=True):
+        # Detects against the capsule swept from the previous position, so a fast
+        # drag (or coalesced motion events) cannot jump over tags between samples.
+        x0, y0 = self.scanner_x, self.scanner_y
+        self.scanner_x, self.scanner_y = x, y
+        if not swept or (x0 == x and y0 == y):
+            return self.check_for_detected_items()
+        with self.instrumentation.timed("detection"):
+            newly_detected = self.spatial_index.query_capsule(x0, y0, x, y, self.scanner_range)
+            self._mark_detected(newly_detected)
+        return newly_detected
+
+    def scan_path(self, path, swept=True):
+        # A recorded list of (x, y) scanner positions; one vectorized pass when the index supports it.
+        if not path: return []
+        if self.recorder is not None: self.recorder.scan_path(path, swept)
+        detect_path = getattr(self.spatial_index, "detect_path", None)
+        if detect_path is None:
+            newly_detected = []
+            for x, y in path:
+                newly_detected.extend(self._move_scanner(x, y, swept))
+            return newly_detected
+        if swept: path = [(self.scanner_x, self.scanner_y)] + list(path)
+        xs, ys = zip(*path)
+        self.scanner_x, self.scanner_y = path[-1]
+        items = self.spatial_index.items
+        with self.instrumentation.timed("detection"):
+            newly_detected = [items[i] for i in detect_path(xs, ys, self.scanner_range, swept=swept)]
+            self._mark_detected(newly_detected)
+        return newly_detected
+
+    def check_for_detected_items(self):
+        with self.instrumentation.timed("detection"):
+            newly_detected = self.spatial_index.query_circle(self.scanner_x, self.scanner_y, self.scanner_range)
+            self._mark_detected(newly_detected)
+        return newly_detected
+
+    # --- Read Ingestion ---
+    def ingest_reads(self, rfid_tags, antenna="external", now=None):
+        # Raw reads from another (virtual) antenna. Duplicates inside the filter's window are dropped;
+        # a read of a placed item detects it, and a read of any other tag is recorded as seen.
+        if self.recorder is not None:
+            rfid_tags = list(rfid_tags)
+            self.recorder.ingest_reads(rfid_tags, antenna, now, self.reverse_index)
+        newly_detected = []
+        with self.instrumentation.timed("read_ingest"):
+            for rfid_tag in self.read_filter.filter(rfid_tags, antenna, now):
+                if rfid_tag in self.detected_rfids: continue
+                item = self.items_by_tag.get(rfid_tag)
+                if item is not None:
+                    newly_detected.append(item)
+                else:
+                    base, _ = split_tag(rfid_tag)
+                    self.detected_rfids.add(rfid_tag)
+                    self.detected_counter[self.reverse_index.get(base, base)] += 1
+            self._mark_detected(newly_detected, antenna=None)
+        return newly_detected
+
+    def _mark_detected(self, items, antenna="scanner"):
+        # The scanner is one more antenna; its reads go through the same filter (antenna=None: already filtered).
+        # Detected items leave the spatial index, so the scanner never reports the same item twice.
+        if antenna is not None and items:
+            now = time.monotonic()
+            for item in items: self.read_filter.accept(item.rfid_tag, antenna, now)
+        for item in items:
+            item.detected = True
+            self.detected_rfids.add(item.rfid_tag)
+            self.detected_counter[item.name] += 1
+            self.spatial_index.remove(item)
+
+    def order_counts(self):
+        return self.customer_order
+
+    def expected_tags(self):
+        if self._expected_tags is None:
+            self._expected_tags = ExpectedTags(self.customer_order, self.product_database, self.reverse_index)
+        return self._expected_tags
+
+    def detected_counts(self):
+        # Running per-product tally maintained by _mark_detected; treat as read-only.
+        return self.detected_counter
+
+    # --- Verification ---
+    def finalize_verification(self, order_id=None, scan_duration=None, now=None):
+        # scan_duration overrides the wall-clock time since start_scan (e.g. simulated belt time);
+        # now overrides the report timestamp (session replay).
+        if scan_duration is None:
+            scan_duration = time.perf_counter() - self.scan_start_time if self.scan_start_time else 0
+        self.scan_mode_active = False
+        with self.instrumentation.timed("verification"):
+            self.last_verification_data = build_report(
+                self.expected_tags(), self.detected_rfids, scan_duration=scan_duration, order_id=order_id, placed_count=len(self.placed_items), now=now)
+        if self.recorder is not None: self.recorder.finalize(self.last_verification_data)
+        if self.report_sink is not None:
+            with self.instrumentation.timed("report_write"):
+                self.report_sink.write(self.last_verification_data)
+        return self.last_verification_data
@@ -0,0 +1,303 @@
+# session_recording.py
+# Compact binary recordings of scan sessions, replayed headlessly through the engine.
+#
+#   python backend/session_recording.py synthesize sessions/ --sessions 1000 --seed 1
+#   python backend/session_recording.py replay sessions/ --detector grid numpy
+#   python backend/session_recording.py replay operator_session.rfrec
+#
+# SessionRecorder is attached to a SimulationEngine (recorder=...) and appends every state change
+# (cart lines, placements, scan start, scanner paths exactly as the app batches them, range
+# changes, reads ingested from other antennas, resets and finalized results) to one flat array('i') of opcodes and integer operands;
+# product names and other strings are interned in a small table. A one-minute drag is a few KB.
+# replay() feeds a recording through a fresh engine as fast as the detection code runs and
+# reproduces last_verification_data exactly: timestamps, order ids and scan durations are
+# recorded, and product tags are embedded so a recording needs no catalog to replay.
+#
+# File layout (little-endian): b"RFSR", version byte, pad byte, uint32 string-table bytes,
+# uint32 event count, NUL-separated UTF-8 strings, int32 events. Version 2 added READS; version 1
+# files still load.
+
+import argparse
+import os
+import random
+import struct
+import sys
+import time
+from array import array
+from datetime import datetime
+
+from headless_sim import make_spatial_index, package_contents, raster_path
+from rfid_engine import SimulationEngine, PRODUCT_DATABASE, DEFAULT_SCANNER_RANGE
+from verification import split_tag
+
+MAGIC = b"RFSR"
+VERSION = 2
+SUPPORTED_VERSIONS = (1, 2)
+HEADER = struct.Struct("<4sBxII")
+FILE_SUFFIX = ".rfrec"
+
+# --- Event Opcodes ---
+PRODUCT, ORDER, CLEAR_CART, CONFIRM, PLACE, START, RANGE, PATH, FINALIZE, RESET, READS = range(1, 12)
+# Operands per opcode; PATH is (count, swept, x1, y1, ... xn, yn) and READS is
+# (antenna, read time in ms or -1 for the wall clock, count, tag 1, ... tag n).
+ARG_COUNTS = {PRODUCT: 2, ORDER: 2, CLEAR_CART: 0, CONFIRM: 0, PLACE: 3, START: 2, RANGE: 1, FINALIZE: 7, RESET: 0}
+STATUSES = ("SUCCESS", "CAUTION", "MISMATCH")
+
+
+def pixel(value):
+    # Recordings hold canvas pixels; a fractional coordinate would not replay exactly.
+    as_int = int(value)
+    if as_int != value: raise ValueError(f"Session recordings store integer coordinates, got {value!r}.")
+    return as_int
+
+
+class SessionRecorder:
+    def __init__(self):
+        self.strings = []
+        self.events = array("i")
+        self.products = {}
+        self._string_ids = {}
+        self._scanner_range = None
+
+    def _string(self, text):
+        index = self._string_ids.get(text)
+        if index is None:
+            index = self._string_ids[text] = len(self.strings)
+            self.strings.append(text)
+        return index
+
+    def _product(self, name, base_tag):
+        if name not in self.products:
+            self.products[name] = base_tag
+            self.events.extend((PRODUCT, self._string(name), self._string(base_tag)))
+        return self._string_ids[name]
+
+    # --- Engine Hooks ---
+    # Hooks that can reject their operands (non-integer coordinates) validate before appending and
+    # run before the engine changes any state, so a rejected call leaves both untouched.
+    def add_to_cart(self, name, base_tag, quantity):
+        self.events.extend((ORDER, self._product(name, base_tag), quantity))
+
+    def clear_cart(self):
+        self.events.append(CLEAR_CART)
+
+    def confirm_order(self):
+        self.events.append(CONFIRM)
+
+    def place_item(self, name, base_tag, x, y):
+        x, y = pixel(x), pixel(y)
+        self.events.extend((PLACE, self._product(name, base_tag), x, y))
+
+    def reset(self):
+        self.events.append(RESET)
+
+    def set_scanner_range(self, scanner_range):
+        # The app re-reads the range before every detection pass; only changes are recorded.
+        if scanner_range != self._scanner_range:
+            self.events.extend((RANGE, pixel(scanner_range)))
+            self._scanner_range = scanner_range
+
+    def start_scan(self, x, y):
+        x, y = pixel(x), pixel(y)
+        self.events.extend((START, x, y))
+
+    def scan_path(self, path, swept=True):
+        coords = array("i")
+        for x, y in path:
+            coords.append(pixel(x)); coords.append(pixel(y))
+        self.events.extend((PATH, len(path), int(swept)))
+        self.events.extend(coords)
+
+    def ingest_reads(self, rfid_tags, antenna, now, reverse_index):
+        # Timestamps are simulated seconds (e.g. the conveyor clock); None replays on the wall clock.
+        # Products of unplaced tags are embedded too, so replay names extras as the catalog did.
+        now_ms = -1 if now is None else round(now * 1000)
+        reads = array("i", (now_ms, len(rfid_tags)))
+        for rfid_tag in rfid_tags:
+            base, _ = split_tag(rfid_tag)
+            name = reverse_index.get(base)
+            if name is not None: self._product(name, base)
+        reads.extend(self._string(tag) for tag in rfid_tags)
+        self.events.extend((READS, self._string(str(antenna))))
+        self.events.extend(reads)
+
+    def finalize(self, report):
+        metrics = report["metrics"]
+        self.events.extend((FINALIZE, self._string(report["orderId"]), self._string(report["timestamp"]),
+                            round(report["scanDurationSeconds"] * 100), STATUSES.index(report["verificationStatus"]),
+                            metrics["detectedItemsCount"], metrics["missingItemsCount"], metrics["extraItemsCount"]))
+
+    # --- Reading ---
+    def iter_events(self):
+        # (opcode, operands) in recording order; PATH operands are the flat coordinate list and
+        # READS operands are (antenna, time in seconds or None, tags).
+        events, strings = self.events, self.strings
+        i, end = 0, len(events)
+        while i < end:
+            op = events[i]
+            if op == PATH:
+                count, swept = events[i + 1], events[i + 2]
+                yield op, (bool(swept), events[i + 3:i + 3 + 2 * count])
+                i += 3 + 2 * count
+            elif op == READS:
+                antenna, now_ms, count = events[i + 1], events[i + 2], events[i + 3]
+                tags = [strings[index] for index in events[i + 4:i + 4 + count]]
+                yield op, (strings[antenna], None if now_ms < 0 else now_ms / 1000, tags)
+                i += 4 + count
+            else:
+                n = ARG_COUNTS[op]
+                yield op, events[i + 1:i + 1 + n]
+                i += 1 + n
+
+    def results(self):
+        # Recorded outcome of every verification: (order id, status, detected, missing, extra).
+        return [(self.strings[args[0]], STATUSES[args[3]], args[4], args[5], args[6])
+                for op, args in self.iter_events() if op == FINALIZE]
+
+    # --- Serialization ---
+    def to_bytes(self):
+        strings = "\0".join(self.strings).encode("utf-8")
+        events = array("i", self.events)
+        if sys.byteorder == "big": events.byteswap()
+        return HEADER.pack(MAGIC, VERSION, len(strings), len(events)) + strings + events.tobytes()
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, string_bytes, event_count = HEADER.unpack_from(data)
+        if magic != MAGIC or version not in SUPPORTED_VERSIONS: raise ValueError("Not a scan session recording this version can read.")
+        recording = cls()
+        offset = HEADER.size
+        if string_bytes: recording.strings = data[offset:offset + string_bytes].decode("utf-8").split("\0")
+        recording._string_ids = {text: i for i, text in enumerate(recording.strings)}
+        offset += string_bytes
+        recording.events.frombytes(data[offset:offset + event_count * recording.events.itemsize])
+        if sys.byteorder == "big": recording.events.byteswap()
+        for op, args in recording.iter_events():
+            if op == PRODUCT: recording.products[recording.strings[args[0]]] = recording.strings[args[1]]
+        return recording
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+# --- Replay ---
+def replay(recording, product_database=None, spatial_index=None, instrumentation=None):
+    # Runs a recording through a fresh engine; returns the reports it finalizes, in order.
+    engine = SimulationEngine(product_database if product_database is not None else recording.products,
+                              spatial_index=spatial_index, instrumentation=instrumentation)
+    strings = recording.strings
+    reports = []
+    for op, args in recording.iter_events():
+        if op == PATH:
+            swept, coords = args
+            engine.scan_path(list(zip(coords[::2], coords[1::2])), swept)
+        elif op == PLACE: engine.place_item(strings[args[0]], args[1], args[2])
+        elif op == RANGE: engine.set_scanner_range(args[0])
+        elif op == READS: engine.ingest_reads(args[2], args[0], args[1])
+        elif op == ORDER: engine.add_to_cart(strings[args[0]], args[1])
+        elif op == CONFIRM: engine.confirm_order()
+        elif op == START: engine.start_scan(args[0], args[1])
+        elif op == FINALIZE:
+            reports.append(engine.finalize_verification(order_id=strings[args[0]], scan_duration=args[2] / 100,
+                                                        now=datetime.fromisoformat(strings[args[1]])))
+        elif op == RESET: engine.reset()
+        elif op == CLEAR_CART: engine.clear_cart()
+    return reports
+
+def differences(recording, reports):
+    # Recorded results that the replayed reports do not reproduce.
+    replayed = [(r["orderId"], r["verificationStatus"], r["metrics"]["detectedItemsCount"],
+                 r["metrics"]["missingItemsCount"], r["metrics"]["extraItemsCount"]) for r in reports]
+    expected = recording.results()
+    diffs = [(want, got) for want, got in zip(expected, replayed) if want != got]
+    if len(expected) != len(replayed): diffs.append((f"{len(expected)} verifications", f"{len(replayed)} replayed"))
+    return diffs
+
+def recording_paths(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            yield from (os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(FILE_SUFFIX))
+        else:
+            yield path
+
+# --- Synthetic Sessions ---
+def record_synthetic_session(rng, packages, max_units=10, error_rate=0.1, scanner_range=DEFAULT_SCANNER_RANGE,
+                             session_id=0):
+    # An operator-like session: headless_sim's packages with pixel placements, the raster sweep
+    # delivered in uneven batches the way coalesced drag events reach the engine.
+    recorder = SessionRecorder()
+    engine = SimulationEngine(PRODUCT_DATABASE, recorder=recorder)
+    product_names = list(PRODUCT_DATABASE)
+    for n in range(packages):
+        engine.reset()
+        engine.set_scanner_range(scanner_range)
+        order, to_place = package_contents(rng, max_units, error_rate, product_names)
+        for item_name, quantity in order.items():
+            engine.add_to_cart(item_name, quantity)
+        engine.confirm_order()
+        for item_name in to_place:
+            engine.place_item(item_name, rng.randint(engine.package_x1, engine.package_x2),
+                              rng.randint(engine.package_y1, engine.package_y2))
+        path = [(x + rng.randint(-3, 3), y + rng.randint(-3, 3)) for x, y in raster_path(engine, scanner_range)]
+        engine.start_scan(*path[0])
+        i = 0
+        while i < len(path):
+            batch = rng.randint(1, 8)
+            engine.scan_path(path[i:i + batch])
+            i += batch
+        engine.finalize_verification(order_id=f"REC_{session_id:05d}_{n:03d}")
+    return recorder
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record synthetic scan sessions or replay recorded ones headlessly.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    synthesize = commands.add_parser("synthesize", help="write random operator-like session recordings")
+    synthesize.add_argument("directory", help="directory for the *.rfrec files")
+    synthesize.add_argument("--sessions", type=int, default=100, help="number of session files")
+    synthesize.add_argument("--packages", type=int, default=5, help="verifications per session")
+    synthesize.add_argument("--seed", type=int, default=None, help="random seed for reproducible sessions")
+    replay_parser = commands.add_parser("replay", help="replay recordings and check their results")
+    replay_parser.add_argument("paths", nargs="+", help="*.rfrec files or directories of them")
+    replay_parser.add_argument("--detector", choices=("grid", "numpy"), nargs="+", default=["grid"],
+                               help="detection backends to replay with (timed separately)")
+    args = parser.parse_args(argv)
+
+    if args.command == "synthesize":
+        os.makedirs(args.directory, exist_ok=True)
+        rng = random.Random(args.seed)
+        total_bytes = 0
+        for s in range(args.sessions):
+            recorder = record_synthetic_session(rng, args.packages, session_id=s)
+            path = os.path.join(args.directory, f"session_{s:05d}{FILE_SUFFIX}")
+            recorder.save(path)
+            total_bytes += os.path.getsize(path)
+        print(f"Wrote {args.sessions} sessions to {args.directory} ({total_bytes / max(1, args.sessions):,.0f} bytes/session)")
+        return
+
+    recordings = [SessionRecorder.load(path) for path in recording_paths(args.paths)]
+    samples = sum(len(operands[1]) // 2 for r in recordings for op, operands in r.iter_events() if op == PATH)
+    failed = False
+    for detector in args.detector:
+        start = time.perf_counter()
+        replayed = [replay(recording, spatial_index=make_spatial_index(detector)) for recording in recordings]
+        elapsed = time.perf_counter() - start
+        diffs = [d for recording, reports in zip(recordings, replayed) for d in differences(recording, reports)]
+        verifications = sum(len(reports) for reports in replayed)
+        rate = len(recordings) / elapsed if elapsed else float("inf")
+        print(f"[{detector}] replayed {len(recordings)} sessions ({verifications} verifications, {samples:,} scanner "
+              f"samples) in {elapsed:.3f}s ({rate:,.0f} sessions/sec)")
+        if diffs:
+            failed = True
+            print(f"  {len(diffs)} result(s) differ from the recording:")
+            for want, got in diffs[:10]:
+                print(f"    recorded {want}, replayed {got}")
+    if failed: sys.exit(1)
+
+if __name__ == "__main__":
+    main()
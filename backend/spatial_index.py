@@ -0,0 +1,106 @@
+# spatial_index.py
+# Uniform grid over item positions so a scanner move only visits nearby cells.
+
+HALF_DIAGONAL = 0.7071067811865476
+
+
+def segment_distance_sq(px, py, x0, y0, vx, vy, seg_len_sq):
+    # Squared distance from (px, py) to the segment starting at (x0, y0) with direction (vx, vy).
+    t = ((px - x0) * vx + (py - y0) * vy) / seg_len_sq
+    if t < 0: t = 0
+    elif t > 1: t = 1
+    dx = px - x0 - t * vx
+    dy = py - y0 - t * vy
+    return dx * dx + dy * dy
+
+
+class UniformGrid:
+    def __init__(self, cell_size=80):
+        if cell_size <= 0: raise ValueError("cell_size must be positive")
+        self.cell_size = cell_size
+        # (col, row) -> {item: None}; a dict keeps insertion order and gives O(1) removal.
+        self.cells = {}
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def _cell_key(self, x, y):
+        return (int(x // self.cell_size), int(y // self.cell_size))
+
+    def insert(self, item):
+        key = self._cell_key(item.x, item.y)
+        bucket = self.cells.get(key)
+        if bucket is None:
+            bucket = self.cells[key] = {}
+        if item not in bucket:
+            bucket[item] = None
+            self._count += 1
+
+    def remove(self, item):
+        key = self._cell_key(item.x, item.y)
+        bucket = self.cells.get(key)
+        if bucket is None or item not in bucket: return False
+        del bucket[item]
+        self._count -= 1
+        if not bucket: del self.cells[key]
+        return True
+
+    def clear(self):
+        self.cells.clear()
+        self._count = 0
+
+    def _keys_in_box(self, x_min, y_min, x_max, y_max):
+        cs = self.cell_size
+        col_min, row_min = int(x_min // cs), int(y_min // cs)
+        col_max, row_max = int(x_max // cs), int(y_max // cs)
+        cells = self.cells
+        if (col_max - col_min + 1) * (row_max - row_min + 1) > len(cells):
+            # Sparse grid: walking the occupied cells is cheaper than the covered range.
+            return [key for key in cells if col_min <= key[0] <= col_max and row_min <= key[1] <= row_max]
+        return [(col, row) for col in range(col_min, col_max + 1) for row in range(row_min, row_max + 1)]
+
+    def query_circle(self, x, y, r):
+        # Cells overlapping the circle's bounding box, filtered by squared distance (no sqrt).
+        hits = []
+        if not self._count: return hits
+        r_sq = r * r
+        cs = self.cell_size
+        cells = self.cells
+        for key in self._keys_in_box(x - r, y - r, x + r, y + r):
+            bucket = cells.get(key)
+            if not bucket: continue
+            # Skip cells whose nearest point is already out of range.
+            col, row = key
+            dx_edge = min(max(x, col * cs), (col + 1) * cs) - x
+            dy_edge = min(max(y, row * cs), (row + 1) * cs) - y
+            if dx_edge * dx_edge + dy_edge * dy_edge > r_sq: continue
+            for item in bucket:
+                dx = item.x - x
+                dy = item.y - y
+                if dx * dx + dy * dy <= r_sq:
+                    hits.append(item)
+        return hits
+
+    def query_capsule(self, x0, y0, x1, y1, r):
+        # Items within r of the segment (x0, y0)-(x1, y1), i.e. everything the scanner swept over.
+        vx, vy = x1 - x0, y1 - y0
+        seg_len_sq = vx * vx + vy * vy
+        if seg_len_sq == 0: return self.query_circle(x1, y1, r)
+        hits = []
+        if not self._count: return hits
+        r_sq = r * r
+        cs = self.cell_size
+        reach = r + cs * HALF_DIAGONAL
+        reach_sq = reach * reach
+        cells = self.cells
+        for key in self._keys_in_box(min(x0, x1) - r, min(y0, y1) - r, max(x0, x1) + r, max(y0, y1) + r):
+            bucket = cells.get(key)
+            if not bucket: continue
+            # The bounding box of a diagonal drag holds many cells far from the segment itself.
+            col, row = key
+            if segment_distance_sq((col + 0.5) * cs, (row + 0.5) * cs, x0, y0, vx, vy, seg_len_sq) > reach_sq: continue
+            for item in bucket:
+                if segment_distance_sq(item.x, item.y, x0, y0, vx, vy, seg_len_sq) <= r_sq:
+                    hits.append(item)
+        return hits
@@ -0,0 +1,5 @@
+# Backend modules import each other as flat siblings (python backend/<module>.py); tests do the same.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
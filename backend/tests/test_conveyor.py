@@ -0,0 +1,62 @@
+# test_conveyor.py
+# Belt loading, throughput limits and CLI validation of the conveyor mode (conveyor.py).
+
+import random
+from itertools import islice
+
+import pytest
+
+from conveyor import Conveyor, arrivals, package_source, run, main
+
+
+def capacity_per_minute(conveyor):
+    return conveyor.belt_speed / (conveyor.package_length + conveyor.gap) * 60
+
+
+def test_saturated_belt_stays_within_capacity():
+    conveyor, _ = run(60, 0, belt_speed=800, gap=5000, scanner_range=80, seed=1)
+    assert conveyor.verified == 60
+    assert sum(conveyor.statuses.values()) == 60
+    # The first package needs no gap ahead of it; every later one waits a full package length plus gap.
+    assert (conveyor.verified - 1) / conveyor.now * 60 <= capacity_per_minute(conveyor)
+    # Likewise a 60 s window can catch one exit more than the steady rate.
+    assert conveyor.packages_per_minute() <= capacity_per_minute(conveyor) + 1
+
+
+def test_packages_keep_the_gap_on_the_belt():
+    rng = random.Random(2)
+    conveyor = Conveyor(arrivals(islice(package_source(rng), 200), rng, 600), gap=100)
+    while not conveyor.done:
+        conveyor.step(0.05)
+        belt = list(conveyor.belt)
+        for ahead, behind in zip(belt, belt[1:]):
+            assert ahead.front - behind.front >= conveyor.package_length + conveyor.gap - 1e-6
+
+
+def test_endless_source_all_due_at_once_is_bounded_per_step():
+    rng = random.Random(3)
+    conveyor = Conveyor(arrivals(package_source(rng), rng, 0), max_infeed=50)
+    for _ in range(20):
+        conveyor.step(0.05)
+    assert len(conveyor.infeed) <= 50
+    assert not conveyor.exhausted
+
+
+@pytest.mark.parametrize("argv", [["--step", "0"], ["--belt-speed", "0"], ["--gap", "-1"], ["--arrivals", "-1"]])
+def test_cli_rejects_settings_that_never_finish(argv):
+    with pytest.raises(SystemExit) as excinfo:
+        main(["--packages", "1"] + argv)
+    assert excinfo.value.code == 2
+
+
+def test_overlapping_antennas_are_deduplicated_per_package():
+    rng = random.Random(4)
+    packages = list(islice(package_source(rng), 50))
+    conveyor = Conveyor(arrivals(packages, rng, 120))
+    while not conveyor.done:
+        conveyor.step(0.05)
+    reads = conveyor.stats()["reads"]
+    assert reads["readsPerAntenna"].keys() == {f"row{i}" for i in range(len(conveyor.antenna_ys))}
+    # Every tag is reported by overlapping antennas on consecutive steps but counted once.
+    assert reads["uniqueReads"] == sum(len(placements) for _, _, placements in packages)
+    assert reads["suppressedReads"] > reads["uniqueReads"]
@@ -0,0 +1,105 @@
+# test_history_store.py
+# Verification history: batched inserts, hourly per-SKU rollup, window queries, idempotent import.
+
+import os
+import time
+from collections import Counter
+from datetime import datetime
+
+import pytest
+
+from history_store import VerificationHistory, format_ts, hour_start
+from rfid_engine import PRODUCT_DATABASE
+from verification import ExpectedTags, build_report
+
+PC = PRODUCT_DATABASE["Phone Case"]
+USB = PRODUCT_DATABASE["USB-C Cable"]
+
+
+def report(order_id, now, order, reads, scan_duration=1.0):
+    return build_report(ExpectedTags(Counter(order), PRODUCT_DATABASE), reads, scan_duration=scan_duration,
+                        order_id=order_id, now=now)
+
+
+def hour_reports(day=datetime(2026, 3, 2)):
+    at = lambda hour, minute: day.replace(hour=hour, minute=minute)
+    return [
+        report("A", at(10, 5), {"Phone Case": 2}, [f"{PC}-1", f"{PC}-2"], 1.0),                 # SUCCESS
+        report("B", at(10, 20), {"Phone Case": 2}, [f"{PC}-1"], 4.0),                           # MISMATCH, PC missing
+        report("C", at(10, 55), {"Phone Case": 1}, [f"{PC}-1", f"{USB}-1"], 2.0),               # CAUTION, USB extra
+        report("D", at(11, 10), {"Phone Case": 1, "USB-C Cable": 1}, [f"{PC}-1", f"{USB}-1"], 3.0),  # SUCCESS
+    ]
+
+
+@pytest.fixture
+def history(tmp_path):
+    with VerificationHistory(str(tmp_path / "history.db"), flush_interval=3600, batch_records=1000) as h:
+        yield h
+
+
+def ts(report_):
+    return datetime.fromisoformat(report_["timestamp"]).timestamp()
+
+
+def test_hourly_rollup_and_mismatch_rates(history):
+    reports = hour_reports()
+    for r in reports: history.write(r)
+    history.flush()
+    assert history.count() == 4
+    ten = hour_start(ts(reports[0]))
+    rows = {(sku, hour): (n, sku_rate, order_rate)
+            for sku, hour, n, sku_rate, order_rate in history.mismatch_rate_by_sku_hour(ten)}
+    assert rows[("Phone Case", ten)] == (3, pytest.approx(1 / 3), pytest.approx(1 / 3))
+    assert rows[("USB-C Cable", ten)] == (1, 1.0, 0.0)
+    assert rows[("Phone Case", ten + 3600)] == (1, 0.0, 0.0)
+    assert rows[("USB-C Cable", ten + 3600)] == (1, 0.0, 0.0)
+    assert history.mismatch_rate_by_sku_hour(ten, ten + 3600, sku="USB-C Cable") == [("USB-C Cable", ten, 1, 1.0, 0.0)]
+    worst = history.worst_skus(ten)
+    assert [row[0] for row in worst] == ["USB-C Cable", "Phone Case"]
+    assert worst[1][1:] == (4, 0.25, 1, 0)
+
+
+def test_window_queries(history):
+    reports = hour_reports()
+    for r in reports: history.write(r)
+    history.flush()
+    assert history.status_counts(ts(reports[0])) == {"SUCCESS": 2, "MISMATCH": 1, "CAUTION": 1}
+    assert history.status_counts(ts(reports[1]), ts(reports[3])) == {"MISMATCH": 1, "CAUTION": 1}
+    assert [row[0] for row in history.slowest_scans(ts(reports[0]), limit=3)] == ["B", "D", "C"]
+    assert [row[0] for row in history.recent(limit=2)] == ["D", "C"]
+    assert [row[0] for row in history.sku_verifications("USB-C Cable", ts(reports[0]))] == ["D", "C"]
+
+
+def test_writing_the_same_reports_again_is_a_no_op(history):
+    reports = hour_reports()
+    for r in reports: history.write(r)
+    history.flush()
+    before = history.mismatch_rate_by_sku_hour(0)
+    for r in reports + reports[:2]: history.write(r)
+    history.flush()
+    assert history.count() == 4
+    assert history.records_written == 4 and history.duplicates_skipped == 6
+    assert history.mismatch_rate_by_sku_hour(0) == before
+
+
+@pytest.fixture
+def half_hour_zone():
+    # UTC+05:30: a UTC-aligned bucket would start at hh:30 local time.
+    previous = os.environ.get("TZ")
+    os.environ["TZ"] = "Asia/Kolkata"
+    time.tzset()
+    yield
+    if previous is None: del os.environ["TZ"]
+    else: os.environ["TZ"] = previous
+    time.tzset()
+
+
+def test_hours_are_local(half_hour_zone, history):
+    at = lambda minute: datetime(2026, 3, 2, 10, minute)
+    for order_id, minute in (("A", 5), ("B", 45), ("C", 59)):
+        history.write(report(order_id, at(minute), {"Phone Case": 1}, [f"{PC}-1"]))
+    history.flush()
+    rows = history.mismatch_rate_by_sku_hour(0)
+    assert len(rows) == 1
+    assert format_ts(rows[0][1]) == "2026-03-02 10:00:00"
+    assert rows[0][2] == 3
@@ -0,0 +1,86 @@
+# test_read_dedup.py
+# Time-window duplicate suppression and the bounded LRU (read_dedup.py), and read ingestion
+# into the engine through it (SimulationEngine.ingest_reads).
+
+from read_dedup import ReadDeduplicator
+from rfid_engine import SimulationEngine, PRODUCT_DATABASE
+
+
+def test_repeat_inside_window_is_suppressed_across_antennas():
+    dedup = ReadDeduplicator(window_seconds=2.0)
+    assert dedup.accept("T-1", "a1", now=0.0)
+    assert not dedup.accept("T-1", "a2", now=1.0)
+    assert dedup.accept("T-2", "a2", now=1.0)
+    counters = dedup.counters()
+    assert counters["rawReads"] == 3 and counters["uniqueReads"] == 2 and counters["suppressedReads"] == 1
+    assert counters["readsPerAntenna"] == {"a1": 1, "a2": 2}
+
+
+def test_window_slides_while_the_tag_keeps_reporting():
+    dedup = ReadDeduplicator(window_seconds=2.0)
+    assert dedup.accept("T-1", now=0.0)
+    # Each repeat refreshes last-seen, so a tag sitting in the field stays one read.
+    for t in (1.5, 3.0, 4.5, 6.0):
+        assert not dedup.accept("T-1", now=t)
+    assert dedup.accept("T-1", now=8.0)
+
+
+def test_expired_tags_are_dropped():
+    dedup = ReadDeduplicator(window_seconds=1.0)
+    dedup.filter(["A", "B", "C"], now=0.0)
+    assert dedup.counters()["trackedTags"] == 3
+    assert dedup.accept("D", now=5.0)
+    assert list(dedup.last_seen) == ["D"]
+
+
+def test_lru_bound_evicts_least_recently_seen():
+    dedup = ReadDeduplicator(window_seconds=60.0, max_tags=3)
+    assert dedup.filter(["A", "B", "C"], now=0.0) == ["A", "B", "C"]
+    assert not dedup.accept("A", now=1.0)            # A becomes most recent
+    assert dedup.accept("D", now=2.0)                # evicts B, the least recently seen
+    assert list(dedup.last_seen) == ["C", "A", "D"]
+    assert dedup.counters()["evictions"] == 1
+    # An evicted tag is unique again, even inside its window.
+    assert dedup.accept("B", now=3.0)
+    assert not dedup.accept("A", now=3.0)
+
+
+def test_clear_forgets_tags_but_keeps_counters():
+    dedup = ReadDeduplicator()
+    dedup.filter(["A", "A"], now=0.0)
+    dedup.clear()
+    assert dedup.accept("A", now=0.1)
+    assert dedup.counters()["rawReads"] == 3 and dedup.counters()["trackedTags"] == 1
+
+
+def cart_engine():
+    engine = SimulationEngine(PRODUCT_DATABASE)
+    engine.add_to_cart("Phone Case", 2)
+    engine.confirm_order()
+    engine.place_item("Phone Case", 100, 100)
+    engine.place_item("Phone Case", 600, 500)
+    return engine
+
+
+def test_ingest_reads_detects_placed_items_once_across_antennas():
+    engine = cart_engine()
+    first, second = engine.placed_items
+    assert engine.ingest_reads([first.rfid_tag, first.rfid_tag], antenna="row0", now=0.0) == [first]
+    assert engine.ingest_reads([first.rfid_tag, second.rfid_tag], antenna="row1", now=0.5) == [second]
+    assert first.detected and second.detected and len(engine.spatial_index) == 0
+    # Detected items are gone from the index, so the scanner cannot report them again.
+    engine.start_scan(100, 100)
+    assert engine.scan_path([(600, 500)]) == []
+    counters = engine.read_filter.counters()
+    assert counters["rawReads"] == 4 and counters["uniqueReads"] == 2
+    assert counters["readsPerAntenna"] == {"row0": 2, "row1": 2}
+    assert engine.finalize_verification()["verificationStatus"] == "SUCCESS"
+
+
+def test_ingest_reads_counts_unplaced_tags_as_extras():
+    engine = cart_engine()
+    assert engine.ingest_reads(["RFID_PB_H9J2-1", "RFID_UNKNOWN-1"], now=0.0) == []
+    assert engine.detected_counts() == {"Power Bank": 1, "RFID_UNKNOWN": 1}
+    report = engine.finalize_verification()
+    assert report["verificationStatus"] == "MISMATCH"
+    assert report["metrics"]["extraItemsCount"] == 2 and report["metrics"]["missingItemsCount"] == 2
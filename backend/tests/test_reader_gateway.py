@@ -0,0 +1,92 @@
+# test_reader_gateway.py
+# Order sessions over the TCP protocol, idle expiry and sink failures (reader_gateway.py).
+
+import asyncio
+import json
+import logging
+
+from reader_gateway import ReaderGateway
+
+
+class FailingSink:
+    def write(self, report):
+        raise OSError("No space left on device")
+
+    def maybe_flush(self):
+        pass
+
+
+def with_gateway(gateway, scenario):
+    # Runs scenario(reader, writer) against a gateway listening on a free local port.
+    async def main():
+        server, housekeeping = await gateway.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            return await asyncio.wait_for(scenario(reader, writer), 10)
+        finally:
+            writer.close()
+            housekeeping.cancel()
+            server.close()
+            await server.wait_closed()
+    return asyncio.run(main())
+
+def send(writer, *messages):
+    writer.write("".join(json.dumps(message) + "\n" for message in messages).encode())
+
+async def receive(reader):
+    line = await reader.readline()
+    assert line, "gateway closed the connection"
+    return json.loads(line)
+
+ORDER = {"type": "open", "orderId": "A1", "items": {"Phone Case": 2}, "reader": "dock-1"}
+
+
+def test_open_read_close_publishes_the_result():
+    gateway = ReaderGateway(idle_timeout=0)
+    async def scenario(reader, writer):
+        send(writer, ORDER,
+             {"type": "read", "orderId": "A1", "tag": "RFID_PC_4Y3Z-1"},
+             {"type": "read", "reader": "dock-1", "tags": ["RFID_PC_4Y3Z-2", "RFID_PC_4Y3Z-1"]},
+             {"type": "close", "orderId": "A1"})
+        return await receive(reader)
+    reply = with_gateway(gateway, scenario)
+    assert reply["type"] == "result"
+    assert reply["report"]["orderId"] == "A1" and reply["report"]["verificationStatus"] == "SUCCESS"
+    assert gateway.sessions == {} and gateway.reader_orders == {}
+    assert gateway.read_filter.counters()["suppressedReads"] == 1
+
+
+def test_protocol_errors_are_answered_on_the_connection():
+    gateway = ReaderGateway(idle_timeout=0)
+    async def scenario(reader, writer):
+        send(writer, ORDER, ORDER, {"type": "read", "orderId": "A1", "tags": [1, 2]}, {"type": "close", "orderId": "B2"})
+        return [await receive(reader) for _ in range(3)]
+    duplicate, bad_tags, unknown = with_gateway(gateway, scenario)
+    assert duplicate == {"type": "error", "message": "Order A1 is already open."}
+    assert bad_tags == {"type": "error", "message": "Tags must be strings."}
+    assert unknown == {"type": "error", "message": "No open order B2."}
+    assert list(gateway.sessions) == ["A1"]
+
+
+def test_idle_orders_are_finalized_as_they_stand():
+    gateway = ReaderGateway(idle_timeout=0.01)
+    async def scenario(reader, writer):
+        send(writer, ORDER, {"type": "read", "orderId": "A1", "tag": "RFID_PC_4Y3Z-1"})
+        return await receive(reader)
+    reply = with_gateway(gateway, scenario)
+    assert reply["report"]["verificationStatus"] == "MISMATCH"
+    assert reply["report"]["metrics"]["missingItemsCount"] == 1
+    assert gateway.sessions == {}
+
+
+def test_failing_sink_still_answers_the_client(caplog):
+    gateway = ReaderGateway(report_sink=FailingSink(), idle_timeout=0)
+    async def scenario(reader, writer):
+        send(writer, ORDER, {"type": "close", "orderId": "A1"}, {"type": "stats"})
+        return await receive(reader), await receive(reader)
+    with caplog.at_level(logging.ERROR, logger="reader_gateway"):
+        result, stats = with_gateway(gateway, scenario)
+    assert result["type"] == "result" and result["report"]["orderId"] == "A1"
+    assert stats["openSessions"] == 0 and stats["statuses"] == {"MISMATCH": 1}
+    assert "Failed to persist the report for order A1" in caplog.text
@@ -0,0 +1,121 @@
+# test_session_recording.py
+# Binary session recordings: format round trip, deterministic replay and the committed fixture.
+
+import os
+from datetime import datetime
+
+import pytest
+
+from headless_sim import make_spatial_index
+from rfid_engine import SimulationEngine, PRODUCT_DATABASE
+from session_recording import SessionRecorder, replay, differences, MAGIC, READS
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "synthetic_session.rfrec")
+# Written by record_synthetic_session(random.Random(3), 3, max_units=4, error_rate=0.5); the
+# results must keep replaying unchanged whatever happens to the detection code.
+FIXTURE_RESULTS = [
+    ("REC_00000_000", "CAUTION", 3, 0, 1),
+    ("REC_00000_001", "MISMATCH", 1, 1, 1),
+    ("REC_00000_002", "SUCCESS", 1, 0, 0),
+]
+
+
+def recorded_session():
+    # Exercises every event type: cart edits, range changes, swept and unswept moves, resets.
+    recorder = SessionRecorder()
+    engine = SimulationEngine(PRODUCT_DATABASE, recorder=recorder)
+    reports = []
+    for n, scanner_range in enumerate((80, 40)):
+        engine.reset()
+        engine.set_scanner_range(scanner_range)
+        engine.add_to_cart("USB-C Cable", 2)
+        engine.clear_cart()
+        engine.add_to_cart("Phone Case", 2)
+        engine.add_to_cart("Power Bank")
+        engine.confirm_order()
+        for name, x, y in (("Phone Case", 120, 100), ("Phone Case", 400, 300), ("Power Bank", 650, 600),
+                           ("USB-C Cable", 300, 120)):
+            engine.place_item(name, x, y)
+        engine.start_scan(100, 100)
+        engine.scan_path([(200, 100), (300, 100), (400, 110)])
+        engine.set_scanner_range(scanner_range + 20)
+        engine.move_scanner(400, 300, swept=False)
+        engine.move_scanner(640, 590)
+        reports.append(dict(engine.finalize_verification(scan_duration=1.25 * (n + 1))))
+    return recorder, reports
+
+
+def test_round_trip_replays_identical_reports():
+    recorder, reports = recorded_session()
+    data = recorder.to_bytes()
+    assert data[:4] == MAGIC
+    loaded = SessionRecorder.from_bytes(data)
+    assert loaded.to_bytes() == data
+    assert loaded.products == recorder.products
+    assert replay(loaded) == reports
+    assert differences(loaded, replay(loaded)) == []
+
+
+def test_replay_with_the_vectorized_detector():
+    pytest.importorskip("numpy")
+    recorder, reports = recorded_session()
+    assert replay(SessionRecorder.from_bytes(recorder.to_bytes()), spatial_index=make_spatial_index("numpy")) == reports
+
+
+def test_committed_fixture_replays_unchanged():
+    recording = SessionRecorder.load(FIXTURE)
+    assert recording.results() == FIXTURE_RESULTS
+    reports = replay(recording)
+    assert differences(recording, reports) == []
+    assert [r["orderId"] for r in reports] == [r[0] for r in FIXTURE_RESULTS]
+    for report in reports:
+        datetime.fromisoformat(report["timestamp"])
+
+
+def test_differences_flags_a_changed_result():
+    recording = SessionRecorder.load(FIXTURE)
+    reports = replay(recording)
+    reports[1] = dict(reports[1], verificationStatus="SUCCESS")
+    assert differences(recording, reports) == [(FIXTURE_RESULTS[1], ("REC_00000_001", "SUCCESS", 1, 1, 1))]
+
+
+def test_rejected_coordinates_leave_engine_and_recording_untouched():
+    recorder = SessionRecorder()
+    engine = SimulationEngine(PRODUCT_DATABASE, recorder=recorder)
+    engine.add_to_cart("Phone Case")
+    engine.confirm_order()
+    engine.place_item("Phone Case", 100, 100)
+    engine.start_scan(100, 100)
+    before = recorder.to_bytes()
+    with pytest.raises(ValueError):
+        engine.place_item("USB-C Cable", 200.5, 100)
+    with pytest.raises(ValueError):
+        engine.scan_path([(150, 100), (160.5, 100)])
+    with pytest.raises(ValueError):
+        engine.set_scanner_range(55.5)
+    assert recorder.to_bytes() == before
+    assert len(engine.placed_items) == 1 and "USB-C Cable" not in recorder.products
+    assert (engine.scanner_x, engine.scanner_y) == (100, 100)
+    assert engine.scanner_range == 80
+
+
+def test_ingested_reads_replay_with_their_timestamps():
+    recorder = SessionRecorder()
+    engine = SimulationEngine(PRODUCT_DATABASE, recorder=recorder)
+    engine.add_to_cart("Phone Case", 2)
+    engine.confirm_order()
+    engine.place_item("Phone Case", 100, 100)
+    engine.place_item("Phone Case", 600, 500)
+    engine.ingest_reads(["RFID_PC_4Y3Z-1", "RFID_PC_4Y3Z-1"], antenna="row0", now=0.0)
+    engine.ingest_reads(["RFID_PC_4Y3Z-1", "RFID_PB_H9J2-1"], antenna="row1", now=2.5)
+    report = dict(engine.finalize_verification(scan_duration=1.0))
+    loaded = SessionRecorder.from_bytes(recorder.to_bytes())
+    reads = [args for op, args in loaded.iter_events() if op == READS]
+    assert reads == [("row0", 0.0, ["RFID_PC_4Y3Z-1"] * 2), ("row1", 2.5, ["RFID_PC_4Y3Z-1", "RFID_PB_H9J2-1"])]
+    assert replay(loaded) == [report]
+    assert report["verificationStatus"] == "MISMATCH"
+
+
+def test_bad_header_is_rejected():
+    with pytest.raises(ValueError):
+        SessionRecorder.from_bytes(b"JUNK" + bytes(16))
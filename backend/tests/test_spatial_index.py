@@ -0,0 +1,99 @@
+# test_spatial_index.py
+# UniformGrid circle and swept-capsule queries against a brute-force scan of every item (spatial_index.py).
+
+import random
+
+import pytest
+
+from rfid_engine import Item
+from spatial_index import UniformGrid
+
+CELL = 80
+
+
+def scattered_items(rng, count):
+    # Half the items sit exactly on cell edges and corners, where bucketing mistakes show up.
+    items = []
+    for n in range(count):
+        if n % 2: x, y = rng.randrange(0, 9) * CELL, rng.randrange(0, 9) * CELL
+        else: x, y = rng.uniform(-50, 700), rng.uniform(-50, 700)
+        items.append(Item("Phone Case", f"RFID_PC_4Y3Z-{n + 1}", x, y))
+    return items
+
+def filled_grid(items, cell_size=CELL):
+    grid = UniformGrid(cell_size)
+    for item in items: grid.insert(item)
+    return grid
+
+def in_circle(items, x, y, r):
+    return {item for item in items if (item.x - x) ** 2 + (item.y - y) ** 2 <= r * r}
+
+
+def test_query_circle_matches_brute_force():
+    rng = random.Random(1)
+    items = scattered_items(rng, 400)
+    for cell_size in (CELL, 33, 500):
+        grid = filled_grid(items, cell_size)
+        for _ in range(300):
+            x, y, r = rng.uniform(-100, 800), rng.uniform(-100, 800), rng.choice((0, 1, 40, 80, 160, 333))
+            hits = grid.query_circle(x, y, r)
+            assert len(hits) == len(set(hits))
+            assert set(hits) == in_circle(items, x, y, r)
+
+
+def test_circle_edge_is_inclusive_across_cell_boundaries():
+    # The scanner sits on a cell corner; the ring of items at exactly r lies in eight other cells.
+    ring = [(240, 160), (80, 160), (160, 240), (160, 80), (208, 224), (112, 96)]
+    items = [Item("Phone Case", f"T-{n}", x, y) for n, (x, y) in enumerate(ring + [(241, 160), (160, 79)])]
+    hits = filled_grid(items).query_circle(160, 160, 80)
+    assert {(item.x, item.y) for item in hits} == set(ring)
+
+
+def test_insert_remove_and_len():
+    items = scattered_items(random.Random(2), 50)
+    grid = filled_grid(items)
+    grid.insert(items[0])
+    assert len(grid) == 50
+    assert grid.remove(items[0]) and not grid.remove(items[0])
+    assert len(grid) == 49
+    assert items[0] not in grid.query_circle(items[0].x, items[0].y, 1)
+    grid.clear()
+    assert len(grid) == 0 and grid.query_circle(300, 300, 1000) == []
+    with pytest.raises(ValueError):
+        UniformGrid(0)
+
+
+def in_capsule(items, x0, y0, x1, y1, r):
+    # Brute force: distance from each item to the closest point of the segment.
+    vx, vy = x1 - x0, y1 - y0
+    seg_len_sq = vx * vx + vy * vy
+    hits = set()
+    for item in items:
+        t = 0 if seg_len_sq == 0 else min(1, max(0, ((item.x - x0) * vx + (item.y - y0) * vy) / seg_len_sq))
+        if (item.x - x0 - t * vx) ** 2 + (item.y - y0 - t * vy) ** 2 <= r * r: hits.add(item)
+    return hits
+
+
+def test_query_capsule_matches_brute_force():
+    rng = random.Random(3)
+    items = scattered_items(rng, 400)
+    for cell_size in (CELL, 33, 500):
+        grid = filled_grid(items, cell_size)
+        for _ in range(300):
+            x0, y0 = rng.uniform(-100, 800), rng.uniform(-100, 800)
+            # Long diagonal drags, short hops, axis-aligned moves and zero-length segments.
+            x1, y1 = rng.choice(((rng.uniform(-100, 800), rng.uniform(-100, 800)), (x0 + rng.uniform(-5, 5), y0),
+                                 (x0, y0 + rng.uniform(-300, 300)), (x0, y0)))
+            r = rng.choice((0, 1, 40, 80, 160))
+            hits = grid.query_capsule(x0, y0, x1, y1, r)
+            assert len(hits) == len(set(hits))
+            assert set(hits) == in_capsule(items, x0, y0, x1, y1, r)
+
+
+def test_capsule_reaches_items_between_samples_on_cell_edges():
+    # A drag along a cell edge: the samples at both ends are far from the items the segment passes.
+    items = [Item("Phone Case", f"T-{n}", x, y) for n, (x, y) in enumerate(((400, 240), (400, 320), (320, 400), (400, 321)))]
+    grid = filled_grid(items)
+    assert grid.query_circle(0, 320, 80) == [] and grid.query_circle(800, 320, 80) == []
+    assert {(item.x, item.y) for item in grid.query_capsule(0, 320, 800, 320, 80)} == {(400, 240), (400, 320), (400, 321), (320, 400)}
+    assert set(grid.query_capsule(400, 320, 400, 320, 80)) == set(grid.query_circle(400, 320, 80))
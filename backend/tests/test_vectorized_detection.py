@@ -0,0 +1,159 @@
+# test_vectorized_detection.py
+# TagArray range and swept-capsule queries and first-detection times against a brute-force scan
+# (vectorized_detection.py).
+
+import math
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+from rfid_engine import SimulationEngine, PRODUCT_DATABASE
+from vectorized_detection import TagArray
+
+
+def random_tags(rng, count):
+    # Integer positions so "exactly r away" cases are exact in floating point too.
+    return [rng.randrange(0, 700) for _ in range(count)], [rng.randrange(0, 700) for _ in range(count)]
+
+def random_path(rng, length):
+    return [rng.randrange(0, 700) for _ in range(length)], [rng.randrange(0, 700) for _ in range(length)]
+
+def first_in_range(xs, ys, path_xs, path_ys, r):
+    # Brute force: index of the first path position within r of each tag.
+    first = []
+    for x, y in zip(xs, ys):
+        hits = [i for i, (px, py) in enumerate(zip(path_xs, path_ys)) if (x - px) ** 2 + (y - py) ** 2 <= r * r]
+        first.append(hits[0] if hits else math.inf)
+    return first
+
+
+def test_query_circle_matches_brute_force():
+    rng = random.Random(1)
+    xs, ys = random_tags(rng, 500)
+    tags = TagArray.from_coordinates(xs, ys)
+    for _ in range(200):
+        x, y, r = rng.randrange(-50, 750), rng.randrange(-50, 750), rng.choice((0, 40, 80, 200))
+        expected = {i for i in range(len(xs)) if (xs[i] - x) ** 2 + (ys[i] - y) ** 2 <= r * r}
+        assert set(tags._in_range(x, y, r).tolist()) == expected
+
+
+@pytest.mark.parametrize("chunk_elements", [1, 97, 1_000_000])
+def test_first_detection_times_match_brute_force(chunk_elements):
+    rng = random.Random(2)
+    xs, ys = random_tags(rng, 300)
+    path_xs, path_ys = random_path(rng, 60)
+    tags = TagArray.from_coordinates(xs, ys)
+    first = tags.first_detection_times(path_xs, path_ys, 80, chunk_elements=chunk_elements)
+    assert first.tolist() == first_in_range(xs, ys, path_xs, path_ys, 80)
+    times = [0.5 * i for i in range(len(path_xs))]
+    stamped = tags.first_detection_times(path_xs, path_ys, 80, times=times, chunk_elements=chunk_elements)
+    assert stamped.tolist() == [f * 0.5 for f in first.tolist()]
+
+
+def test_detect_path_skips_detected_tags_and_covers():
+    rng = random.Random(3)
+    xs, ys = random_tags(rng, 200)
+    path_xs, path_ys = random_path(rng, 30)
+    tags = TagArray.from_coordinates(xs, ys)
+    reference = first_in_range(xs, ys, path_xs, path_ys, 80)
+    found = tags.detect_path(path_xs, path_ys, 80)
+    assert set(found.tolist()) == {i for i, t in enumerate(reference) if t != math.inf}
+    assert tags.remaining() == reference.count(math.inf)
+    assert len(tags.detect_path(path_xs, path_ys, 80)) == 0
+    assert not np.isfinite(tags.first_detection_times(path_xs, path_ys, 80, undetected_only=True)).any()
+    assert tags.covers(path_xs, path_ys, 80) == (math.inf not in reference)
+    assert tags.covers(path_xs, path_ys, 1000)
+
+
+def test_mismatched_lengths_are_rejected():
+    tags = TagArray.from_coordinates([1, 2], [1, 2])
+    with pytest.raises(ValueError):
+        tags.first_detection_times([0, 1], [0], 10)
+    with pytest.raises(ValueError):
+        tags.first_detection_times([0, 1], [0, 1], 10, times=[0])
+    with pytest.raises(ValueError):
+        TagArray.from_coordinates([1, 2], [1])
+
+
+def first_swept_time(x, y, path_xs, path_ys, stamps, r):
+    # Brute force: walk the segments in order and solve |p0 + t*v - tag| = r for the entry point.
+    for i in range(len(path_xs) - 1):
+        ox, oy = path_xs[i] - x, path_ys[i] - y
+        c = ox * ox + oy * oy - r * r
+        if c <= 0: return stamps[i]
+        vx, vy = path_xs[i + 1] - path_xs[i], path_ys[i + 1] - path_ys[i]
+        a = vx * vx + vy * vy
+        if a == 0: continue
+        b = 2 * (vx * ox + vy * oy)
+        disc = b * b - 4 * a * c
+        if disc < 0: continue
+        t = (-b - math.sqrt(disc)) / (2 * a)
+        if 0 <= t <= 1: return stamps[i] + t * (stamps[i + 1] - stamps[i])
+    return math.inf
+
+def segment_hits(xs, ys, x0, y0, x1, y1, r):
+    vx, vy = x1 - x0, y1 - y0
+    seg_len_sq = vx * vx + vy * vy
+    hits = set()
+    for i, (x, y) in enumerate(zip(xs, ys)):
+        t = 0 if seg_len_sq == 0 else min(1, max(0, ((x - x0) * vx + (y - y0) * vy) / seg_len_sq))
+        if (x - x0 - t * vx) ** 2 + (y - y0 - t * vy) ** 2 <= r * r: hits.add(i)
+    return hits
+
+
+def test_query_capsule_matches_brute_force():
+    rng = random.Random(4)
+    xs, ys = random_tags(rng, 500)
+    tags = TagArray.from_coordinates(xs, ys)
+    for _ in range(200):
+        x0, y0 = rng.randrange(-50, 750), rng.randrange(-50, 750)
+        x1, y1 = rng.choice(((rng.randrange(-50, 750), rng.randrange(-50, 750)), (x0, y0), (x0 + 80, y0)))
+        r = rng.choice((0, 40, 80))
+        assert set(tags._in_capsule(x0, y0, x1, y1, r).tolist()) == segment_hits(xs, ys, x0, y0, x1, y1, r)
+
+
+@pytest.mark.parametrize("chunk_elements", [1, 97, 1_000_000])
+def test_swept_first_detection_times_match_brute_force(chunk_elements):
+    rng = random.Random(5)
+    xs, ys = random_tags(rng, 300)
+    path_xs, path_ys = random_path(rng, 40)
+    # Repeated samples give zero-length segments; the sweep must neither skip nor divide by them.
+    for i in (5, 6, 20):
+        path_xs.insert(i, path_xs[i - 1]); path_ys.insert(i, path_ys[i - 1])
+    stamps = [0.25 * i for i in range(len(path_xs))]
+    tags = TagArray.from_coordinates(xs, ys)
+    first = tags.first_detection_times(path_xs, path_ys, 80, times=stamps, swept=True, chunk_elements=chunk_elements)
+    expected = [first_swept_time(x, y, path_xs, path_ys, stamps, 80) for x, y in zip(xs, ys)]
+    assert first.tolist() == pytest.approx(expected)
+    # The tags found are exactly those inside some swept capsule, and never later than the sampled positions.
+    swept = set().union(*(segment_hits(xs, ys, path_xs[i], path_ys[i], path_xs[i + 1], path_ys[i + 1], 80)
+                          for i in range(len(path_xs) - 1)))
+    assert set(np.flatnonzero(np.isfinite(first)).tolist()) == swept
+    sampled = first_in_range(xs, ys, path_xs, path_ys, 80)
+    assert all(t <= 0.25 * s for t, s in zip(first.tolist(), sampled))
+
+
+def test_swept_detection_finds_tags_jumped_over():
+    tags = TagArray.from_coordinates([300, 300, 300], [100, 180, 181])
+    assert not np.isfinite(tags.first_detection_times([100, 500], [100, 100], 80)).any()
+    first = tags.first_detection_times([100, 500], [100, 100], 80, times=[0.0, 4.0], swept=True)
+    assert first[0] == pytest.approx(1.2) and first[1] == pytest.approx(2.0) and first[2] == math.inf
+    # A single position cannot sweep, and a stationary scanner only sees what is in range.
+    assert tags.first_detection_times([300], [100], 80, swept=True).tolist() == [0, 0, math.inf]
+    assert tags.first_detection_times([300, 300], [100, 100], 80, swept=True).tolist() == [0, 0, math.inf]
+    assert tags.covers([100, 500, 500, 100], [100, 100, 181, 181], 80, swept=True)
+
+
+def test_engine_detects_the_same_items_with_either_index():
+    rng = random.Random(6)
+    placements = [(rng.choice(list(PRODUCT_DATABASE)), rng.randrange(50, 700), rng.randrange(50, 650)) for _ in range(300)]
+    path = list(zip(*random_path(rng, 25)))
+    detected = []
+    for spatial_index in (None, TagArray()):
+        engine = SimulationEngine(PRODUCT_DATABASE, spatial_index=spatial_index)
+        for name, x, y in placements: engine.place_item(name, x, y)
+        engine.start_scan(*path[0])
+        for i in range(1, len(path), 4): engine.scan_path(path[i:i + 4])
+        detected.append(set(engine.detected_rfids))
+    assert detected[0] == detected[1] and 0 < len(detected[0]) < len(placements)
@@ -0,0 +1,81 @@
+# test_verification.py
+# Order-vs-scan diff and report schema (verification.py).
+
+from collections import Counter
+from datetime import datetime
+
+from rfid_engine import PRODUCT_DATABASE
+from verification import ExpectedTags, build_report, build_reverse_index, split_tag
+
+PC = PRODUCT_DATABASE["Phone Case"]
+USB = PRODUCT_DATABASE["USB-C Cable"]
+
+
+def report(order, reads):
+    expected = ExpectedTags(Counter(order), PRODUCT_DATABASE, build_reverse_index(PRODUCT_DATABASE))
+    return build_report(expected, reads, order_id="T1", now=datetime(2026, 1, 1, 12, 0))
+
+
+def test_split_tag():
+    assert split_tag(f"{PC}-12") == (PC, 12)
+    assert split_tag("NO_SERIAL") == ("NO_SERIAL", None)
+    assert split_tag("TAG-x") == ("TAG-x", None)
+
+
+def test_exact_match_is_success():
+    data = report({"Phone Case": 2, "USB-C Cable": 1}, [f"{PC}-1", f"{PC}-2", f"{USB}-1"])
+    assert data["verificationStatus"] == "SUCCESS"
+    assert data["detectedItems"] == {"Phone Case": 2, "USB-C Cable": 1}
+    assert data["missingItemsDetail"] == {} and data["extraItemsDetail"] == {}
+    assert data["metrics"]["expectedItemsCount"] == 3
+    assert data["metrics"]["detectedItemsCount"] == 3
+    assert data["orderId"] == "T1" and data["timestamp"] == "2026-01-01T12:00:00"
+
+
+def test_missing_units_are_reported_per_product():
+    data = report({"Phone Case": 3, "USB-C Cable": 1}, [f"{PC}-2"])
+    assert data["verificationStatus"] == "MISMATCH"
+    assert data["missingItemsDetail"] == {"Phone Case": 2, "USB-C Cable": 1}
+    assert data["metrics"]["missingItemsCount"] == 3
+    assert data["extraItemsDetail"] == {}
+
+
+def test_unordered_product_is_extra():
+    data = report({"Phone Case": 1}, [f"{PC}-1", f"{USB}-1"])
+    assert data["verificationStatus"] == "CAUTION"
+    assert data["extraItemsDetail"] == {"USB-C Cable": 1}
+    assert data["detectedItems"] == {"Phone Case": 1, "USB-C Cable": 1}
+
+
+def test_serial_beyond_ordered_quantity_is_extra_not_matched():
+    data = report({"Phone Case": 2}, [f"{PC}-1", f"{PC}-3"])
+    assert data["verificationStatus"] == "MISMATCH"
+    assert data["missingItemsDetail"] == {"Phone Case": 1}
+    assert data["extraItemsDetail"] == {"Phone Case": 1}
+    assert data["detectedItems"] == {"Phone Case": 2}
+
+
+def test_unknown_base_tag_is_extra_under_the_tag_itself():
+    data = report({"Phone Case": 1}, [f"{PC}-1", "RFID_UNKNOWN-1", "GARBAGE"])
+    assert data["verificationStatus"] == "CAUTION"
+    assert data["extraItemsDetail"] == {"RFID_UNKNOWN": 1, "GARBAGE": 1}
+
+
+def test_duplicate_reads_count_once():
+    data = report({"Phone Case": 2}, [f"{PC}-1", f"{PC}-1", f"{PC}-2", f"{PC}-2", f"{PC}-2"])
+    assert data["verificationStatus"] == "SUCCESS"
+    assert data["metrics"]["detectedItemsCount"] == 2
+    assert data["detectedItems"] == {"Phone Case": 2}
+
+
+def test_expected_tags_are_lazy_serial_ranges():
+    expected = ExpectedTags({"Phone Case": 3, "USB-C Cable": 0}, PRODUCT_DATABASE)
+    assert len(expected) == 3
+    assert f"{PC}-3" in expected and f"{PC}-4" not in expected and f"{PC}-0" not in expected
+    assert f"{USB}-1" not in expected
+    assert list(expected) == [f"{PC}-1", f"{PC}-2", f"{PC}-3"]
+    detected = {f"{PC}-2", f"{USB}-1"}
+    assert list(expected.missing(detected)) == [f"{PC}-1", f"{PC}-3"]
+    assert expected.missing_counts(detected) == {"Phone Case": 2}
+    assert expected.extra(detected) == [f"{USB}-1"]
+    assert not ExpectedTags({}, PRODUCT_DATABASE)
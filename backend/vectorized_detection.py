@@ -0,0 +1,172 @@
+# vectorized_detection.py
+# NumPy-backed tag positions for pallets with 10k-100k tags and offline sweep-path analysis.
+
+# --- Prerequisite: pip install numpy ---
+import numpy as np
+
+# Upper bound on (positions x tags) evaluated per step of a path sweep, to keep memory flat.
+DEFAULT_CHUNK_ELEMENTS = 1_000_000
+
+
+class TagArray:
+    # Drop-in alternative to spatial_index.UniformGrid for SimulationEngine(spatial_index=...).
+    def __init__(self, capacity=1024):
+        capacity = max(1, int(capacity))
+        self.xs = np.empty(capacity, dtype=np.float64)
+        self.ys = np.empty(capacity, dtype=np.float64)
+        self.detected = np.zeros(capacity, dtype=bool)
+        self.items = []
+        self._index_of = {}
+        self._n = 0
+
+    @classmethod
+    def from_coordinates(cls, xs, ys):
+        # Raw coordinates without Item objects, for offline coverage checks.
+        xs = np.asarray(xs, dtype=np.float64); ys = np.asarray(ys, dtype=np.float64)
+        if xs.shape != ys.shape: raise ValueError("xs and ys must have the same length")
+        tags = cls(capacity=len(xs))
+        tags.xs[:len(xs)] = xs; tags.ys[:len(ys)] = ys
+        tags.items = [None] * len(xs)
+        tags._n = len(xs)
+        return tags
+
+    def __len__(self):
+        return self._n
+
+    def remaining(self):
+        return int(self._n - np.count_nonzero(self.detected[:self._n]))
+
+    def _grow(self, needed):
+        capacity = len(self.xs)
+        if needed <= capacity: return
+        while capacity < needed: capacity *= 2
+        for name in ("xs", "ys", "detected"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self._n] = old[:self._n]
+            setattr(self, name, new)
+
+    # --- UniformGrid-compatible interface ---
+    def insert(self, item):
+        if item in self._index_of: return
+        self._grow(self._n + 1)
+        i = self._n
+        self.xs[i] = item.x; self.ys[i] = item.y
+        self.detected[i] = bool(item.detected)
+        self.items.append(item)
+        self._index_of[item] = i
+        self._n += 1
+
+    def remove(self, item):
+        i = self._index_of.get(item)
+        if i is None or self.detected[i]: return False
+        self.detected[i] = True
+        return True
+
+    def clear(self):
+        self.detected[:self._n] = False
+        self.items.clear(); self._index_of.clear()
+        self._n = 0
+
+    def query_circle(self, x, y, r):
+        return [self.items[i] for i in self._in_range(x, y, r)]
+
+    def query_capsule(self, x0, y0, x1, y1, r):
+        return [self.items[i] for i in self._in_capsule(x0, y0, x1, y1, r)]
+
+    # --- Vectorized detection ---
+    def _in_range(self, x, y, r):
+        n = self._n
+        dx = self.xs[:n] - x
+        dy = self.ys[:n] - y
+        hit = (dx * dx + dy * dy <= r * r) & ~self.detected[:n]
+        return np.flatnonzero(hit)
+
+    def _in_capsule(self, x0, y0, x1, y1, r):
+        n = self._n
+        vx, vy = x1 - x0, y1 - y0
+        seg_len_sq = vx * vx + vy * vy
+        if seg_len_sq == 0: return self._in_range(x1, y1, r)
+        t = np.clip(((self.xs[:n] - x0) * vx + (self.ys[:n] - y0) * vy) / seg_len_sq, 0.0, 1.0)
+        dx = self.xs[:n] - x0 - t * vx
+        dy = self.ys[:n] - y0 - t * vy
+        hit = (dx * dx + dy * dy <= r * r) & ~self.detected[:n]
+        return np.flatnonzero(hit)
+
+    def detect_at(self, x, y, r):
+        idx = self._in_range(x, y, r)
+        self.detected[idx] = True
+        return idx
+
+    def detect_path(self, path_xs, path_ys, r, swept=False):
+        times = self.first_detection_times(path_xs, path_ys, r, undetected_only=True, swept=swept)
+        idx = np.flatnonzero(np.isfinite(times))
+        self.detected[idx] = True
+        return idx
+
+    def first_detection_times(self, path_xs, path_ys, r, times=None, undetected_only=False, swept=False,
+                              chunk_elements=DEFAULT_CHUNK_ELEMENTS):
+        # Per-tag time (or path index when times is None) of the first scanner position in range; inf if never.
+        # With swept=True the scanner is treated as moving in straight lines between samples and the
+        # entry time is interpolated along the segment where the tag first comes into range.
+        path_xs = np.asarray(path_xs, dtype=np.float64); path_ys = np.asarray(path_ys, dtype=np.float64)
+        if path_xs.shape != path_ys.shape: raise ValueError("path_xs and path_ys must have the same length")
+        stamps = np.arange(len(path_xs), dtype=np.float64) if times is None else np.asarray(times, dtype=np.float64)
+        if stamps.shape != path_xs.shape: raise ValueError("times must match the path length")
+
+        n = self._n
+        first = np.full(n, np.inf)
+        pending = np.flatnonzero(~self.detected[:n]) if undetected_only else np.arange(n)
+        if swept and len(path_xs) > 1:
+            return self._first_swept_times(path_xs, path_ys, stamps, r, first, pending, chunk_elements)
+        r_sq = r * r
+        start = 0
+        while start < len(path_xs) and len(pending):
+            # Shrink the tag set as tags are found so later chunks get cheaper.
+            step = max(1, chunk_elements // len(pending))
+            px = path_xs[start:start + step, None]; py = path_ys[start:start + step, None]
+            dx = self.xs[pending][None, :] - px
+            dy = self.ys[pending][None, :] - py
+            hit = dx * dx + dy * dy <= r_sq
+            found = hit.any(axis=0)
+            if found.any():
+                first_pos = hit[:, found].argmax(axis=0)
+                first[pending[found]] = stamps[start + first_pos]
+                pending = pending[~found]
+            start += step
+        return first
+
+    def _first_swept_times(self, path_xs, path_ys, stamps, r, first, pending, chunk_elements):
+        # Smallest t in [0, 1] with |p0 + t*v - tag| <= r, per (segment, tag) pair.
+        r_sq = r * r
+        segments = len(path_xs) - 1
+        start = 0
+        while start < segments and len(pending):
+            step = max(1, chunk_elements // len(pending))
+            stop = min(start + step, segments)
+            x0 = path_xs[start:stop, None]; y0 = path_ys[start:stop, None]
+            vx = path_xs[start + 1:stop + 1, None] - x0; vy = path_ys[start + 1:stop + 1, None] - y0
+            ox = x0 - self.xs[pending][None, :]; oy = y0 - self.ys[pending][None, :]
+            a = vx * vx + vy * vy
+            b = 2 * (vx * ox + vy * oy)
+            c = ox * ox + oy * oy - r_sq
+            disc = b * b - 4 * a * c
+            with np.errstate(divide="ignore", invalid="ignore"):
+                t_enter = (-b - np.sqrt(np.maximum(disc, 0))) / (2 * a)
+            inside_at_start = c <= 0
+            enters = (a > 0) & (disc >= 0) & (t_enter >= 0) & (t_enter <= 1)
+            t_hit = np.where(inside_at_start, 0.0, np.where(enters, t_enter, np.inf))
+            found = np.isfinite(t_hit).any(axis=0)
+            if found.any():
+                hit = t_hit[:, found]
+                seg = np.isfinite(hit).argmax(axis=0)
+                t = hit[seg, np.arange(hit.shape[1])]
+                seg += start
+                first[pending[found]] = stamps[seg] + t * (stamps[seg + 1] - stamps[seg])
+                pending = pending[~found]
+            start = stop
+        return first
+
+    def covers(self, path_xs, path_ys, r, swept=False):
+        # True when every tag is reached at least once by the sweep.
+        return bool(np.isfinite(self.first_detection_times(path_xs, path_ys, r, swept=swept)).all())
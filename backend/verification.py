@@ -0,0 +1,126 @@
+# verification.py
+# Order-vs-scan verification shared by the Tk app, headless and batch modes.
+#
+# Unit tags are "<base tag>-<serial>" (e.g. RFID_PC_4Y3Z-3) with serials 1..quantity per
+# product line, so an order is fully described by its per-product quantities and the diff
+# against the detected tags is a single O(tags) pass over per-SKU multisets.
+
+from collections import Counter
+from datetime import datetime
+
+
+def build_reverse_index(product_database):
+    # Base tag -> product name. Catalogs too large to invert in memory (product_catalog.ProductCatalog)
+    # supply their own on-demand lookup with the same .get() interface.
+    if hasattr(product_database, "reverse_index"): return product_database.reverse_index()
+    return {base_rfid: name for name, base_rfid in product_database.items()}
+
+
+def split_tag(rfid_tag):
+    base, sep, serial = rfid_tag.rpartition('-')
+    if not sep or not serial.isdigit(): return rfid_tag, None
+    return base, int(serial)
+
+
+class ExpectedTags:
+    # An order as lazy per-SKU serial ranges: base tag -> quantity stands in for the full set of
+    # "<base>-1" .. "<base>-<quantity>" strings, which are never materialized. This is the one
+    # place detected tags are matched against an order (engine, gateway, batch and benchmarks).
+    def __init__(self, expected_counts, product_database, reverse_index=None):
+        self.counts = dict(expected_counts)
+        self.ranges = {}
+        self.names = {}
+        for name, quantity in self.counts.items():
+            if quantity > 0:
+                base = product_database[name]
+                self.ranges[base] = quantity
+                self.names[base] = name
+        self.reverse_index = reverse_index if reverse_index is not None else build_reverse_index(product_database)
+        self._total = sum(self.ranges.values())
+
+    def __len__(self):
+        return self._total
+
+    def __bool__(self):
+        return self._total > 0
+
+    def __contains__(self, rfid_tag):
+        base, serial = split_tag(rfid_tag)
+        return serial is not None and 1 <= serial <= self.ranges.get(base, 0)
+
+    def __iter__(self):
+        for base, quantity in self.ranges.items():
+            for serial in range(1, quantity + 1):
+                yield f"{base}-{serial}"
+
+    def diff(self, detected_rfids):
+        # Returns (matched, missing, extra) Counters keyed by product name in a single O(tags) pass.
+        # Tags whose base is not in the catalog are counted as extra under the base tag itself.
+        ranges, names, reverse_index = self.ranges, self.names, self.reverse_index
+        matched = Counter()
+        extra = Counter()
+        for rfid_tag in detected_rfids:
+            base, serial = split_tag(rfid_tag)
+            if serial is not None and 1 <= serial <= ranges.get(base, 0):
+                matched[names[base]] += 1
+            else:
+                name = reverse_index.get(base)
+                extra[name if name is not None else base] += 1
+        missing = Counter()
+        for base, quantity in ranges.items():
+            shortfall = quantity - matched[names[base]]
+            if shortfall > 0: missing[names[base]] = shortfall
+        return matched, missing, extra
+
+    def missing_counts(self, detected_rfids):
+        # Product name -> number of expected units not detected, without enumerating serials.
+        return self.diff(detected_rfids)[1]
+
+    def missing(self, detected_rfids):
+        # Yields the missing tags themselves, one SKU at a time.
+        serials = {}
+        for rfid_tag in detected_rfids:
+            if rfid_tag in self:
+                base, serial = split_tag(rfid_tag)
+                serials.setdefault(base, set()).add(serial)
+        for base, quantity in self.ranges.items():
+            seen = serials.get(base, ())
+            if len(seen) == quantity: continue
+            for serial in range(1, quantity + 1):
+                if serial not in seen: yield f"{base}-{serial}"
+
+    def extra(self, detected_rfids):
+        return [rfid_tag for rfid_tag in detected_rfids if rfid_tag not in self]
+
+
+def verification_status(missing_count, extra_count):
+    if missing_count: return "MISMATCH"
+    if extra_count: return "CAUTION"
+    return "SUCCESS"
+
+
+def build_report(expected, detected_rfids, scan_duration=0, order_id=None, placed_count=None, now=None):
+    # Same schema as RFIDSimulationApp.last_verification_data; expected is an ExpectedTags.
+    # A tag read more than once counts once.
+    if not isinstance(detected_rfids, (set, frozenset)): detected_rfids = set(detected_rfids)
+    matched, missing, extra = expected.diff(detected_rfids)
+    missing_count = sum(missing.values())
+    extra_count = sum(extra.values())
+    now = now or datetime.now()
+    return {
+        "orderId": order_id or f"Custom_Order_{now.strftime('%Y%m%d%H%M%S')}",
+        "timestamp": now.isoformat(),
+        "verificationStatus": verification_status(missing_count, extra_count),
+        "scanDurationSeconds": round(scan_duration, 2),
+        "metrics": {
+            "expectedItemsCount": sum(expected.counts.values()),
+            "placedItemsCount": len(detected_rfids) if placed_count is None else placed_count,
+            "detectedItemsCount": len(detected_rfids),
+            "missingItemsCount": missing_count,
+            "extraItemsCount": extra_count,
+        },
+        "expectedItems": dict(expected.counts),
+        "detectedItems": dict(matched + extra),
+        "missingItemsDetail": dict(missing),
+        "extraItemsDetail": dict(extra),
+    }